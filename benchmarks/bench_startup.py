@@ -0,0 +1,92 @@
+"""起動時間のベンチマーク。
+
+リポジトリのルートで`python benchmarks/bench_startup.py`として実行する。
+各項目を別プロセスで複数回計測し、最小値をミリ秒で表示する。
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SOURCE = """整数型: i, x←0
+for (iを1から10まで1ずつ増やす)
+    x←x+i
+endfor
+return x
+"""
+
+FIRST_RUN = """
+import contextlib, io, time
+start = time.perf_counter()
+from src.interpreter import Interpreter
+interpreter = Interpreter()
+interpreter.interpret_main_process({lines!r})
+with contextlib.redirect_stdout(io.StringIO()):
+    interpreter.execute_lts()
+print(time.perf_counter() - start)
+"""
+
+
+def measure_process(args, repeat: int):
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        elapsed.append(time.perf_counter() - start)
+    return min(elapsed)
+
+
+def measure_first_run(repeat: int):
+    code = FIRST_RUN.format(lines=SOURCE.splitlines())
+    elapsed = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        elapsed.append(float(result.stdout))
+    return min(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", help="計測回数", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = Path(tmp_dir) / "source.txt"
+        source.write_text(SOURCE)
+        results = {
+            "python起動のみ": measure_process(
+                [sys.executable, "-c", "pass"], args.repeat
+            ),
+            "import src.interpreter": measure_process(
+                [sys.executable, "-c", "import src.interpreter"], args.repeat
+            ),
+            "初回のコンパイルと実行(プロセス内)": measure_first_run(args.repeat),
+            "manager.py --command execute_file": measure_process(
+                [
+                    sys.executable,
+                    "manager.py",
+                    "--command",
+                    "execute_file",
+                    "--source_code",
+                    str(source),
+                ],
+                args.repeat,
+            ),
+        }
+    for name, elapsed in results.items():
+        print(f"{elapsed * 1000:>10.2f}ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
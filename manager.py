@@ -1,13 +1,30 @@
 import argparse
 import json
 from pathlib import Path
+from typing import List
+from src.coverage import CoverageCollector
+from src.differential import ENGINES, run_differential
+from src.generator import ProgramGenerator
+from src.harness import Harness, load_cases
+from src.image import ProgramImage, attach_image, write_image
 from src.interpreter import Interpreter
+from src.optimizer import optimize_interpreter
+from src.profiler import LineProfiler
+from src.server import serve
+from src.snapshot import dump_execution, load_execution
+from src.source import LineStream
+from src.vectorizer import attach_vectorizer
 
 
 class InterpreterManager:
-    def __init__(self):
-        self.interpreter = Interpreter()
+    def __init__(
+        self, lazy_compile: bool = False, interpreter: Interpreter | None = None
+    ):
+        if interpreter is None:
+            interpreter = Interpreter(lazy_compile=lazy_compile)
+        self.interpreter = interpreter
         self.file_lines = None
+        self.file_path = None
 
     def read_file(self, file: str):
         filepath = Path(file)
@@ -16,17 +33,139 @@ class InterpreterManager:
             return
         with open(filepath) as f:
             self.file_lines = f.readlines()
+        self.file_path = file
 
     def compile_lines(self):
-        self.interpreter.interpret_main_process(self.file_lines)
+        self.interpreter.interpret_main_process(self.file_lines, file=self.file_path)
+
+    def compile_source(self, source: str, file: str | None = None):
+        self.file_lines = source.splitlines(keepends=True)
+        self.file_path = file
+        self.interpreter.interpret_source(source, file=file)
 
     def read_and_compile(self, file: str):
         self.read_file(file)
         self.compile_lines()
 
+    def stream_compile(self, file: str):
+        # ファイル全体を読み込まずに1行ずつ読み進めながらコンパイルする
+        filepath = Path(file)
+        if not filepath.exists():
+            print("指定されたパスは存在しません。")
+            return
+        self.file_lines = None
+        self.file_path = file
+        with open(filepath) as f:
+            self.interpreter.interpret_main_process(LineStream(f), file=file)
+
+    def check_files(self, files: List[str]):
+        # 各ファイルの構文エラーを1度の解析で全て収集する
+        results = {}
+        for file in files:
+            filepath = Path(file)
+            if not filepath.exists():
+                print(f"指定されたパスは存在しません。:{file}")
+                continue
+            with open(filepath) as f:
+                lines = f.readlines()
+            interpreter = Interpreter()
+            results[file] = [
+                error._asdict() for error in interpreter.check_syntax(lines, file=file)
+            ]
+        return results
+
+    def optimize_code(self):
+        # コンパイル済みのLTSから不要な状態を除去し、状態数・遷移数の変化を表示する
+        stats = optimize_interpreter(self.interpreter)
+        for func_name, (before, after) in stats.items():
+            print(
+                f"{func_name} 状態数：{before[0]}→{after[0]} "
+                f"遷移数：{before[1]}→{after[1]}"
+            )
+        return stats
+
+    def build_image(self, target: str = "program.img"):
+        with open(Path(target), "wb") as f:
+            write_image(self.interpreter, f)
+
+    def get_image(self):
+        # ファイルを介さずにメモリ上でプログラムイメージを作成する
+        return ProgramImage.build(self.interpreter)
+
+    def load_image(self, source: str = "program.img"):
+        # イメージはmmapで読み込み、プログラム本体を他のプロセスと共有する
+        attach_image(self.interpreter, ProgramImage.open(source))
+
+    def run_cases(
+        self,
+        cases_file: str,
+        func_name: str | None = None,
+        workers: int = 1,
+        executor: str = "thread",
+        memory_limit: int | None = None,
+    ):
+        # 1度だけコンパイルし、テストケースごとに新しい変数領域で実行する
+        with open(Path(cases_file)) as f:
+            cases = load_cases(json.load(f))
+        harness = Harness(
+            self.file_lines,
+            file=self.file_path,
+            func_name=func_name,
+            memory_limit=memory_limit,
+        )
+        results = harness.run(cases, workers=workers, executor=executor)
+        print(Harness.format_report(results), end="")
+        return results
+
+    def differential_test(self, engine: str = "image", fuzz: int = 0, seed: int = 0):
+        # fuzzが指定された場合は乱数で生成したプログラムを、それ以外は読み込んだファイルを比較する
+        if fuzz > 0:
+            programs = [ProgramGenerator(seed + idx).generate() for idx in range(fuzz)]
+        else:
+            programs = [self.file_lines]
+        divergences = []
+        for lines in programs:
+            divergence = run_differential(lines, engine=engine)
+            if divergence is not None:
+                divergences.append((lines, divergence))
+                print("".join(line.rstrip("\n") + "\n" for line in lines), end="")
+                print(
+                    f"{divergence.step}番目の状態が一致しません。"
+                    f"期待値：{divergence.expected} 結果：{divergence.actual}"
+                )
+        print(f"比較したプログラム：{len(programs)} 不一致：{len(divergences)}")
+        return divergences
+
     def execute_code(self):
         self.interpreter.execute_lts()
 
+    def profile_code(self, output_format: str = "text", target: str | None = None):
+        profiler = LineProfiler()
+        self.interpreter.execute_lts(profiler=profiler)
+        if output_format == "text":
+            if target is None:
+                profiler.print_listing()
+                return
+            with open(Path(target), "w") as f:
+                f.write(profiler.format_listing())
+            return
+        if target is None:
+            target = "profile.json" if output_format == "json" else "profile.folded"
+        with open(Path(target), "w") as f:
+            if output_format == "json":
+                profiler.dump_json(f)
+            else:
+                profiler.dump_folded(f)
+
+    def coverage_code(self, target: str | None = None):
+        coverage = CoverageCollector()
+        self.interpreter.execute_lts(coverage=coverage)
+        if target is None:
+            coverage.print_report()
+            return
+        with open(Path(target), "w") as f:
+            coverage.dump_json(f)
+
     def execute_line(self):
         if self.interpreter.is_ended():
             self.interpreter.init_execution()
@@ -49,21 +188,21 @@ class InterpreterManager:
             print("入力された名前の関数存在しません")
             return
         else:
+            self.interpreter.compile_func(func_name)
             lts = self.interpreter.func_lts_map[func_name]
         print("LTS:")
         print(lts)
         print("実行中引数：", lts.name_val_map)
 
-    def save_execution(self, target: str = "execution_info.json"):
+    def save_execution(self, target: str = "execution_info.json", pretty: bool = False):
         target_path = Path(target)
-        target_data = self.interpreter.get_execution_dict()
         with open(target_path, "w") as f:
-            json.dump(target_data, f, indent=4, ensure_ascii=False)
+            dump_execution(self.interpreter, f, pretty=pretty)
 
     def load_execution(self, source: str = "execution_info.json"):
         source_path = Path(source)
         with open(source_path) as f:
-            self.interpreter.set_lts_dict(json.load(f))
+            load_execution(self.interpreter, f)
 
     def interactive_mode(self):
         command = ""
@@ -114,7 +253,18 @@ if __name__ == "__main__":
     parser.add_argument(
         "--command",
         help="コマンドの種別",
-        choices=["execute_file", "execute_line", "interactive"],
+        choices=[
+            "execute_file",
+            "execute_line",
+            "interactive",
+            "check",
+            "build_image",
+            "execute_image",
+            "serve",
+            "test_cases",
+            "differential",
+            "generate",
+        ],
     )
     parser.add_argument(
         "--source_code",
@@ -123,15 +273,184 @@ if __name__ == "__main__":
         required=False,
         default="source.txt",
     )
+    parser.add_argument(
+        "--sources",
+        help="check時に構文エラーを確認するソースコードのパス(複数指定可)",
+        nargs="+",
+        required=False,
+    )
+    parser.add_argument(
+        "--image",
+        help="build_image/execute_image時のプログラムイメージのパス",
+        type=str,
+        required=False,
+        default="program.img",
+    )
+    parser.add_argument(
+        "--cases",
+        help="test_cases時のテストケース(args, expected, nameの一覧)のJSONのパス",
+        type=str,
+        default="cases.json",
+    )
+    parser.add_argument(
+        "--target",
+        help="test_cases時に実行する関数名(未指定の場合はメイン関数)",
+        type=str,
+        required=False,
+    )
+    parser.add_argument(
+        "--workers",
+        help="test_cases時に並列で実行する数",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--memory_limit",
+        help="test_cases時の1ケース・serve時の1セッションのメモリの上限(バイト)",
+        type=int,
+        required=False,
+    )
+    parser.add_argument(
+        "--executor",
+        help="test_cases時の並列実行の方式",
+        choices=["thread", "process"],
+        default="thread",
+    )
+    parser.add_argument(
+        "--engine",
+        help="differential時にリファレンスと比較するエンジン",
+        choices=list(ENGINES),
+        default="image",
+    )
+    parser.add_argument(
+        "--fuzz",
+        help="differential/generate時に乱数で生成するプログラムの数",
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--seed",
+        help="プログラムを生成する乱数のシード",
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--output_dir",
+        help="generate時に生成したプログラムを出力するディレクトリ",
+        type=str,
+        default="generated",
+    )
+    parser.add_argument(
+        "--host",
+        help="serve時に待ち受けるホスト",
+        type=str,
+        default="127.0.0.1",
+    )
+    parser.add_argument(
+        "--port",
+        help="serve時に待ち受けるポート",
+        type=int,
+        default=8000,
+    )
+    parser.add_argument(
+        "--max_concurrency",
+        help="serve時に同時に処理するリクエストの最大数",
+        type=int,
+        default=8,
+    )
+    parser.add_argument(
+        "--stream",
+        help="ソースコードを1行ずつ読み込みながらコンパイルする",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--optimize",
+        help="execute_file/build_image時にコンパイル後のLTSを最適化する",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--vectorize",
+        help="execute_file/execute_image時に本体が代入のみのfor文をまとめて実行する",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--lazy",
+        help="関数の処理を初めて呼び出されたときにコンパイルする",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile",
+        help="execute_file時にプロファイルを取得する場合の出力形式",
+        choices=["text", "json", "folded"],
+        required=False,
+    )
+    parser.add_argument(
+        "--coverage",
+        help="execute_file時に網羅率を取得する",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--coverage_output",
+        help="網羅率をJSONで出力する場合の出力先のパス",
+        type=str,
+        required=False,
+    )
+    parser.add_argument(
+        "--profile_output",
+        help="プロファイルの出力先のパス",
+        type=str,
+        required=False,
+    )
 
     args = parser.parse_args()
-    manager = InterpreterManager()
+    manager = InterpreterManager(lazy_compile=args.lazy)
     if args.command == "execute_file":
-        manager.read_and_compile(args.source_code)
-        manager.execute_code()
+        if args.stream:
+            manager.stream_compile(args.source_code)
+        else:
+            manager.read_and_compile(args.source_code)
+        if args.optimize:
+            manager.optimize_code()
+        if args.vectorize:
+            attach_vectorizer(manager.interpreter)
+        if args.profile is not None:
+            manager.profile_code(args.profile, args.profile_output)
+        elif args.coverage:
+            manager.coverage_code(args.coverage_output)
+        else:
+            manager.execute_code()
     elif args.command == "execute_line":
         manager.load_lts(args.source_lts)
     elif args.command == "interactive":
         manager.interactive_mode()
+    elif args.command == "build_image":
+        manager.read_and_compile(args.source_code)
+        if args.optimize:
+            manager.optimize_code()
+        manager.build_image(args.image)
+    elif args.command == "execute_image":
+        manager.load_image(args.image)
+        if args.vectorize:
+            attach_vectorizer(manager.interpreter)
+        manager.execute_code()
+    elif args.command == "test_cases":
+        manager.read_file(args.source_code)
+        manager.run_cases(
+            args.cases, args.target, args.workers, args.executor, args.memory_limit
+        )
+    elif args.command == "differential":
+        if args.fuzz == 0:
+            manager.read_file(args.source_code)
+        manager.differential_test(args.engine, args.fuzz, args.seed)
+    elif args.command == "generate":
+        files = ProgramGenerator(args.seed).write_programs(
+            args.output_dir, max(args.fuzz, 1)
+        )
+        print(f"{len(files)}件のプログラムを{args.output_dir}に出力しました。")
+    elif args.command == "serve":
+        serve(args.host, args.port, args.max_concurrency, args.memory_limit)
+    elif args.command == "check":
+        results = manager.check_files(args.sources or [args.source_code])
+        print(json.dumps(results, indent=4, ensure_ascii=False))
     else:
         parser.print_help()
@@ -0,0 +1,68 @@
+import asyncio
+from typing import List
+
+from src.coverage import CoverageCollector
+from src.interpreter import Interpreter, PseudoCompiledLTS
+from src.memory import MemoryTracker
+from src.profiler import LineProfiler
+
+
+class AsyncInterpreter:
+    """Interpreterの実行を一定数の遷移ごとにイベントループへ譲りながら進める。
+
+    1つのイベントループ上で多数のプログラムを交互に実行できるようにする。
+    同じセッションへの実行・stepはロックにより1度に1つずつ行う。
+    """
+
+    def __init__(self, interpreter: Interpreter | None = None, slice_size: int = 100):
+        self.interpreter = interpreter if interpreter is not None else Interpreter()
+        # 制御をイベントループへ譲るまでに実行する遷移数
+        self.slice_size = slice_size
+        self.lock = asyncio.Lock()
+
+    def is_ended(self):
+        return self.interpreter.is_ended()
+
+    async def step(self):
+        async with self.lock:
+            result = self.interpreter.execute_line()
+        await asyncio.sleep(0)
+        return result
+
+    async def run(self, budget: int | None = None):
+        # 最大budget回の遷移を実行し、実行した遷移数を返却する
+        async with self.lock:
+            steps = await self.run_slices(budget)
+        await asyncio.sleep(0)
+        return steps
+
+    async def run_slices(self, budget: int | None = None):
+        # ロックを取得した状態で呼び出し、slice_size回の遷移ごとに制御を譲る
+        steps = 0
+        while budget is None or steps < budget:
+            if not self.interpreter.execute_line():
+                break
+            steps += 1
+            if steps % self.slice_size == 0:
+                await asyncio.sleep(0)
+        return steps
+
+    async def execute_lts(
+        self,
+        lts: PseudoCompiledLTS | None = None,
+        vars: List[str] = [],
+        profiler: LineProfiler | None = None,
+        coverage: CoverageCollector | None = None,
+        memory: MemoryTracker | None = None,
+    ):
+        # 開始から結果の取得までロックを保持し、途中で他のstep・実行に割り込ませない
+        async with self.lock:
+            lts = self.interpreter.start_execution(
+                lts, vars, profiler, coverage, memory
+            )
+            try:
+                await self.run_slices()
+                return self.interpreter.finish_execution(lts)
+            finally:
+                # 例外で中断した場合も、指定したプロファイラなどを外す
+                self.interpreter.restore_collectors()
@@ -0,0 +1,171 @@
+import json
+from typing import Dict, List, TextIO, Tuple
+
+from src.interpreter import PseudoCompiledLTS
+from src.lts.analysis import get_analysis
+
+
+class CoverageCollector:
+    """疑似コードの遷移の網羅状況を複数回の実行にわたって集計する。
+
+    遷移ごとにビット位置を割り当て、実行ごとの網羅状況を整数のビット列で保持する。
+    """
+
+    def __init__(self):
+        self.lts_map: Dict[str, PseudoCompiledLTS] = {}
+        # 同一のLTSが別名(メイン関数など)で実行された場合も最初の名前で集計する
+        self.lts_names: Dict[int, str] = {}
+        # 関数名 -> (遷移元の状態, ラベル) -> ビット位置
+        self.transition_index: Dict[str, Dict[Tuple[str, str], int]] = {}
+        # 関数名 -> 実行中のビット列
+        self.current_bits: Dict[str, int] = {}
+        # 実行ごとの関数名 -> ビット列
+        self.run_bits: List[Dict[str, int]] = []
+
+    def register(self, func_name: str, lts: PseudoCompiledLTS):
+        if id(lts) in self.lts_names:
+            return self.lts_names[id(lts)]
+        if func_name in self.lts_map:
+            # 同名の別のLTSに置き換わった場合は集計をやり直す
+            del self.lts_names[id(self.lts_map[func_name])]
+            self.current_bits.pop(func_name, None)
+            for run in self.run_bits:
+                run.pop(func_name, None)
+        self.lts_map[func_name] = lts
+        self.lts_names[id(lts)] = func_name
+        index = {}
+        for state in lts.transitions:
+            for label in lts.transitions[state]:
+                index[(state, label)] = len(index)
+        self.transition_index[func_name] = index
+        return func_name
+
+    def record(
+        self, func_name: str, lts: PseudoCompiledLTS, state: str, label: str
+    ):
+        func_name = self.register(func_name, lts)
+        bit = self.transition_index[func_name].get((state, label))
+        if bit is None:
+            return
+        self.current_bits[func_name] = self.current_bits.get(func_name, 0) | (
+            1 << bit
+        )
+
+    def finish_run(self):
+        self.run_bits.append(self.current_bits)
+        self.current_bits = {}
+
+    def clear(self):
+        self.current_bits = {}
+        self.run_bits.clear()
+
+    def get_covered_bits(self, func_name: str):
+        bits = self.current_bits.get(func_name, 0)
+        for run in self.run_bits:
+            bits |= run.get(func_name, 0)
+        return bits
+
+    def count_runs(self, func_name: str, bit: int):
+        mask = 1 << bit
+        return sum(1 for run in self.run_bits if run.get(func_name, 0) & mask)
+
+    def get_branches(self, func_name: str):
+        lts = self.lts_map[func_name]
+        index = self.transition_index[func_name]
+        covered = self.get_covered_bits(func_name)
+        analysis = get_analysis(lts)
+        branches = []
+        for state in lts.transitions:
+            # 複数の遷移先を持つ状態(if/while/forなど)の各遷移を分岐とみなす
+            if len(lts.transitions[state]) < 2:
+                continue
+            for label in lts.transitions[state]:
+                bit = index[(state, label)]
+                location = lts.get_source_location(state, label)
+                branches.append(
+                    {
+                        "state": state,
+                        "state_type": lts.get_state_type(state),
+                        "label": label,
+                        "line_num": location.line_num + 1
+                        if location is not None
+                        else None,
+                        "covered": bool(covered >> bit & 1),
+                        "runs": self.count_runs(func_name, bit),
+                        # 分岐を含むループの入れ子の深さ(ループ外の場合は0)
+                        "loop_depth": analysis.get_loop_depth(state),
+                    }
+                )
+        return branches
+
+    def get_lines(self, func_name: str):
+        lts = self.lts_map[func_name]
+        index = self.transition_index[func_name]
+        covered = self.get_covered_bits(func_name)
+        # 行番号 -> [網羅された遷移数, 遷移数, 行]
+        line_map: Dict[int, List[int | str]] = {}
+        for (state, label), bit in index.items():
+            location = lts.get_source_location(state, label)
+            if location is None:
+                continue
+            if location.line_num not in line_map:
+                line_map[location.line_num] = [0, 0, label]
+            # ループの戻り("")などより行の内容を表すラベルを優先して表示する
+            elif line_map[location.line_num][2] == "":
+                line_map[location.line_num][2] = label
+            line_map[location.line_num][0] += covered >> bit & 1
+            line_map[location.line_num][1] += 1
+        return [
+            {
+                "line_num": line_num + 1,
+                "line": line,
+                "covered": covered_count > 0,
+                "covered_transitions": covered_count,
+                "transitions": count,
+            }
+            for line_num, (covered_count, count, line) in sorted(line_map.items())
+        ]
+
+    def get_report(self):
+        report = {"runs": len(self.run_bits), "functions": {}}
+        for func_name in self.lts_map:
+            lines = self.get_lines(func_name)
+            branches = self.get_branches(func_name)
+            report["functions"][func_name] = {
+                "line_rate": self.get_rate(lines),
+                "branch_rate": self.get_rate(branches),
+                "lines": lines,
+                "branches": branches,
+            }
+        return report
+
+    def get_rate(self, items: List[Dict]):
+        if len(items) == 0:
+            return 1.0
+        return sum(1 for item in items if item["covered"]) / len(items)
+
+    def format_report(self):
+        report = self.get_report()
+        text = f"実行回数：{report['runs']}\n"
+        for func_name, func_report in report["functions"].items():
+            text += (
+                f"関数：{func_name} 行網羅率：{func_report['line_rate'] * 100:.2f}% "
+                f"分岐網羅率：{func_report['branch_rate'] * 100:.2f}%\n"
+            )
+            for line_report in func_report["lines"]:
+                mark = "+" if line_report["covered"] else "-"
+                text += f"  {mark} {line_report['line_num']:>6}  {line_report['line']}\n"
+            for branch in func_report["branches"]:
+                mark = "+" if branch["covered"] else "-"
+                line_num = branch["line_num"] or "-"
+                text += (
+                    f"  {mark} 分岐 {branch['state']} {line_num:>6}  "
+                    f"{branch['label']} (実行回数：{branch['runs']})\n"
+                )
+        return text
+
+    def print_report(self):
+        print(self.format_report(), end="")
+
+    def dump_json(self, f: TextIO):
+        json.dump(self.get_report(), f, indent=4, ensure_ascii=False)
@@ -0,0 +1,121 @@
+import copy
+import io
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from src.image import ProgramImage, attach_image, write_image
+from src.interpreter import Interpreter
+from src.optimizer import optimize_interpreter
+from src.vectorizer import attach_vectorizer
+
+# 実行が終了したことを表す状態の種別
+RESULT = "result"
+ERROR = "error"
+STEP_LIMIT = "step_limit"
+
+
+class Divergence(NamedTuple):
+    # 比較対象のエンジンで何番目の状態が一致しなかったか
+    step: int
+    # 最後に一致した後のリファレンスの状態の番号
+    reference_step: int
+    expected: Any
+    actual: Any
+
+
+def create_reference(lines: List[str]):
+    interpreter = Interpreter(trace=False)
+    interpreter.interpret_main_process(lines)
+    return interpreter
+
+
+def create_image_engine(lines: List[str]):
+    f = io.BytesIO()
+    write_image(create_reference(lines), f)
+    interpreter = Interpreter(trace=False)
+    attach_image(interpreter, ProgramImage(f.getvalue()))
+    return interpreter
+
+
+def create_fused_engine(lines: List[str]):
+    interpreter = create_reference(lines)
+    interpreter.fuse_blocks = True
+    return interpreter
+
+
+def create_optimized_engine(lines: List[str]):
+    interpreter = create_reference(lines)
+    optimize_interpreter(interpreter)
+    return interpreter
+
+
+def create_vectorized_engine(lines: List[str]):
+    interpreter = create_fused_engine(lines)
+    attach_vectorizer(interpreter)
+    return interpreter
+
+
+# エンジン名 -> ソースコードから実行可能なInterpreterを作成する関数
+ENGINES: Dict[str, Callable[[List[str]], Interpreter]] = {
+    "reference": create_reference,
+    "image": create_image_engine,
+    "fused": create_fused_engine,
+    "optimized": create_optimized_engine,
+    "vectorized": create_vectorized_engine,
+}
+
+
+def register_engine(name: str, factory: Callable[[List[str]], Interpreter]):
+    ENGINES[name] = factory
+
+
+def get_variables(interpreter: Interpreter):
+    return {
+        func_name: copy.deepcopy(lts.name_val_map)
+        for func_name, lts in interpreter.func_lts_map.items()
+    }
+
+
+def iterate_states(interpreter: Interpreter, max_steps: int):
+    # 変数の値が変化した時点の状態と、最後に実行結果を順に返却する
+    try:
+        lts = interpreter.start_execution()
+        previous = get_variables(interpreter)
+        yield ("variables", previous)
+        steps = 0
+        while interpreter.execute_line():
+            steps += 1
+            if steps >= max_steps:
+                yield (STEP_LIMIT, None)
+                return
+            variables = get_variables(interpreter)
+            if variables != previous:
+                previous = variables
+                yield ("variables", variables)
+        yield (RESULT, interpreter.finish_execution(lts))
+    except Exception as e:
+        yield (ERROR, type(e).__name__)
+
+
+def run_differential(lines: List[str], engine: str = "image", max_steps: int = 100000):
+    # リファレンスのLTSインタプリタと指定したエンジンで同じプログラムを並行して実行する
+    # 複数の遷移をまとめて実行するエンジンでは途中の状態が現れないため、比較対象の状態が
+    # リファレンスの状態の列に同じ順序で現れれば一致とみなす
+    # 最初に一致しなかった状態を返却し、最後まで一致した場合はNoneを返却する
+    reference = iterate_states(create_reference(lines), max_steps)
+    candidate = iterate_states(ENGINES[engine](lines), max_steps)
+    reference_step = 0
+    for step, actual in enumerate(candidate):
+        expected = None
+        while True:
+            state = next(reference, None)
+            if state is None:
+                return Divergence(step, reference_step, expected, actual)
+            reference_step += 1
+            if expected is None:
+                expected = state
+            if state == actual:
+                break
+            # リファレンスの実行の終了は読み飛ばせないため、その時点で不一致とする
+            if state[0] != "variables":
+                return Divergence(step, reference_step, expected, actual)
+    return None
@@ -152,3 +152,19 @@ class LtsException(Exception):
 class DoesNotExistException(LtsException):
     def __str__(self):
         return f"{self.arg}はLTSに存在しません。"
+
+
+class InvalidImageException(LtsException):
+    def __str__(self):
+        return f"プログラムイメージの形式が不正です：{self.arg}"
+
+
+class SessionDoesNotExistException(LtsException):
+    def __str__(self):
+        return f"セッション[{self.arg}]は存在しません。"
+
+
+class MemoryLimitExceededException(PatternException):
+    def __init__(self, arg="", line_num=None):
+        super().__init__(arg, line_num)
+        self.message = f"変数が使用するメモリが上限({self.arg}バイト)を超えました。"
@@ -0,0 +1,237 @@
+import random
+from pathlib import Path
+from typing import List
+
+INDENT = "    "
+
+
+class Scope:
+    """生成中の関数(またはメイン処理)で利用できる変数と繰り返し用の変数。"""
+
+    def __init__(self, var_names: List[str], array_names: List[str]):
+        self.var_names = var_names
+        self.array_names = array_names
+        # 繰り返しごとに割り当てるfor文の変数とwhile文の回数の変数
+        self.loop_names: List[str] = []
+
+
+class ProgramGenerator:
+    """READMEのBNFに沿って、必ず終了する疑似コードのプログラムを乱数で生成する。
+
+    宣言・代入・配列・関数呼び出し・入れ子のif/while/do-while/for文を生成する。
+    繰り返しは専用の変数で回数を制限し、除数は正の定数とするため、生成された
+    プログラムは実行時エラーを起こさずに終了する。
+    """
+
+    COMPARE_OPERATORS = ["<", "≦", "=", "≠", "≧", ">", "＜", "＝", "＞"]
+    COMPARE_OPERATORS_JP = [
+        "と等しい",
+        "と等しくない",
+        "以上",
+        "以下",
+        "より大きい",
+        "より小さい",
+        "未満",
+    ]
+    ARITHMETIC_OPERATORS = ["+", "-", "＋", "－"]
+
+    def __init__(
+        self,
+        seed: int | None = None,
+        var_count: int = 4,
+        array_count: int = 1,
+        func_count: int = 1,
+        statement_count: int = 8,
+        max_depth: int = 2,
+        max_trip_count: int = 4,
+    ):
+        self.random = random.Random(seed)
+        # 関数・メイン処理ごとに宣言する整数型の変数の数
+        self.var_count = var_count
+        # メイン処理で宣言する整数型の配列の数
+        self.array_count = array_count
+        # 定義する関数の数
+        self.func_count = func_count
+        # 1つのブロックに生成する処理の最大数
+        self.statement_count = statement_count
+        # if文・繰り返しの入れ子の最大の深さ
+        self.max_depth = max_depth
+        # 繰り返しの最大の回数
+        self.max_trip_count = max_trip_count
+        # 呼び出し可能な関数名と引数の数
+        self.funcs: List[tuple[str, int]] = []
+
+    def generate(self):
+        self.funcs = []
+        lines = []
+        for idx in range(self.func_count):
+            lines += self.generate_func(f"f{idx}")
+        scope = Scope(
+            [f"v{idx}" for idx in range(self.var_count)],
+            [f"a{idx}" for idx in range(self.array_count)],
+        )
+        body = self.generate_block(scope, 0)
+        lines += self.generate_declare(scope)
+        for name in scope.array_names:
+            values = ", ".join(
+                str(self.random.randint(-5, 5)) for _ in range(self.max_trip_count)
+            )
+            lines.append(f"整数型の配列: {name}←{{{values}}}")
+        return lines + body + [f"return {self.get_operand(scope)}"]
+
+    def generate_func(self, name: str):
+        arg_count = self.random.randint(1, 3)
+        args = [f"p{idx}" for idx in range(arg_count)]
+        scope = Scope(args + [f"t{idx}" for idx in range(self.var_count)], [])
+        body = self.generate_block(scope, 0)
+        result = self.generate_expression(scope)
+        # 関数の中からは先に定義された関数のみを呼び出し、再帰させない
+        self.funcs.append((name, arg_count))
+        arg_declare = ", ".join(f"整数型: {arg}" for arg in args)
+        lines = [f"◯整数型: {name}({arg_declare})"]
+        lines += self.indent(self.generate_declare(scope, skip=arg_count))
+        lines += self.indent(body)
+        lines.append(f"{INDENT}return {result}")
+        return lines
+
+    def generate_declare(self, scope: Scope, skip: int = 0):
+        declare = ", ".join(
+            [f"{name}←{self.random.randint(-5, 5)}" for name in scope.var_names[skip:]]
+            + scope.loop_names
+        )
+        return [f"整数型: {declare}"]
+
+    def get_var(self, scope: Scope):
+        return self.random.choice(scope.var_names)
+
+    def get_operand(self, scope: Scope):
+        choice = self.random.random()
+        if choice < 0.1 and len(scope.array_names) > 0:
+            # 要素数は減らないため、初期の要素数以内の添字は常に範囲内となる
+            index = self.random.randint(1, self.max_trip_count)
+            return f"{self.random.choice(scope.array_names)}[{index}]"
+        if choice < 0.15 and len(scope.array_names) > 0:
+            return f"{self.random.choice(scope.array_names)}の要素数"
+        if choice < 0.6:
+            return self.get_var(scope)
+        return str(self.random.randint(0, 9))
+
+    def generate_expression(self, scope: Scope):
+        choice = self.random.random()
+        if choice < 0.15:
+            # 0除算にならないよう、除数は正の定数とする
+            divisor = self.random.randint(1, 5)
+            suffix = self.random.choice(["の商", "の余り"])
+            return f"{self.get_operand(scope)} ÷ {divisor}{suffix}"
+        if choice < 0.25:
+            return f"{self.get_operand(scope)} mod {self.random.randint(1, 5)}"
+        if choice < 0.35:
+            # 値が大きくなりすぎないよう、乗数は小さい定数とする
+            return f"{self.get_operand(scope)} × {self.random.randint(0, 3)}"
+        if choice < 0.45 and len(self.funcs) > 0:
+            name, arg_count = self.random.choice(self.funcs)
+            args = ", ".join(self.get_operand(scope) for _ in range(arg_count))
+            return f"{name}({args})"
+        operator = self.random.choice(self.ARITHMETIC_OPERATORS)
+        return f"{self.get_operand(scope)} {operator} {self.get_operand(scope)}"
+
+    def generate_condition(self, scope: Scope):
+        choice = self.random.random()
+        if choice < 0.3:
+            operator = self.random.choice(self.COMPARE_OPERATORS_JP)
+            return f"({self.get_operand(scope)} が {self.get_operand(scope)}{operator})"
+        if choice < 0.4:
+            return f"({self.get_operand(scope)} が {self.random.randint(1, 5)}で割り切れる)"
+        if choice < 0.5:
+            logical = self.random.choice(["かつ", "または"])
+            return (
+                f"({self.generate_condition(scope)} {logical} "
+                f"{self.generate_condition(scope)})"
+            )
+        operator = self.random.choice(self.COMPARE_OPERATORS)
+        return f"({self.get_operand(scope)} {operator} {self.get_operand(scope)})"
+
+    def generate_block(self, scope: Scope, depth: int):
+        lines = []
+        for _ in range(self.random.randint(1, self.statement_count)):
+            lines += self.generate_statement(scope, depth)
+        return lines
+
+    def generate_statement(self, scope: Scope, depth: int):
+        choice = self.random.random() if depth < self.max_depth else 0.0
+        if choice < 0.5:
+            return [self.generate_assign(scope)]
+        if choice < 0.65:
+            return self.generate_if(scope, depth)
+        if choice < 0.8:
+            return self.generate_for(scope, depth)
+        if choice < 0.9:
+            return self.generate_while(scope, depth)
+        return self.generate_do_while(scope, depth)
+
+    def generate_assign(self, scope: Scope):
+        if len(scope.array_names) > 0 and self.random.random() < 0.2:
+            name = self.random.choice(scope.array_names)
+            if self.random.random() < 0.5:
+                return f"{name}の末尾 に {self.get_operand(scope)}を追加する"
+            index = self.random.randint(1, self.max_trip_count)
+            return f"{name}[{index}]←{self.generate_expression(scope)}"
+        return f"{self.get_var(scope)}←{self.generate_expression(scope)}"
+
+    def create_loop_name(self, scope: Scope, prefix: str):
+        name = f"{prefix}{len(scope.loop_names)}"
+        scope.loop_names.append(name)
+        return name
+
+    def generate_if(self, scope: Scope, depth: int):
+        lines = [f"if {self.generate_condition(scope)}"]
+        lines += self.indent(self.generate_block(scope, depth + 1))
+        while self.random.random() < 0.3:
+            lines.append(f"elseif {self.generate_condition(scope)}")
+            lines += self.indent(self.generate_block(scope, depth + 1))
+        if self.random.random() < 0.5:
+            lines.append("else")
+            lines += self.indent(self.generate_block(scope, depth + 1))
+        lines.append("endif")
+        return lines
+
+    def generate_for(self, scope: Scope, depth: int):
+        name = self.create_loop_name(scope, "i")
+        trip_count = self.random.randint(0, self.max_trip_count)
+        step = self.random.randint(1, 2)
+        lines = [f"for ({name}を1から{trip_count}まで{step}ずつ増やす)"]
+        lines += self.indent(self.generate_block(scope, depth + 1))
+        lines.append("endfor")
+        return lines
+
+    def generate_while(self, scope: Scope, depth: int):
+        name = self.create_loop_name(scope, "w")
+        trip_count = self.random.randint(0, self.max_trip_count)
+        lines = [f"{name}←0", f"while ({name} < {trip_count})"]
+        lines += self.indent(self.generate_block(scope, depth + 1))
+        lines.append(f"{INDENT}{name}←{name}+1")
+        lines.append("endwhile")
+        return lines
+
+    def generate_do_while(self, scope: Scope, depth: int):
+        name = self.create_loop_name(scope, "w")
+        trip_count = self.random.randint(1, self.max_trip_count)
+        lines = [f"{name}←0", "do"]
+        lines += self.indent(self.generate_block(scope, depth + 1))
+        lines.append(f"{INDENT}{name}←{name}+1")
+        lines.append(f"while ({name} < {trip_count})")
+        return lines
+
+    def indent(self, lines: List[str]):
+        return [INDENT + line for line in lines]
+
+    def write_programs(self, directory: str, count: int, prefix: str = "program"):
+        # ベンチマークや差分テストで利用するソースコードのファイルを出力する
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        files = []
+        for idx in range(count):
+            file = path / f"{prefix}{idx}.txt"
+            file.write_text("\n".join(self.generate()) + "\n", encoding="utf-8")
+            files.append(str(file))
+        return files
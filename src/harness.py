@@ -0,0 +1,208 @@
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple
+
+from src.image import ProgramImage, attach_image, write_image
+from src.interpreter import Interpreter
+from src.memory import MemoryTracker
+
+
+class TestCase(NamedTuple):
+    # pytestがテストクラスとして収集しないようにする
+    __test__ = False
+
+    args: List[Any]
+    expected: Any
+    name: str | None = None
+
+
+class CaseResult(NamedTuple):
+    name: str | None
+    args: List[Any]
+    expected: Any
+    actual: Any
+    passed: bool
+    steps: int
+    time: float
+    error: str | None = None
+    # 変数が使用したメモリの最大値(バイト)
+    peak_memory: int = 0
+
+
+def run_case(
+    image: ProgramImage,
+    case: TestCase,
+    func_name: str | None = None,
+    max_steps: int | None = None,
+    memory_limit: int | None = None,
+):
+    # イメージを参照する新しい変数領域で1つのテストケースを実行する
+    interpreter = Interpreter(trace=False)
+    attach_image(interpreter, image)
+    lts = interpreter.func_lts_map[func_name] if func_name is not None else None
+    memory = MemoryTracker(memory_limit)
+    steps = 0
+    actual = None
+    error = None
+    start_time = time.perf_counter()
+    try:
+        lts = interpreter.start_execution(lts, list(case.args), memory=memory)
+        while not interpreter.is_ended():
+            # 上限まで実行しても終了しない場合のみ打ち切る
+            if max_steps is not None and steps >= max_steps:
+                raise TimeoutError(f"実行した遷移数が上限({max_steps})に達しました。")
+            interpreter.execute_line()
+            steps += 1
+        actual = interpreter.finish_execution(lts)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - start_time
+    return CaseResult(
+        case.name,
+        list(case.args),
+        case.expected,
+        actual,
+        error is None and actual == case.expected,
+        steps,
+        elapsed,
+        error,
+        memory.peak,
+    )
+
+
+# プロセスで実行する場合に各ワーカーが開いたイメージ
+worker_image: ProgramImage | None = None
+
+
+def init_worker(image_path: str):
+    global worker_image
+    worker_image = ProgramImage.open(image_path)
+
+
+def run_worker_case(
+    case: TestCase,
+    func_name: str | None,
+    max_steps: int | None,
+    memory_limit: int | None,
+):
+    return run_case(worker_image, case, func_name, max_steps, memory_limit)
+
+
+class Harness:
+    """1度コンパイルしたプログラムを複数のテストケースで実行し、結果を集計する。
+
+    テストケースごとに新しい変数領域で実行するため、ケース間で変数の値は共有されない。
+    プロセスで並列実行する場合は、プログラムイメージをファイルに書き出して各プロセスで
+    mmapにより共有する。
+    """
+
+    def __init__(
+        self,
+        lines: List[str],
+        file: str | None = None,
+        func_name: str | None = None,
+        max_steps: int | None = 1000000,
+        memory_limit: int | None = None,
+    ):
+        interpreter = Interpreter(trace=False)
+        interpreter.interpret_main_process(lines, file=file)
+        f = io.BytesIO()
+        write_image(interpreter, f)
+        self.image_bytes = f.getvalue()
+        self.image = ProgramImage(self.image_bytes)
+        # 実行対象の関数。Noneの場合はメイン関数を実行する
+        self.func_name = func_name
+        # 1ケースで実行する遷移数の上限
+        self.max_steps = max_steps
+        # 1ケースで変数が使用するメモリの上限(バイト)。Noneの場合は上限を設けない
+        self.memory_limit = memory_limit
+
+    def run(
+        self,
+        cases: List[TestCase],
+        workers: int = 1,
+        executor: str = "thread",
+    ):
+        cases = [TestCase(*case) for case in cases]
+        if workers <= 1:
+            return [
+                run_case(
+                    self.image, case, self.func_name, self.max_steps, self.memory_limit
+                )
+                for case in cases
+            ]
+        if executor == "thread":
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(
+                    pool.map(
+                        lambda case: run_case(
+                            self.image,
+                            case,
+                            self.func_name,
+                            self.max_steps,
+                            self.memory_limit,
+                        ),
+                        cases,
+                    )
+                )
+        fd, image_path = tempfile.mkstemp(suffix=".img")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.image_bytes)
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=init_worker, initargs=(image_path,)
+            ) as pool:
+                return list(
+                    pool.map(
+                        run_worker_case,
+                        cases,
+                        [self.func_name] * len(cases),
+                        [self.max_steps] * len(cases),
+                        [self.memory_limit] * len(cases),
+                    )
+                )
+        finally:
+            os.remove(image_path)
+
+    @staticmethod
+    def get_summary(results: List[CaseResult]):
+        passed = sum(1 for result in results if result.passed)
+        return {
+            "total": len(results),
+            "passed": passed,
+            "failed": len(results) - passed,
+            "steps": sum(result.steps for result in results),
+            "time": sum(result.time for result in results),
+            "peak_memory": max((result.peak_memory for result in results), default=0),
+        }
+
+    @staticmethod
+    def format_report(results: List[CaseResult]):
+        report = ""
+        for idx, result in enumerate(results):
+            name = result.name if result.name is not None else f"ケース{idx + 1}"
+            mark = "OK" if result.passed else "NG"
+            report += (
+                f"{mark} {name} 引数：{result.args} 期待値：{result.expected} "
+                f"結果：{result.actual} 遷移数：{result.steps} "
+                f"時間：{result.time:.6f}秒 メモリ：{result.peak_memory}バイト\n"
+            )
+            if result.error is not None:
+                report += f"    {result.error}\n"
+        summary = Harness.get_summary(results)
+        report += (
+            f"合計：{summary['total']} 成功：{summary['passed']} "
+            f"失敗：{summary['failed']}\n"
+        )
+        return report
+
+
+def load_cases(cases: List[Dict[str, Any]]):
+    # JSONから読み込んだ{"args", "expected", "name"}の一覧をテストケースに変換する
+    return [
+        TestCase(case.get("args", []), case.get("expected"), case.get("name"))
+        for case in cases
+    ]
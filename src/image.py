@@ -0,0 +1,365 @@
+import io
+import json
+import mmap
+from array import array
+from types import MappingProxyType
+from typing import BinaryIO, Dict, List, Tuple
+
+from src import exception
+from src.interpreter import (
+    BlockEntry,
+    Interpreter,
+    PseudoCompiledLTS,
+    SourceLocation,
+    StateType,
+    create_block_map,
+)
+
+MAGIC = int.from_bytes(b"FEPI", "little")
+VERSION = 1
+# 存在しない文字列・位置情報を表す値
+NONE = 0xFFFFFFFF
+# ヘッダ：識別子, バージョン, 文字列数, 文字列領域のバイト数, 関数数, 状態数, 遷移数
+HEADER_FIELDS = 7
+# 関数：関数名, 実行用の初期値(JSON), 初期状態, 状態の開始位置, 状態の終了位置
+FUNC_FIELDS = 5
+# 状態：状態名, 状態の種別, 遷移の開始位置, 遷移の終了位置
+STATE_FIELDS = 4
+# 遷移：ラベル, 遷移先の状態, ファイル名, 行番号, 列番号
+EDGE_FIELDS = 5
+
+
+def write_image(interpreter: Interpreter, f: BinaryIO):
+    interpreter.compile_all_funcs()
+    func_lts_map: Dict[str, PseudoCompiledLTS] = {"メイン関数": interpreter.lts}
+    for name, lts in interpreter.func_lts_map.items():
+        func_lts_map.setdefault(name, lts)
+    string_ids: Dict[str, int] = {}
+    strings: List[bytes] = []
+
+    def intern(string: str | None):
+        if string is None:
+            return NONE
+        if string not in string_ids:
+            string_ids[string] = len(strings)
+            strings.append(string.encode("utf-8"))
+        return string_ids[string]
+
+    funcs = array("I")
+    states = array("I")
+    edges = array("I")
+    for name, lts in func_lts_map.items():
+        # 状態は関数ごとの0始まりの番号で参照する
+        state_index = {state: idx for idx, state in enumerate(lts.transitions)}
+        meta = {
+            "arg_list": lts.arg_list,
+            "name_type_map": lts.name_type_map,
+            "name_val_map": lts.name_val_map,
+        }
+        funcs.extend(
+            [
+                intern(name),
+                intern(json.dumps(meta, ensure_ascii=False)),
+                state_index[lts.init_state],
+                len(states) // STATE_FIELDS,
+                len(states) // STATE_FIELDS + len(state_index),
+            ]
+        )
+        for state, targets in lts.transitions.items():
+            states.extend(
+                [
+                    intern(state),
+                    lts.get_state_type(state),
+                    len(edges) // EDGE_FIELDS,
+                    len(edges) // EDGE_FIELDS + len(targets),
+                ]
+            )
+            # if文などの条件の評価順を保つため、遷移は登録順に並べる
+            for label, target in targets.items():
+                location = lts.get_source_location(state, label)
+                edges.extend(
+                    [intern(label), state_index[target]]
+                    + (
+                        [intern(location.file), location.line_num, location.column]
+                        if location is not None
+                        else [NONE, NONE, NONE]
+                    )
+                )
+    offsets = array("I", [0])
+    for string in strings:
+        offsets.append(offsets[-1] + len(string))
+    header = array(
+        "I",
+        [
+            MAGIC,
+            VERSION,
+            len(strings),
+            offsets[-1],
+            len(funcs) // FUNC_FIELDS,
+            len(states) // STATE_FIELDS,
+            len(edges) // EDGE_FIELDS,
+        ],
+    )
+    for section in [header, offsets, funcs, states, edges]:
+        f.write(section.tobytes())
+    f.write(b"".join(strings))
+
+
+class ProgramImage:
+    """コンパイル済みのプログラムを平坦な配列として保持する読み取り専用のイメージ。
+
+    ファイルをmmapで読み込むため、同じイメージを開いた複数のプロセスは
+    プログラム本体を共有し、各プロセスは変数領域のみを個別に保持する。
+    """
+
+    def __init__(self, buffer, path: str | None = None):
+        self.buffer = buffer
+        self.path = path
+        self.view = memoryview(buffer)
+        header_size = HEADER_FIELDS * 4
+        if len(self.view) < header_size:
+            raise exception.InvalidImageException("ヘッダが不足しています。")
+        header = self.view[:header_size].cast("I")
+        if header[0] != MAGIC or header[1] != VERSION:
+            header.release()
+            raise exception.InvalidImageException(
+                "識別子またはバージョンが一致しません。"
+            )
+        string_count, blob_size, func_count, state_count, edge_count = header[2:]
+        header.release()
+        word_count = (
+            HEADER_FIELDS
+            + string_count
+            + 1
+            + func_count * FUNC_FIELDS
+            + state_count * STATE_FIELDS
+            + edge_count * EDGE_FIELDS
+        )
+        if len(self.view) != word_count * 4 + blob_size:
+            raise exception.InvalidImageException("サイズが一致しません。")
+        self.words = self.view[: word_count * 4].cast("I")
+        self.blob = self.view[word_count * 4 :]
+        self.offsets_start = HEADER_FIELDS
+        self.funcs_start = self.offsets_start + string_count + 1
+        self.states_start = self.funcs_start + func_count * FUNC_FIELDS
+        self.edges_start = self.states_start + state_count * STATE_FIELDS
+        # 復号した文字列はプロセスごとに参照されたものだけ保持する
+        self.string_cache: Dict[int, str] = {}
+        # 関数の状態の開始位置 -> まとめて実行できる区間。同じイメージの関数間で共有する
+        self.block_maps: Dict[int, Dict[int, List[BlockEntry]]] = {}
+        # 関数の状態の開始位置 -> 読み取り専用の(遷移, 逆方向の遷移)
+        self.transition_tables: Dict[int, Tuple[MappingProxyType, MappingProxyType]] = (
+            {}
+        )
+        self.func_index: Dict[str, int] = {
+            self.get_string(self.words[self.funcs_start + idx * FUNC_FIELDS]): idx
+            for idx in range(func_count)
+        }
+
+    @classmethod
+    def open(cls, path: str):
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, path=path)
+
+    @classmethod
+    def build(cls, interpreter: Interpreter):
+        # ファイルを介さずにメモリ上でイメージを作成する
+        f = io.BytesIO()
+        write_image(interpreter, f)
+        return cls(f.getvalue())
+
+    def __reduce__(self):
+        # プロセス間で受け渡す場合は、受け取った側で同じファイルを開き直す
+        if self.path is None:
+            raise TypeError("ファイルから開いたイメージのみ受け渡しできます。")
+        return (ProgramImage.open, (self.path,))
+
+    def close(self):
+        self.words.release()
+        self.blob.release()
+        self.view.release()
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def get_string(self, string_id: int):
+        if string_id == NONE:
+            return None
+        if string_id not in self.string_cache:
+            start = self.words[self.offsets_start + string_id]
+            end = self.words[self.offsets_start + string_id + 1]
+            self.string_cache[string_id] = str(self.blob[start:end], "utf-8")
+        return self.string_cache[string_id]
+
+    def get_func_names(self):
+        return list(self.func_index)
+
+    def get_func(self, func_name: str):
+        if func_name not in self.func_index:
+            raise exception.DoesNotExistException(func_name)
+        start = self.funcs_start + self.func_index[func_name] * FUNC_FIELDS
+        return self.words[start : start + FUNC_FIELDS]
+
+    def get_state(self, state_id: int):
+        start = self.states_start + state_id * STATE_FIELDS
+        return self.words[start : start + STATE_FIELDS]
+
+    def get_edge(self, edge_id: int):
+        start = self.edges_start + edge_id * EDGE_FIELDS
+        return self.words[start : start + EDGE_FIELDS]
+
+    def create_lts(self, func_name: str):
+        return ImageLTS(self, func_name)
+
+    def create_func_lts_map(self):
+        return {func_name: self.create_lts(func_name) for func_name in self.func_index}
+
+
+class ImageLTS:
+    """ProgramImage上の1つの関数を実行するためのLTS。
+
+    遷移はイメージを参照し、変数や戻り値などの実行時に変化する値のみを個別に保持する。
+    状態は関数ごとの0始まりの番号で表す。網羅率の集計や解析のため、LTSと同じ形式の
+    transitions・backwardsを読み取り専用で参照できる。
+    """
+
+    def __init__(self, image: ProgramImage, func_name: str):
+        self.image = image
+        _, self.meta_id, init_state, self.state_start, self.state_end = image.get_func(
+            func_name
+        )
+        self.init_state = init_state
+        # src.lts.analysisによる解析結果。遷移は変更されないため破棄しない
+        self.analysis = None
+        self.reset()
+
+    def reset(self):
+        meta = json.loads(self.image.get_string(self.meta_id))
+        self.arg_list: List[str] = meta["arg_list"]
+        self.name_type_map: Dict[str, str] = meta["name_type_map"]
+        self.name_val_map: Dict[str, str | int | float | bool] = meta["name_val_map"]
+        self.func_results: Dict[str, str | int | float | bool] = {}
+
+    def get_init_state(self):
+        return self.init_state
+
+    def get_state(self, state: int):
+        if not isinstance(state, int) or not 0 <= state < (
+            self.state_end - self.state_start
+        ):
+            raise exception.DoesNotExistException(state)
+        return self.image.get_state(self.state_start + state)
+
+    def get_state_name(self, state: int):
+        return self.image.get_string(self.get_state(state)[0])
+
+    def get_state_type(self, state: int):
+        return self.get_state(state)[1]
+
+    def get_transition_label(self, state: int, index=0):
+        _, _, edge_start, edge_end = self.get_state(state)
+        # 存在しないインデックスへのアクセスはNoneを返却する
+        if not index < edge_end - edge_start:
+            return None
+        return self.image.get_string(self.image.get_edge(edge_start + index)[0])
+
+    def find_edge(self, state: int, label: str):
+        _, _, edge_start, edge_end = self.get_state(state)
+        for edge_id in range(edge_start, edge_end):
+            edge = self.image.get_edge(edge_id)
+            if self.image.get_string(edge[0]) == label:
+                return edge
+        return None
+
+    def get_transition_state(self, source: int, label: str):
+        edge = self.find_edge(source, label)
+        if edge is None:
+            raise exception.DoesNotExistException(f"{source}から{label}による遷移")
+        return edge[1]
+
+    def get_source_location(self, state: int, label: str):
+        edge = self.find_edge(state, label)
+        if edge is None or edge[3] == NONE:
+            return None
+        return SourceLocation(self.image.get_string(edge[2]), edge[3], edge[4])
+
+    @property
+    def transitions(self):
+        return self.get_transition_tables()[0]
+
+    @property
+    def backwards(self):
+        return self.get_transition_tables()[1]
+
+    def get_transition_tables(self):
+        # イメージの遷移から状態番号 -> ラベル -> 遷移先の表を作成し、関数間で共有する
+        tables = self.image.transition_tables.get(self.state_start)
+        if tables is None:
+            states = range(self.state_end - self.state_start)
+            transitions = {}
+            backwards = {state: set() for state in states}
+            for source in states:
+                _, _, edge_start, edge_end = self.get_state(source)
+                targets = {}
+                for edge_id in range(edge_start, edge_end):
+                    label_id, target = self.image.get_edge(edge_id)[:2]
+                    label = self.image.get_string(label_id)
+                    targets[label] = target
+                    backwards[target].add((label, source))
+                transitions[source] = MappingProxyType(targets)
+            tables = (
+                MappingProxyType(transitions),
+                MappingProxyType(
+                    {state: frozenset(sources) for state, sources in backwards.items()}
+                ),
+            )
+            self.image.transition_tables[self.state_start] = tables
+        return tables
+
+    def get_lts_as_dict(self):
+        # コンパイルしたLTSと同じ形式で、状態番号を状態名に変換して返却する
+        names = [self.get_state_name(state) for state in self.transitions]
+        states = {}
+        state_type_map = {}
+        source_map = {}
+        for source, targets in self.transitions.items():
+            states[names[source]] = {
+                label: names[target] for label, target in targets.items()
+            }
+            if self.get_state_type(source) != StateType.UNDEFINED:
+                state_type_map[names[source]] = self.get_state_type(source)
+            for label in targets:
+                location = self.get_source_location(source, label)
+                if location is not None:
+                    source_map.setdefault(names[source], {})[label] = location
+        return {
+            "init_state": names[self.init_state],
+            "states": states,
+            "state_type_map": state_type_map,
+            "arg_list": self.arg_list,
+            "name_val_map": self.name_val_map,
+            "name_type_map": self.name_type_map,
+            "func_results": self.func_results,
+            "source_map": source_map,
+        }
+
+    def get_block(self, state: int):
+        block_map = self.image.block_maps.get(self.state_start)
+        if block_map is None:
+            states = range(self.state_end - self.state_start)
+            in_degrees: Dict[int, int] = {}
+            for source in states:
+                _, _, edge_start, edge_end = self.get_state(source)
+                for edge_id in range(edge_start, edge_end):
+                    target = self.image.get_edge(edge_id)[1]
+                    in_degrees[target] = in_degrees.get(target, 0) + 1
+            block_map = create_block_map(self, states, in_degrees)
+            self.image.block_maps[self.state_start] = block_map
+        return block_map.get(state)
+
+
+def attach_image(interpreter: Interpreter, image: ProgramImage):
+    # コンパイルせずにイメージ上の関数を実行できるようにする
+    interpreter.pending_funcs.clear()
+    interpreter.func_lts_map = image.create_func_lts_map()
+    interpreter.lts = interpreter.func_lts_map["メイン関数"]
@@ -1,9 +1,17 @@
 import re
+import time
 from re import Pattern
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Tuple
 
 from src import exception
 from src.lts.lts import LabeledTransitionSystem
+from src.memory import MemoryTracker
+from src.profiler import LineProfiler
+from src.source import LineStream, SourceLines, as_source_lines, measure_indent
+
+if TYPE_CHECKING:
+    # src.coverageはこのモジュールを読み込むため、型の注釈でのみ参照する
+    from src.coverage import CoverageCollector
 
 
 class StateType:
@@ -17,6 +25,117 @@ class StateType:
     FOR = 30
 
 
+class SourceLocation(NamedTuple):
+    file: str | None
+    # 例外のline_numと同様に0始まりで保持する
+    line_num: int
+    column: int
+
+
+class SyntaxErrorRecord(NamedTuple):
+    file: str | None
+    # 例外のline_numと同様に0始まりで保持する
+    line_num: int | None
+    column: int
+    error_type: str
+    message: str
+
+
+class Statement(NamedTuple):
+    state_type: int
+    # 遷移ラベルとして利用される行の内容
+    text: str
+    # 実行時に解析する部分。宣言文は型と区切り文字を除いた変数の並び、return文は
+    # 戻り値の式(戻り値がない場合は"")、代入文・式文は行の内容
+    body: str
+    # 宣言文の型
+    var_type: str | None = None
+    # 代入文・配列への追加の対象となる変数名
+    target: str | None = None
+
+
+class ForSentence(NamedTuple):
+    # 繰り返しの変数名
+    name: str
+    # 開始値・終了値・増分の式。増分を省略した場合はNone
+    from_text: str
+    to_text: str
+    increment_text: str | None
+
+
+class ArrayIndex(NamedTuple):
+    # INDEX_CONST・INDEX_NAME・INDEX_FORMULAのいずれか
+    kind: int
+    # 定数、変数名、式の文字列(配列に追加する値にも用いる)
+    value: int | str
+
+
+INDEX_CONST = 0
+INDEX_NAME = 1
+INDEX_FORMULA = 2
+
+
+class ArrayAccess(NamedTuple):
+    name: str
+    indexes: Tuple[ArrayIndex, ...]
+    # 配列の参照に続く残りの式
+    remain: str
+
+
+class ArrayAppend(NamedTuple):
+    name: str
+    # 追加先の行までの添字
+    indexes: Tuple[ArrayIndex, ...]
+    # 追加する値
+    value: ArrayIndex
+
+
+class BlockEntry(NamedTuple):
+    state: str | int
+    label: str
+    state_type: int
+    # 遷移先の状態
+    next_state: str | int
+
+
+# 1度の呼び出しでまとめて実行できる状態の種別
+FUSIBLE_STATE_TYPES = (StateType.ASSIGN, StateType.FORMULA, StateType.DECLARE)
+
+
+def create_block_map(lts, states, in_degrees: Dict):
+    # 代入・計算・宣言の状態が分岐も合流もなく2つ以上連続する区間を求め、
+    # 先頭の状態 -> 区間内の各遷移の一覧として返却する
+    entries: Dict = {}
+    for state in states:
+        state_type = lts.get_state_type(state)
+        label = lts.get_transition_label(state)
+        if (
+            state_type not in FUSIBLE_STATE_TYPES
+            or label is None
+            or lts.get_transition_label(state, index=1) is not None
+        ):
+            continue
+        entries[state] = BlockEntry(
+            state, label, state_type, lts.get_transition_state(state, label)
+        )
+    # 直前の状態からのみ遷移してくる状態は区間の途中とする
+    inner_states = {
+        entry.next_state
+        for entry in entries.values()
+        if entry.next_state in entries and in_degrees.get(entry.next_state) == 1
+    }
+    block_map = {}
+    for state in entries:
+        if state in inner_states:
+            continue
+        block = [entries[state]]
+        while block[-1].next_state in inner_states:
+            block.append(entries[block[-1].next_state])
+        if len(block) > 1:
+            block_map[state] = block
+    return block_map
+
+
 class PseudoCompiledLTS(LabeledTransitionSystem):
     def __init__(
         self,
@@ -42,13 +161,54 @@ class PseudoCompiledLTS(LabeledTransitionSystem):
         self.name_val_map: Dict[str, str | int | float | bool] = {}
         self.name_type_map: Dict[str, str] = {}
         self.func_results: Dict[str, str | int | float | bool] = {}
+        # 遷移元の状態 -> 遷移ラベル -> ソースコード上の位置
+        self.source_map: Dict[str, Dict[str, SourceLocation]] = {}
+        # create_block_mapで求めた区間。遷移が変更された時点で破棄する
+        self.block_map: Dict[str, List[BlockEntry]] | None = None
         if data is not None:
             self.set_lts_as_dict(data)
 
+    def add_transition(
+        self,
+        source: str,
+        label: str,
+        target: str,
+        location: SourceLocation | None = None,
+    ):
+        super().add_transition(source, label, target)
+        self.block_map = None
+        if location is not None:
+            self.set_source_location(source, label, location)
+
+    def clear_transition(self, source: str):
+        labels = list(self.transitions.get(source, {}))
+        super().clear_transition(source)
+        self.block_map = None
+        for label in labels:
+            if source in self.source_map and label in self.source_map[source]:
+                del self.source_map[source][label]
+
+    def set_source_location(self, state: str, label: str, location: SourceLocation):
+        if state not in self.transitions:
+            raise exception.DoesNotExistException(state)
+        if state not in self.source_map:
+            self.source_map[state] = {}
+        self.source_map[state][label] = location
+
+    def get_source_location(self, state: str, label: str):
+        if state not in self.source_map or label not in self.source_map[state]:
+            return None
+        return self.source_map[state][label]
+
     def set_state_type(self, state: str, state_type: StateType):
         if state not in self.transitions:
             raise exception.DoesNotExistException(state)
         self.state_type_map[state] = state_type
+        self.block_map = None
+
+    def get_state_name(self, state: str):
+        # プログラムイメージのLTSと同じく、保存時に用いる状態名を返却する
+        return state
 
     def get_state_type(self, state: str):
         if state not in self.transitions:
@@ -57,6 +217,15 @@ class PseudoCompiledLTS(LabeledTransitionSystem):
             return StateType.UNDEFINED
         return self.state_type_map[state]
 
+    def get_block(self, state: str):
+        # stateから始まるまとめて実行できる区間。区間の先頭でない場合はNone
+        if self.block_map is None:
+            in_degrees = {
+                state: len(sources) for state, sources in self.backwards.items()
+            }
+            self.block_map = create_block_map(self, self.transitions, in_degrees)
+        return self.block_map.get(state)
+
     def get_lts_as_dict(self):
         lts_dict = super().get_lts_as_dict()
         lts_dict["state_type_map"] = self.state_type_map
@@ -64,15 +233,43 @@ class PseudoCompiledLTS(LabeledTransitionSystem):
         lts_dict["name_val_map"] = self.name_val_map
         lts_dict["name_type_map"] = self.name_type_map
         lts_dict["func_results"] = self.func_results
+        lts_dict["source_map"] = self.source_map
         return lts_dict
 
     def set_lts_as_dict(self, lts_dict):
         super().set_lts_as_dict(lts_dict)
+        self.block_map = None
         self.state_type_map = lts_dict["state_type_map"]
         self.arg_list = lts_dict["arg_list"]
         self.name_val_map = lts_dict["name_val_map"]
         self.name_type_map = lts_dict["name_type_map"]
         self.func_results = lts_dict["func_results"]
+        # 位置情報を持たない以前の形式のデータも読み込めるようにする
+        self.source_map = {
+            state: {
+                label: SourceLocation(*location)
+                for label, location in locations.items()
+            }
+            for state, locations in lts_dict.get("source_map", {}).items()
+        }
+
+
+class LazyPattern:
+    """クラス定数の正規表現を初めて参照されたときにコンパイルするディスクリプタ。
+
+    コンパイルした結果でクラス属性を置き換えるため、2回目以降は通常の属性参照となる。
+    """
+
+    def __init__(self, source_name: str):
+        self.source_name = source_name
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner: type):
+        pattern = re.compile(getattr(owner, self.source_name))
+        setattr(owner, self.name, pattern)
+        return pattern
 
 
 class Interpreter:
@@ -277,77 +474,109 @@ class Interpreter:
         "または": OP_LV1 + OP_LV2 + OP_LV3 + OP_LV4 + OP_LV5 + OP_LV6 + OP_LV7,
     }
 
-    def __init__(self):
+    # 正規表現は初めて参照されたときにコンパイルし、全てのインスタンスで共有する
+    type_pattern = LazyPattern("TYPE")
+    while_pattern = LazyPattern("WHILE")
+    endwhile_pattern = LazyPattern("ENDWHILE")
+    do_pattern = LazyPattern("DO")
+    if_pattern = LazyPattern("IF")
+    else_pattern = LazyPattern("ELSE")
+    elseif_pattern = LazyPattern("ELSEIF")
+    endif_pattern = LazyPattern("ENDIF")
+
+    for_pattern = LazyPattern("FOR")
+    endfor_pattern = LazyPattern("ENDFOR")
+    for_op1_pattern = LazyPattern("FOR_OP1")
+    for_op2_pattern = LazyPattern("FOR_OP2")
+    for_op3_pattern = LazyPattern("FOR_OP3")
+    for_op4_pattern = LazyPattern("FOR_OP4")
+    for_op4_2_pattern = LazyPattern("FOR_OP4_2")
+
+    name_pattern = LazyPattern("NAME")
+    num_val_pattern = LazyPattern("NUM_VAL")
+    operand_pattern = LazyPattern("OPERAND")
+    add_sub_operator_pattern = LazyPattern("ADD_SUB_OPERATOR")
+    mul_div_mod_operator_pattern = LazyPattern("MUL_DIV_MOD_OPERATOR")
+    and_operator_pattern = LazyPattern("AND_OPERATOR")
+    or_operator_pattern = LazyPattern("OR_OPERATOR")
+    operators_pattern = LazyPattern("OPERATORS")
+    single_operators_pattern = LazyPattern("SINGLE_OPERATORS")
+    logical_value_pattern = LazyPattern("LOGICAL_VALUE")
+    compare_start_operator_jp_pattern = LazyPattern("COMPARE_START_OPERATOR_JP")
+    compare_operator_jp_pattern = LazyPattern("COMPARE_OPERATOR_JP")
+    length_pattern = LazyPattern("LENGTH")
+    extra_operator_pattern = LazyPattern("EXTRA_OPERATOR")
+    array_append_start_pattern = LazyPattern("ARRAY_APPEND_START")
+    array_append_end_pattern = LazyPattern("ARRAY_APPEND_END")
+    value_pattern = LazyPattern("VALUE")
+
+    parenthesis_start_pattern = LazyPattern("PALENTHESIS_START")
+    parenthesis_end_pattern = LazyPattern("PALENTHESIS_END")
+    square_bracket_start_pattern = LazyPattern("SQUARE_BRACKET_START")
+    square_bracket_end_pattern = LazyPattern("SQUARE_BRACKET_END")
+    curly_bracket_start_pattern = LazyPattern("CURLY_BRACKET_START")
+    curly_bracket_end_pattern = LazyPattern("CURLY_BRACKET_END")
+
+    colon_pattern = LazyPattern("COLON")
+    comma_pattern = LazyPattern("COMMA")
+    assign_pattern = LazyPattern("ASSIGN")
+    func_start_pattern = LazyPattern("FUNC_START")
+    func_args_pattern = LazyPattern("FUNC_ARGS")
+
+    return_pattern = LazyPattern("RETURN")
+
+    def __init__(self, lazy_compile: bool = False, trace: bool = True):
+        # Trueの場合、関数の処理は初めて呼び出されたときにコンパイルする
+        self.lazy_compile = lazy_compile
+        # Trueの場合、1遷移ごとに呼び出し状況と変数を表示する
+        self.trace = trace
+        self.reset()
+
+    def reset(self):
+        # コンパイル済みの正規表現は保持したまま、プログラムと実行状態を初期化する
         self.lts = PseudoCompiledLTS()
         self.func_lts_map: Dict[str, PseudoCompiledLTS] = {}
+        # 関数名 -> (関数定義の行群, 関数定義の開始行番号, ファイル名)
+        self.pending_funcs: Dict[str, Tuple[List[str], int, str | None]] = {}
         self.calling_stack: List[Tuple[str, str]] = []
+        self.calling_func_state: Tuple[str, str] | None = None
         self.current_state = self.lts.get_init_state()
-        self.complie_patterns()
-
-    def complie_patterns(self):
-        self.type_pattern = re.compile(self.TYPE)
-        self.while_pattern = re.compile(self.WHILE)
-        self.endwhile_pattern = re.compile(self.ENDWHILE)
-        self.do_pattern = re.compile(self.DO)
-        self.if_pattern = re.compile(self.IF)
-        self.else_pattern = re.compile(self.ELSE)
-        self.elseif_pattern = re.compile(self.ELSEIF)
-        self.endif_pattern = re.compile(self.ENDIF)
-
-        self.for_pattern = re.compile(self.FOR)
-        self.endfor_pattern = re.compile(self.ENDFOR)
-        self.for_op1_pattern = re.compile(self.FOR_OP1)
-        self.for_op2_pattern = re.compile(self.FOR_OP2)
-        self.for_op3_pattern = re.compile(self.FOR_OP3)
-        self.for_op4_pattern = re.compile(self.FOR_OP4)
-        self.for_op4_2_pattern = re.compile(self.FOR_OP4_2)
-
-        self.name_pattern = re.compile(self.NAME)
-        self.num_val_pattern = re.compile(self.NUM_VAL)
-        self.operand_pattern = re.compile(self.OPERAND)
-        self.add_sub_operator_pattern = re.compile(self.ADD_SUB_OPERATOR)
-        self.mul_div_mod_operator_pattern = re.compile(self.MUL_DIV_MOD_OPERATOR)
-        self.and_operator_pattern = re.compile(self.AND_OPERATOR)
-        self.or_operator_pattern = re.compile(self.OR_OPERATOR)
-        self.operators_pattern = re.compile(self.OPERATORS)
-        self.single_operators_pattern = re.compile(self.SINGLE_OPERATORS)
-        self.logical_value_pattern = re.compile(self.LOGICAL_VALUE)
-        self.compare_start_operator_jp_pattern = re.compile(
-            self.COMPARE_START_OPERATOR_JP
-        )
-        self.compare_operator_jp_pattern = re.compile(self.COMPARE_OPERATOR_JP)
-        self.length_pattern = re.compile(self.LENGTH)
-        self.extra_operator_pattern = re.compile(self.EXTRA_OPERATOR)
-        self.array_append_start_pattern = re.compile(self.ARRAY_APPEND_START)
-        self.array_append_end_pattern = re.compile(self.ARRAY_APPEND_END)
-        self.value_pattern = re.compile(self.VALUE)
-
-        self.parenthesis_start_pattern = re.compile(self.PALENTHESIS_START)
-        self.parenthesis_end_pattern = re.compile(self.PALENTHESIS_END)
-        self.square_bracket_start_pattern = re.compile(self.SQUARE_BRACKET_START)
-        self.square_bracket_end_pattern = re.compile(self.SQUARE_BRACKET_END)
-        self.curly_bracket_start_pattern = re.compile(self.CURLY_BRACKET_START)
-        self.curly_bracket_end_pattern = re.compile(self.CURLY_BRACKET_END)
-
-        self.colon_pattern = re.compile(self.COLON)
-        self.comma_pattern = re.compile(self.COMMA)
-        self.assign_pattern = re.compile(self.ASSIGN)
-        self.func_start_pattern = re.compile(self.FUNC_START)
-        self.func_args_pattern = re.compile(self.FUNC_ARGS)
-
-        self.return_pattern = re.compile(self.RETURN)
+        self.profiler: LineProfiler | None = None
+        # attach_collectorsで指定される前の(プロファイラ, 網羅率, メモリの集計)
+        # finish_executionで元に戻す
+        self.previous_collectors: Tuple | None = None
+        self.coverage: "CoverageCollector | None" = None
+        self.source_file: str | None = None
+        self.fired_label: str | None = None
+        # 配列を参照する被演算子の文字列 -> 解析済みの配列の参照
+        self.array_access_cache: Dict[str, ArrayAccess] = {}
+        # 配列の末尾に追加する文 -> 解析済みの追加処理
+        self.array_append_cache: Dict[str, ArrayAppend] = {}
+        # 遷移ラベル -> 解析済みの文。コンパイル時に登録し、実行時は再解析しない
+        self.statements: Dict[str, Statement] = {}
+        # for文の条件 -> 解析済みの条件。初めて実行した時点で登録する
+        self.for_sentences: Dict[str, ForSentence] = {}
+        # Trueの場合、連続する代入・計算・宣言の状態を1度の呼び出しでまとめて実行する
+        self.fuse_blocks = False
+        # src.vectorizer.attach_vectorizerで設定した場合、fuse_blocksがTrueであれば
+        # 本体が代入のみのfor文をまとめて実行する
+        self.vectorizer = None
+        # Noneでない場合、変数が使用するメモリを集計し、上限を超えたら実行を中断する
+        self.memory: MemoryTracker | None = None
+        # Noneでない場合、構文エラーで解析を中断せずにここへ記録する
+        self.syntax_errors: List[SyntaxErrorRecord] | None = None
 
     def interpret_arithmetic_formula(
         self,
         line: str,
         stack: List[str] = None,
         pended_op=None,
-        indent: str = "",
+        indent: int = 0,
         dry_run: bool = False,
         line_num: str = None,
         lts: PseudoCompiledLTS | None = None,
     ):
-        if indent != "" and not self.check_indent(line, indent):
+        if indent != 0 and not self.check_indent(measure_indent(line), indent):
             raise exception.InvalidIndentException(line_num=line_num)
         result, remain = self.interpret_arithmetic_operand(
             line, stack, dry_run=dry_run, lts=lts
@@ -386,7 +615,7 @@ class Interpreter:
                 return self.JP_SINGLE_OPERATOR_FUNC_MAP[comp_op](val), remain
 
             val2, remain = self.interpret_arithmetic_operand(
-                remain, stack, exception, lts=lts
+                remain, stack, dry_run=dry_run, lts=lts
             )
             comp_op, remain = self.get_pattern_and_remain(
                 self.compare_operator_jp_pattern, remain, exception
@@ -403,7 +632,9 @@ class Interpreter:
             return None
         else:
             remain = tmp_remain
-        val2, tmp_remain = self.interpret_arithmetic_operand(remain, stack, lts=lts)
+        val2, tmp_remain = self.interpret_arithmetic_operand(
+            remain, stack, dry_run=dry_run, lts=lts
+        )
         # 割り算の商や余りという語句が存在する場合は個々で処理
         res = self.get_pattern_and_remain(self.extra_operator_pattern, tmp_remain)
         if res:
@@ -455,6 +686,11 @@ class Interpreter:
     ):
         if lts is None:
             lts = self.lts
+        operand = line
+        if not dry_run and stack is None and operand in self.array_access_cache:
+            res = self.get_array_element(self.array_access_cache[operand], lts)
+            if res is not None:
+                return res
         res = self.get_pattern_and_remain(self.single_operators_pattern, line)
         if res:
             single_op, line = res
@@ -480,7 +716,9 @@ class Interpreter:
                 while res:
                     _, remain = res
                     try:
-                        val, remain = self.interpret_arithmetic_formula(remain, lts=lts)
+                        val, remain = self.interpret_arithmetic_formula(
+                            remain, dry_run=dry_run, lts=lts
+                        )
                         vars.append(val)
                     except Exception:
                         break
@@ -507,11 +745,14 @@ class Interpreter:
                 stack.append(name)
             res = self.get_pattern_and_remain(self.square_bracket_start_pattern, remain)
             idx_list = []
+            idx_texts = []
             while res:
                 _, remain = res
                 if type(lts.name_val_map[name]) is not list and not dry_run:
                     raise exception.InvalidArrayException(name)
-                index, remain = self.interpret_arithmetic_formula(remain, lts=lts)
+                index, index_remain = self.interpret_arithmetic_formula(remain, lts=lts)
+                idx_texts.append(remain[: len(remain) - len(index_remain)].strip())
+                remain = index_remain
                 _, remain = self.get_pattern_and_remain(
                     self.square_bracket_end_pattern,
                     remain,
@@ -529,11 +770,15 @@ class Interpreter:
                     if int(index) > len(return_target) or int(index) < 1:
                         raise exception.InvalidArrayIndexException(name)
                     return_target = return_target[int(index) - 1]
+                if stack is None and single_op is None:
+                    access = self.compile_array_access(name, idx_texts, remain)
+                    if access is not None:
+                        self.array_access_cache[operand] = access
                 return return_target, remain
             res = self.get_pattern_and_remain(self.length_pattern, remain)
             if res:
                 length_name, remain = res
-                if type(lts.name_val_map[name]) is not list:
+                if type(lts.name_val_map[name]) is not list and not dry_run:
                     raise exception.InvalidArrayException(name)
                 if dry_run:
                     return None, remain
@@ -555,15 +800,92 @@ class Interpreter:
             val = self.SINGLE_OPERATOR_FUNC_MAP[single_op](val)
         return val, remain
 
+    def compile_operand(self, text: str):
+        # 添字や追加する値を定数・変数名・式に分類する
+        # 関数呼び出しを含む場合は評価をやり直せないためNoneを返却する
+        if any(func_name in text for func_name in self.func_lts_map):
+            return None
+        try:
+            return ArrayIndex(INDEX_CONST, int(text))
+        except ValueError:
+            pass
+        if self.name_pattern.fullmatch(text) and text not in self.LOGICAL_VAL_MAP:
+            return ArrayIndex(INDEX_NAME, text)
+        return ArrayIndex(INDEX_FORMULA, text)
+
+    def evaluate_operand(self, operand: ArrayIndex, lts: PseudoCompiledLTS):
+        kind, value = operand
+        if kind == INDEX_CONST:
+            return value
+        if kind == INDEX_NAME:
+            return lts.name_val_map.get(value)
+        val, _ = self.interpret_arithmetic_formula(value, lts=lts)
+        return val
+
+    def compile_array_access(self, name: str, idx_texts: List[str], remain: str):
+        # 添字を分類した配列の参照を作成する
+        indexes = tuple(self.compile_operand(text) for text in idx_texts)
+        if None in indexes:
+            return None
+        return ArrayAccess(name, indexes, remain)
+
+    def get_indexed_target(
+        self, target, indexes: Tuple[ArrayIndex, ...], lts: PseudoCompiledLTS
+    ):
+        # 添字を順にたどった要素を返却する
+        # 配列・添字が想定外の場合はNoneを返却し、通常の解析で例外を発生させる
+        for index in indexes:
+            if type(target) is not list:
+                return None
+            index = self.evaluate_operand(index, lts)
+            if type(index) is not int or index < 1 or index > len(target):
+                return None
+            target = target[index - 1]
+        return (target,)
+
+    def get_array_element(self, access: ArrayAccess, lts: PseudoCompiledLTS):
+        # 解析済みの配列の参照を評価する
+        res = self.get_indexed_target(
+            lts.name_val_map.get(access.name), access.indexes, lts
+        )
+        if res is None:
+            return None
+        return res[0], access.remain
+
+    def compile_array_append(self, name: str, idx_texts: List[str], value_text: str):
+        indexes = tuple(self.compile_operand(text) for text in idx_texts)
+        value = self.compile_operand(value_text)
+        if None in indexes or value is None:
+            return None
+        return ArrayAppend(name, indexes, value)
+
+    def execute_array_append(self, append: ArrayAppend, lts: PseudoCompiledLTS):
+        # 解析済みの追加処理を実行する
+        # 追加先の行を添字からたどり、追加する値を評価して末尾に追加する
+        # 追加先が想定外の場合はFalseを返却し、通常の解析で例外を発生させる
+        res = self.get_indexed_target(
+            lts.name_val_map.get(append.name), append.indexes, lts
+        )
+        if res is None or type(res[0]) is not list:
+            return False
+        kind, value = append.value
+        if kind == INDEX_NAME and value not in lts.name_val_map:
+            return False
+        val = self.evaluate_operand(append.value, lts)
+        res[0].append(val)
+        if self.memory is not None:
+            self.memory.append(lts, append.name, val)
+        return True
+
     def get_pattern_and_remain(
         self,
         pattern: Pattern,
         target: str,
         e: Exception | None = None,
-        indent: str = "",
+        indent: int = 0,
         line_num: int = 0,
     ) -> Tuple[str, str]:
-        if indent != "" and not self.check_indent(target, indent):
+        if indent != 0 and not self.check_indent(measure_indent(target), indent):
             raise exception.InvalidIndentException(line_num=line_num)
         target = target.strip()
         matched = pattern.match(target)
@@ -574,10 +896,23 @@ class Interpreter:
                 raise e(target)
         return target[matched.start() : matched.end()], target[matched.end() :].strip()
 
+    def get_line_pattern_and_remain(
+        self,
+        pattern: Pattern,
+        lines: SourceLines,
+        line_pointa: int,
+        indent: int = 0,
+        e: Exception | None = None,
+    ):
+        # インデントは行ごとに計算済みの深さで確認する
+        if indent != 0 and not self.check_indent(lines.indent(line_pointa), indent):
+            raise exception.InvalidIndentException(line_num=line_pointa)
+        return self.get_pattern_and_remain(pattern, lines[line_pointa], e)
+
     def process_var_assigns(
         self,
         remain,
-        indent="",
+        indent=0,
         line_num=0,
         dry_run: bool = False,
         lts: PseudoCompiledLTS | None = None,
@@ -585,6 +920,7 @@ class Interpreter:
         array_idx_dict: Dict[str, List[int]] = {}
         if lts is None:
             lts = self.lts
+        line = remain
         vars_list = []
         while True:
             name, remain = self.get_pattern_and_remain(
@@ -594,12 +930,15 @@ class Interpreter:
                 indent=indent,
                 line_num=line_num,
             )
+            idx_texts = []
             res = self.get_pattern_and_remain(self.square_bracket_start_pattern, remain)
             while res:
                 _, remain = res
-                idx, remain = self.interpret_arithmetic_formula(
+                idx, idx_remain = self.interpret_arithmetic_formula(
                     remain, lts=lts, dry_run=dry_run
                 )
+                idx_texts.append(remain[: len(remain) - len(idx_remain)].strip())
+                remain = idx_remain
                 if name not in array_idx_dict:
                     array_idx_dict[name] = []
                 array_idx_dict[name].append(idx)
@@ -621,14 +960,17 @@ class Interpreter:
                 res = self.get_pattern_and_remain(
                     self.curly_bracket_start_pattern, remain
                 )
+                value_text = None
                 if res:
                     val, remain = self.process_array_definition(
                         remain, lts, dry_run=dry_run
                     )
                 else:
-                    val, remain = self.interpret_arithmetic_formula(
+                    val, val_remain = self.interpret_arithmetic_formula(
                         remain, dry_run=dry_run, lts=lts
                     )
+                    value_text = remain[: len(remain) - len(val_remain)].strip()
+                    remain = val_remain
                 res = self.get_pattern_and_remain(self.value_pattern, remain)
                 if res:
                     _, remain = res
@@ -645,6 +987,13 @@ class Interpreter:
                         target[int(array_idx_dict[name][-1] - 1)].append(val)
                     else:
                         lts.name_val_map[name].append(val)
+                    if self.memory is not None:
+                        self.memory.append(lts, name, val)
+                    # 文全体が1つの追加処理の場合は、次回から解析せずに追加する
+                    if len(vars_list) == 1 and value_text is not None:
+                        append = self.compile_array_append(name, idx_texts, value_text)
+                        if append is not None:
+                            self.array_append_cache[line] = append
                 return [name], remain
 
             res = self.get_pattern_and_remain(
@@ -661,25 +1010,24 @@ class Interpreter:
                         remain, lts, dry_run=dry_run
                     )
                     if name in array_idx_dict:
-                        target = self.get_target_array(lts, name, array_idx_dict[name])
-                        target[int(array_idx_dict[name][-1] - 1)] = array
+                        self.assign_array_element(
+                            lts, name, array_idx_dict[name], array
+                        )
                     else:
-                        lts.name_val_map[name] = array
+                        self.assign_variable(lts, name, array)
                 else:
                     val, remain = self.interpret_arithmetic_formula(
                         remain, dry_run=dry_run, lts=lts
                     )
                     if name in array_idx_dict and not dry_run:
-                        target = self.get_target_array(lts, name, array_idx_dict[name])
-                        target[int(array_idx_dict[name][-1] - 1)] = val
+                        self.assign_array_element(lts, name, array_idx_dict[name], val)
                     else:
-                        lts.name_val_map[name] = val
+                        self.assign_variable(lts, name, val)
             else:
                 if name in array_idx_dict and not dry_run:
-                    target = self.get_target_array(lts, name, array_idx_dict[name])
-                    target[int(array_idx_dict[name][-1] - 1)] = None
+                    self.assign_array_element(lts, name, array_idx_dict[name], None)
                 else:
-                    lts.name_val_map[name] = None
+                    self.assign_variable(lts, name, None)
             res = self.get_pattern_and_remain(
                 self.comma_pattern, remain, indent=indent, line_num=line_num
             )
@@ -690,6 +1038,20 @@ class Interpreter:
                 break
         return vars_list, remain
 
+    def assign_variable(self, lts: PseudoCompiledLTS, name: str, val):
+        lts.name_val_map[name] = val
+        if self.memory is not None:
+            self.memory.update(lts, name)
+
+    def assign_array_element(
+        self, lts: PseudoCompiledLTS, name: str, target_list: List[int], val
+    ):
+        target = self.get_target_array(lts, name, target_list)
+        index = int(target_list[-1] - 1)
+        if self.memory is not None:
+            self.memory.replace(lts, name, target[index], val)
+        target[index] = val
+
     def get_target_array(
         self, lts: PseudoCompiledLTS, name: str, target_list: List[int]
     ):
@@ -737,7 +1099,7 @@ class Interpreter:
     def interpret_var_assign(
         self,
         line: str,
-        indent: str = "",
+        indent: int = 0,
         line_num: int = 0,
         dry_run: bool = False,
         lts: PseudoCompiledLTS | None = None,
@@ -803,10 +1165,39 @@ class Interpreter:
         _, remain = self.process_var_assigns(line, dry_run=dry_run, lts=lts)
         return remain
 
+    def execute_var_assign(self, line: str, lts: PseudoCompiledLTS | None = None):
+        # コンパイル時に代入文であることは検証済みのため、1度の解析で代入する
+        if lts is None:
+            lts = self.lts
+        if line in self.array_append_cache and self.execute_array_append(
+            self.array_append_cache[line], lts
+        ):
+            return ""
+        statement = self.get_statement(line, StateType.ASSIGN)
+        if statement.target not in lts.name_val_map:
+            raise exception.NameNotDefinedException(statement.target)
+        _, remain = self.process_var_assigns(statement.body, lts=lts)
+        return remain
+
+    def execute_var_declare(self, line: str, lts: PseudoCompiledLTS):
+        # 型と区切り文字は解析済みのため、変数の並びのみを解析して代入する
+        statement = self.get_statement(line, StateType.DECLARE)
+        names, remain = self.process_var_assigns(statement.body, lts=lts)
+        for name in names:
+            lts.name_type_map[name] = statement.var_type
+        return remain
+
+    def execute_return(self, line: str, lts: PseudoCompiledLTS):
+        statement = self.get_statement(line, StateType.RETURN)
+        if statement.body == "":
+            return None
+        val, _ = self.interpret_arithmetic_formula(statement.body, lts=lts)
+        return val
+
     def interpret_return(
         self,
         line: str,
-        indent: str = "",
+        indent: int = 0,
         line_num: int = 0,
         dry_run: bool = False,
         lts: PseudoCompiledLTS | None = None,
@@ -829,7 +1220,7 @@ class Interpreter:
     def interpret_var_declare(
         self,
         line,
-        indent="",
+        indent=0,
         line_num=0,
         dry_run: bool = False,
         lts: PseudoCompiledLTS | None = None,
@@ -858,18 +1249,19 @@ class Interpreter:
 
     def interpret_if_block(
         self,
-        lines: List[str],
+        lines: List[str] | SourceLines,
         return_tuples: List[Tuple[str, str]],
-        indent: str = "",
+        indent: int = 0,
         line_pointa=0,
         lts: PseudoCompiledLTS | None = None,
     ):
-        if len(lines) == 0 or (
-            indent != "" and not self.check_indent(lines[line_pointa], indent)
+        lines = as_source_lines(lines)
+        if not lines.has_line(line_pointa) or (
+            indent != 0 and not self.check_indent(lines.indent(line_pointa), indent)
         ):
             return line_pointa
-        res = self.get_pattern_and_remain(
-            self.if_pattern, lines[line_pointa], indent=indent, line_num=line_pointa
+        res = self.get_line_pattern_and_remain(
+            self.if_pattern, lines, line_pointa, indent
         )
         end_states = []
         if not res:
@@ -891,13 +1283,10 @@ class Interpreter:
 
         end_states.append(self.current_state)
         while True:
-            if len(lines) == 0:
+            if not lines.has_line(line_pointa):
                 break
-            res = self.get_pattern_and_remain(
-                self.elseif_pattern,
-                lines[line_pointa],
-                indent=indent,
-                line_num=line_pointa,
+            res = self.get_line_pattern_and_remain(
+                self.elseif_pattern, lines, line_pointa, indent
             )
             if not res:
                 break
@@ -906,10 +1295,10 @@ class Interpreter:
                 lines, line_pointa, return_tuples, remain, indent, start_state, lts=lts
             )
             end_states.append(self.current_state)
-        if len(lines) <= line_pointa:
+        if not lines.has_line(line_pointa):
             raise exception.InvalidFormulaException()
-        res = self.get_pattern_and_remain(
-            self.else_pattern, lines[line_pointa], indent=indent, line_num=line_pointa
+        res = self.get_line_pattern_and_remain(
+            self.else_pattern, lines, line_pointa, indent
         )
         if res:
             line_pointa, _ = self.process_nested_process(
@@ -918,40 +1307,47 @@ class Interpreter:
             end_states.append(self.current_state)
         else:
             state = lts.create_state()
-            lts.add_transition(start_state, "else", state)
+            lts.add_transition(
+                start_state,
+                "else",
+                state,
+                self.get_source_location(lines[line_pointa], line_pointa),
+            )
             self.current_state = state
             end_states.append(self.current_state)
 
-        if len(lines) <= line_pointa:
+        if not lines.has_line(line_pointa):
             raise exception.InvalidFormulaException()
-        res = self.get_pattern_and_remain(
-            self.endif_pattern, lines[line_pointa], indent=indent, line_num=line_pointa
+        res = self.get_line_pattern_and_remain(
+            self.endif_pattern, lines, line_pointa, indent
         )
         if not res:
             raise exception.InvalidIfBlockException(line_num=line_pointa)
+        location = self.get_source_location(lines[line_pointa], line_pointa, "endif")
         line_pointa += 1
         endif_state = lts.create_state()
         for end_state in end_states:
-            lts.add_transition(end_state, "endif", endif_state)
+            lts.add_transition(end_state, "endif", endif_state, location)
         self.current_state = endif_state
 
         return line_pointa
 
     def interpret_while_block(
         self,
-        lines: List[str],
+        lines: List[str] | SourceLines,
         return_tuples: List[Tuple[str, str]],
-        indent: str = "",
+        indent: int = 0,
         line_pointa=0,
         lts: PseudoCompiledLTS | None = None,
     ):
-        if len(lines) == 0 or (
-            indent != "" and not self.check_indent(lines[line_pointa], indent)
+        lines = as_source_lines(lines)
+        if not lines.has_line(line_pointa) or (
+            indent != 0 and not self.check_indent(lines.indent(line_pointa), indent)
         ):
             return line_pointa
 
-        res = self.get_pattern_and_remain(
-            self.while_pattern, lines[line_pointa], indent=indent, line_num=line_pointa
+        res = self.get_line_pattern_and_remain(
+            self.while_pattern, lines, line_pointa, indent
         )
         if not res:
             return line_pointa
@@ -969,18 +1365,16 @@ class Interpreter:
             self.current_state,
             lts=lts,
         )
-        res = self.get_pattern_and_remain(
-            self.endwhile_pattern,
-            lines[line_pointa],
-            indent=indent,
-            line_num=line_pointa,
+        res = self.get_line_pattern_and_remain(
+            self.endwhile_pattern, lines, line_pointa, indent
         )
         if not res:
             raise exception.InvalidWhileBlockException(line_num=line_pointa)
+        location = self.get_source_location(lines[line_pointa], line_pointa, "endwhile")
         line_pointa += 1
-        lts.add_transition(self.current_state, "", start_state)
+        lts.add_transition(self.current_state, "", start_state, location)
         endwhile_state = lts.create_state()
-        lts.add_transition(start_state, "endwhile", endwhile_state)
+        lts.add_transition(start_state, "endwhile", endwhile_state, location)
 
         self.current_state = endwhile_state
 
@@ -988,19 +1382,20 @@ class Interpreter:
 
     def interpret_do_while_block(
         self,
-        lines: List[str],
+        lines: List[str] | SourceLines,
         return_tuples: List[Tuple[str, str]],
-        indent: str = "",
+        indent: int = 0,
         line_pointa=0,
         lts: PseudoCompiledLTS | None = None,
     ):
-        if len(lines) == 0 or (
-            indent != "" and not self.check_indent(lines[line_pointa], indent)
+        lines = as_source_lines(lines)
+        if not lines.has_line(line_pointa) or (
+            indent != 0 and not self.check_indent(lines.indent(line_pointa), indent)
         ):
             return line_pointa
 
-        res = self.get_pattern_and_remain(
-            self.do_pattern, lines[line_pointa], indent=indent, line_num=line_pointa
+        res = self.get_line_pattern_and_remain(
+            self.do_pattern, lines, line_pointa, indent
         )
         if not res:
             return line_pointa
@@ -1010,20 +1405,28 @@ class Interpreter:
         line_pointa, start_state = self.process_nested_process(
             lines, line_pointa, return_tuples, "do", indent, self.current_state, lts=lts
         )
-        res = self.get_pattern_and_remain(
-            self.while_pattern,
-            lines[line_pointa],
-            indent=indent,
-            line_num=line_pointa,
+        res = self.get_line_pattern_and_remain(
+            self.while_pattern, lines, line_pointa, indent
         )
         if not res:
             raise exception.InvalidDoWhileBlockException(line_num=line_pointa)
-        line_pointa += 1
         _, remain = res
+        line = lines[line_pointa]
+        line_pointa += 1
         lts.set_state_type(self.current_state, StateType.WHILE)
-        lts.add_transition(self.current_state, remain, start_state)
+        lts.add_transition(
+            self.current_state,
+            remain,
+            start_state,
+            self.get_source_location(line, line_pointa - 1, remain),
+        )
         endwhile_state = lts.create_state()
-        lts.add_transition(self.current_state, "else", endwhile_state)
+        lts.add_transition(
+            self.current_state,
+            "else",
+            endwhile_state,
+            self.get_source_location(line, line_pointa - 1),
+        )
 
         self.current_state = endwhile_state
 
@@ -1031,19 +1434,20 @@ class Interpreter:
 
     def interpret_for_block(
         self,
-        lines: List[str],
+        lines: List[str] | SourceLines,
         return_tuples: List[Tuple[str, str]],
-        indent: str = "",
+        indent: int = 0,
         line_pointa=0,
         lts: PseudoCompiledLTS | None = None,
     ):
-        if len(lines) == 0 or (
-            indent != "" and not self.check_indent(lines[line_pointa], indent)
+        lines = as_source_lines(lines)
+        if not lines.has_line(line_pointa) or (
+            indent != 0 and not self.check_indent(lines.indent(line_pointa), indent)
         ):
             return line_pointa
 
-        res = self.get_pattern_and_remain(
-            self.for_pattern, lines[line_pointa], indent=indent, line_num=line_pointa
+        res = self.get_line_pattern_and_remain(
+            self.for_pattern, lines, line_pointa, indent
         )
         if not res:
             return line_pointa
@@ -1060,19 +1464,17 @@ class Interpreter:
             self.current_state,
             lts=lts,
         )
-        res = self.get_pattern_and_remain(
-            self.endfor_pattern,
-            lines[line_pointa],
-            indent=indent,
-            line_num=line_pointa,
+        res = self.get_line_pattern_and_remain(
+            self.endfor_pattern, lines, line_pointa, indent
         )
         if not res:
             raise exception.InvalidForBlockException(line_num=line_pointa)
+        location = self.get_source_location(lines[line_pointa], line_pointa, "endfor")
         line_pointa += 1
         _, remain = res
-        lts.add_transition(self.current_state, remain, start_state)
+        lts.add_transition(self.current_state, remain, start_state, location)
         endfor_state = lts.create_state()
-        lts.add_transition(start_state, "endfor", endfor_state)
+        lts.add_transition(start_state, "endfor", endfor_state, location)
 
         self.current_state = endfor_state
 
@@ -1081,8 +1483,30 @@ class Interpreter:
     def process_for_sentence(
         self, line: str, line_num: int = 0, lts: PseudoCompiledLTS | None = None
     ):
+        # 条件は初めて実行した時のみ解析し、以降は解析済みの式のみを評価する
         if lts is None:
             lts = self.lts
+        sentence = self.for_sentences.get(line)
+        if sentence is None:
+            sentence, values = self.parse_for_sentence(line, line_num, lts)
+            self.for_sentences[line] = sentence
+        else:
+            from_val, _ = self.interpret_arithmetic_formula(sentence.from_text, lts=lts)
+            to_val, _ = self.interpret_arithmetic_formula(sentence.to_text, lts=lts)
+            increment_val = 1
+            if sentence.increment_text is not None:
+                increment_val, _ = self.interpret_arithmetic_formula(
+                    sentence.increment_text, lts=lts
+                )
+            values = (from_val, to_val, increment_val)
+        from_val, to_val, increment_val = values
+        try:
+            return sentence.name, int(from_val), int(to_val), increment_val
+        except ValueError:
+            raise exception.InvalidForSentenceException()
+
+    def parse_for_sentence(self, line: str, line_num: int, lts: PseudoCompiledLTS):
+        # 条件を解析して各式の文字列と評価した値を返却する
         _, remain = self.get_pattern_and_remain(
             self.parenthesis_start_pattern,
             line,
@@ -1106,8 +1530,11 @@ class Interpreter:
             from_val, remain = res
             if from_val not in lts.name_val_map:
                 raise exception.NameNotDefinedException(from_val, line_num=line_num)
+            from_text = from_val
         else:
-            from_val, remain = self.interpret_arithmetic_formula(remain, lts=lts)
+            from_val, from_remain = self.interpret_arithmetic_formula(remain, lts=lts)
+            from_text = remain[: len(remain) - len(from_remain)].strip()
+            remain = from_remain
         _, remain = self.get_pattern_and_remain(
             self.for_op2_pattern,
             remain,
@@ -1119,8 +1546,11 @@ class Interpreter:
             to_val, remain = res
             if to_val not in lts.name_val_map:
                 raise exception.NameNotDefinedException(to_val, line_num=line_num)
+            to_text = to_val
         else:
-            to_val, remain = self.interpret_arithmetic_formula(remain, lts=lts)
+            to_val, to_remain = self.interpret_arithmetic_formula(remain, lts=lts)
+            to_text = remain[: len(remain) - len(to_remain)].strip()
+            remain = to_remain
         _, remain = self.get_pattern_and_remain(
             self.for_op3_pattern,
             remain,
@@ -1130,11 +1560,15 @@ class Interpreter:
         res = self.get_pattern_and_remain(self.for_op4_pattern, remain)
         if res:
             increment_val = 1
+            increment_text = None
         else:
-            increment_val, remain = self.interpret_arithmetic_formula(remain, lts=lts)
+            increment_val, increment_remain = self.interpret_arithmetic_formula(
+                remain, lts=lts
+            )
+            increment_text = remain[: len(remain) - len(increment_remain)].strip()
             _, remain = self.get_pattern_and_remain(
                 self.for_op4_2_pattern,
-                remain,
+                increment_remain,
             )
         _, remain = self.get_pattern_and_remain(
             self.parenthesis_end_pattern,
@@ -1142,24 +1576,28 @@ class Interpreter:
             exception.InvalidForSentenceException,
             line_num=line_num,
         )
-
-        try:
-            return name, int(from_val), int(to_val), increment_val
-        except ValueError:
-            raise exception.InvalidForSentenceException()
+        return ForSentence(name, from_text, to_text, increment_text), (
+            from_val,
+            to_val,
+            increment_val,
+        )
 
     def process_nested_process(
         self,
-        lines: List[str],
+        lines: List[str] | SourceLines,
         line_pointa: int,
         return_tuples: List[Tuple[str, str]],
         in_label: str | None = None,
-        indent: str = "",
+        indent: int = 0,
         start_state: str | None = None,
         lts: PseudoCompiledLTS | None = None,
     ):
-        child_indent = self.extract_indent(lines[line_pointa + 1])
-        if len(indent) >= len(child_indent):
+        lines = as_source_lines(lines)
+        if not lines.has_line(line_pointa + 1):
+            # ブロックの処理がないままファイルが終了している
+            raise exception.InvalidIndentException(line_num=line_pointa)
+        child_indent = lines.indent(line_pointa + 1)
+        if indent >= child_indent:
             raise exception.InvalidIndentException(line_num=line_pointa + 1)
         if lts is None:
             lts = self.lts
@@ -1167,35 +1605,38 @@ class Interpreter:
             start_state = lts.init_state
         if in_label is not None:
             state = lts.create_state()
-            lts.add_transition(start_state, in_label, state)
+            lts.add_transition(
+                start_state,
+                in_label,
+                state,
+                self.get_source_location(lines[line_pointa], line_pointa, in_label),
+            )
         else:
             state = start_state
         self.current_state = state
         line_pointa = self.interpret_process(
             lines, return_tuples, child_indent, line_pointa + 1, lts=lts
         )
-        if line_pointa < len(lines) and not self.check_indent(
-            lines[line_pointa], indent
+        if lines.has_line(line_pointa) and not self.check_indent(
+            lines.indent(line_pointa), indent
         ):
             raise exception.InvalidIndentException(line_num=line_pointa)
         return line_pointa, start_state
 
     def interpret_func_block(
         self,
-        lines: List[str],
-        indent: str = "",
+        lines: List[str] | SourceLines,
+        indent: int = 0,
         line_pointa=0,
     ):
-        if len(lines) == 0 or (
-            indent != "" and not self.check_indent(lines[line_pointa], indent)
+        lines = as_source_lines(lines)
+        if not lines.has_line(line_pointa) or (
+            indent != 0 and not self.check_indent(lines.indent(line_pointa), indent)
         ):
             return line_pointa
 
-        res = self.get_pattern_and_remain(
-            self.func_start_pattern,
-            lines[line_pointa],
-            indent=indent,
-            line_num=line_pointa,
+        res = self.get_line_pattern_and_remain(
+            self.func_start_pattern, lines, line_pointa, indent
         )
         if not res:
             return line_pointa
@@ -1216,11 +1657,27 @@ class Interpreter:
             indent=indent,
             line_num=line_pointa,
         )
-        return_tuples: List[Tuple[str, str]] = []
-
         func_lts = PseudoCompiledLTS()
         self.process_func_args(remain, line_pointa, func_lts)
         self.func_lts_map[func_name] = func_lts
+        if self.lazy_compile:
+            # 引数のみ解析し、処理の行群は呼び出し時のコンパイル用に保持する
+            func_lines = [lines[line_pointa]]
+            end_pointa = line_pointa + 1
+            while lines.has_line(end_pointa) and lines.indent(end_pointa) > indent:
+                func_lines.append(lines[end_pointa])
+                end_pointa += 1
+            self.pending_funcs[func_name] = (func_lines, line_pointa, self.source_file)
+            return end_pointa
+        return self.interpret_func_process(lines, line_pointa, func_lts)
+
+    def interpret_func_process(
+        self,
+        lines: List[str] | SourceLines,
+        line_pointa: int,
+        func_lts: PseudoCompiledLTS,
+    ):
+        return_tuples: List[Tuple[str, str]] = []
         current_state = self.current_state
         line_pointa, _ = self.process_nested_process(
             lines, line_pointa, return_tuples, lts=func_lts
@@ -1241,6 +1698,25 @@ class Interpreter:
         self.current_state = current_state
         return line_pointa
 
+    def compile_func(self, func_name: str):
+        if func_name not in self.pending_funcs:
+            return
+        func_lines, line_pointa, file = self.pending_funcs.pop(func_name)
+        source_file = self.source_file
+        self.source_file = file
+        try:
+            self.interpret_func_process(
+                LineStream(func_lines, start=line_pointa),
+                line_pointa,
+                self.func_lts_map[func_name],
+            )
+        finally:
+            self.source_file = source_file
+
+    def compile_all_funcs(self):
+        for func_name in list(self.pending_funcs):
+            self.compile_func(func_name)
+
     def process_func_args(
         self, line: str, line_num, lts: PseudoCompiledLTS | None = None
     ):
@@ -1284,9 +1760,9 @@ class Interpreter:
 
     def interpret_process(
         self,
-        lines: List[str],
+        lines: List[str] | SourceLines,
         return_tuples: List[Tuple[str, str]],
-        indent: str = "",
+        indent: int = 0,
         line_pointa=0,
         lts: PseudoCompiledLTS | None = None,
     ):
@@ -1298,90 +1774,192 @@ class Interpreter:
         ]
         if lts is None:
             lts = self.lts
-        while lines is not None and line_pointa < len(lines):
+        if lines is not None:
+            lines = as_source_lines(lines)
+        while lines is not None and lines.has_line(line_pointa):
             is_processed = False
-            if self.extract_indent(lines[line_pointa]) != indent:
+            if lines.indent(line_pointa) != indent:
                 break
-            tmp_line_pointa = self.interpret_func_block(
-                lines, indent=indent, line_pointa=line_pointa
-            )
-            if tmp_line_pointa != line_pointa:
-                line_pointa = tmp_line_pointa
-                continue
-            for target_func in interpret_targets:
-                tmp_line_pointa = target_func(
-                    lines=lines,
-                    return_tuples=return_tuples,
-                    indent=indent,
-                    line_pointa=line_pointa,
-                    lts=lts,
+            try:
+                tmp_line_pointa = self.interpret_func_block(
+                    lines, indent=indent, line_pointa=line_pointa
                 )
                 if tmp_line_pointa != line_pointa:
                     line_pointa = tmp_line_pointa
-                    is_processed = True
-                    break
+                    continue
+                for target_func in interpret_targets:
+                    tmp_line_pointa = target_func(
+                        lines=lines,
+                        return_tuples=return_tuples,
+                        indent=indent,
+                        line_pointa=line_pointa,
+                        lts=lts,
+                    )
+                    if tmp_line_pointa != line_pointa:
+                        line_pointa = tmp_line_pointa
+                        is_processed = True
+                        break
+            except exception.PatternException as e:
+                if e.line_num is None:
+                    e.line_num = line_pointa
+                if self.syntax_errors is None:
+                    raise
+                line_pointa = self.skip_error_block(e, lines, line_pointa, indent)
+                continue
             if is_processed:
                 continue
-            if (
-                self.interpret_return(lines[line_pointa], lts=lts, dry_run=True)
-                is not None
-            ):
+            line = lines[line_pointa]
+            try:
+                statement = self.classify_statement(line, indent, lts)
+            except exception.PatternException as e:
+                # 行番号が付与されていない例外には解析中の行番号を付与する
+                if e.line_num is None:
+                    e.line_num = line_pointa
+                if self.syntax_errors is None:
+                    raise
+                self.record_syntax_error(e, lines)
+                line_pointa += 1
+                continue
+            state_type = statement.state_type if statement is not None else None
+            if statement is not None:
+                self.statements[statement.text] = statement
+                location = self.get_source_location(line, line_pointa, statement.text)
+            if state_type == StateType.RETURN:
                 lts.set_state_type(self.current_state, StateType.RETURN)
-                return_tuples.append((self.current_state, lines[line_pointa].strip()))
+                # 遷移はreturn先の状態が確定してから追加されるため位置情報のみ先に登録
+                lts.set_source_location(self.current_state, statement.text, location)
+                return_tuples.append((self.current_state, statement.text))
                 line_pointa += 1
                 break
-            state_type = (
-                StateType.DECLARE
-                if (
-                    self.interpret_var_declare(
-                        lines[line_pointa],
-                        indent=indent,
-                        line_num=line_pointa,
-                        dry_run=True,
-                        lts=lts,
-                    )
-                    is not None
-                )
-                else StateType.ASSIGN
-                if (
-                    self.interpret_var_assign(
-                        lines[line_pointa],
-                        indent=indent,
-                        line_num=line_pointa,
-                        dry_run=True,
-                        lts=lts,
-                    )
-                    is not None
-                )
-                else StateType.FORMULA
-                if (
-                    self.interpret_arithmetic_formula(
-                        lines[line_pointa],
-                        indent=indent,
-                        line_num=line_pointa,
-                        dry_run=True,
-                        lts=lts,
-                    )
-                    is not None
-                )
-                else None
-            )
             if state_type is not None:
                 state = lts.create_state()
                 lts.set_state_type(self.current_state, state_type)
-                lts.add_transition(
-                    self.current_state, lines[line_pointa].strip(), state
-                )
+                lts.add_transition(self.current_state, statement.text, state, location)
                 self.current_state = state
                 line_pointa += 1
         return line_pointa
 
+    def classify_statement(
+        self,
+        line: str,
+        indent: int = 0,
+        lts: PseudoCompiledLTS | None = None,
+    ):
+        # 行の種別と解析結果を返却する
+        # 各行の内容は判定した種別の解析(dry_run)で1度だけ検証する
+        # 例外の行番号と遷移の位置情報は呼び出し元のinterpret_processで付与する
+        if lts is None:
+            lts = self.lts
+        if indent != 0 and not self.check_indent(measure_indent(line), indent):
+            raise exception.InvalidIndentException()
+        text = line.strip()
+        res = self.get_pattern_and_remain(self.return_pattern, text)
+        if res:
+            _, remain = res
+            if remain != "":
+                self.interpret_arithmetic_formula(remain, dry_run=True, lts=lts)
+            return Statement(StateType.RETURN, text, remain)
+        res = self.get_pattern_and_remain(self.type_pattern, text)
+        if res:
+            var_type, remain = res
+            _, remain = self.get_pattern_and_remain(
+                self.colon_pattern,
+                remain,
+                exception.DeclareException,
+            )
+            names, _ = self.process_var_assigns(remain, dry_run=True, lts=lts)
+            for name in names:
+                lts.name_type_map[name] = var_type
+            return Statement(StateType.DECLARE, text, remain, var_type=var_type)
+        res = self.get_pattern_and_remain(self.name_pattern, text)
+        if res:
+            name, remain = res
+            # 添字の式は代入文の解析時に評価するため、ここでは括弧の対応のみ読み飛ばす
+            remain = self.skip_square_brackets(remain)
+            if remain is not None and self.get_pattern_and_remain(
+                self.array_append_start_pattern, remain
+            ):
+                self.process_var_assigns(text, dry_run=True, lts=lts)
+                return Statement(StateType.ASSIGN, text, text, target=name)
+            if remain is not None and self.get_pattern_and_remain(
+                self.assign_pattern, remain
+            ):
+                if name not in lts.name_val_map:
+                    raise exception.NameNotDefinedException(name)
+                self.process_var_assigns(text, dry_run=True, lts=lts)
+                return Statement(StateType.ASSIGN, text, text, target=name)
+        self.interpret_arithmetic_formula(text, dry_run=True, lts=lts)
+        return Statement(StateType.FORMULA, text, text)
+
+    def get_statement(self, line: str, state_type: int):
+        # 遷移ラベルの解析済みの文を返却する
+        # イメージやスナップショットから読み込んだ遷移は、初めて実行した時に分解する
+        statement = self.statements.get(line)
+        if statement is None or statement.state_type != state_type:
+            statement = self.parse_statement(line, state_type)
+            self.statements[line] = statement
+        return statement
+
+    def parse_statement(self, text: str, state_type: int):
+        # 種別が判明している文を、検証せずに実行時に必要な部分へ分解する
+        if state_type == StateType.RETURN:
+            _, body = self.get_pattern_and_remain(self.return_pattern, text)
+            return Statement(state_type, text, body)
+        if state_type == StateType.DECLARE:
+            var_type, remain = self.get_pattern_and_remain(
+                self.type_pattern, text, exception.DeclareException
+            )
+            _, body = self.get_pattern_and_remain(
+                self.colon_pattern, remain, exception.DeclareException
+            )
+            return Statement(state_type, text, body, var_type=var_type)
+        if state_type == StateType.ASSIGN:
+            name, _ = self.get_pattern_and_remain(
+                self.name_pattern, text, exception.NamePatternException
+            )
+            return Statement(state_type, text, text, target=name)
+        return Statement(state_type, text, text)
+
+    def skip_square_brackets(self, line: str):
+        remain = line.strip()
+        while remain.startswith("["):
+            depth = 0
+            for idx, char in enumerate(remain):
+                if char == "[":
+                    depth += 1
+                elif char == "]":
+                    depth -= 1
+                    if depth == 0:
+                        break
+            if depth != 0:
+                return None
+            remain = remain[idx + 1 :].strip()
+        return remain
+
     def interpret_main_process(
         self,
-        lines: List[str],
+        lines: List[str] | SourceLines,
+        file: str | None = None,
     ):
+        self.source_file = file
+        lines = as_source_lines(lines)
         return_tuples = []
         line_pointa = self.interpret_process(lines, return_tuples)
+        # トップレベルで予期しないインデントの行があれば記録して解析を続ける
+        while (
+            self.syntax_errors is not None
+            and lines.has_line(line_pointa)
+            and lines.indent(line_pointa) != 0
+        ):
+            self.record_syntax_error(
+                exception.InvalidIndentException(line_num=line_pointa), lines
+            )
+            line_pointa += 1
+            while lines.has_line(line_pointa) and lines.indent(line_pointa) != 0:
+                line_pointa += 1
+            line_pointa = self.interpret_process(
+                lines, return_tuples, line_pointa=line_pointa
+            )
         return_state = self.lts.create_state()
         for source_state, label in return_tuples:
             # 自動で作成されるendifやendfor, endwhileなどを削除
@@ -1397,58 +1975,200 @@ class Interpreter:
             self.lts.add_transition(end, "return", return_state)
         return line_pointa
 
-    def check_indent(self, line: str, indent: str):
-        if indent == "":
-            return not line.startswith(" ")
-        return line.startswith(indent)
+    def interpret_source(self, source: str, file: str | None = None):
+        # ソースコードの文字列を行に分割してコンパイルする
+        return self.interpret_main_process(source.splitlines(keepends=True), file=file)
 
-    def extract_indent(self, line: str):
-        count = 0
-        indent = ""
-        while True:
-            if line[count] == " ":
-                indent += " "
-                count += 1
-            else:
-                return indent
+    def check_syntax(self, lines: List[str] | SourceLines, file: str | None = None):
+        # 構文エラーで解析を中断せず、1度の解析で全ての構文エラーを収集する
+        self.syntax_errors = []
+        lazy_compile = self.lazy_compile
+        self.lazy_compile = False
+        try:
+            self.interpret_main_process(lines, file=file)
+        except exception.PatternException as e:
+            self.record_syntax_error(e, lines)
+        finally:
+            self.lazy_compile = lazy_compile
+            syntax_errors = self.syntax_errors
+            self.syntax_errors = None
+        return syntax_errors
+
+    def record_syntax_error(
+        self, e: exception.PatternException, lines: List[str] | SourceLines
+    ):
+        try:
+            line = lines[e.line_num] if e.line_num is not None else ""
+        except IndexError:
+            line = ""
+        label = e.arg if isinstance(e.arg, str) else ""
+        location = self.get_source_location(line, e.line_num, label)
+        self.syntax_errors.append(
+            SyntaxErrorRecord(
+                location.file,
+                e.line_num,
+                location.column,
+                type(e).__name__,
+                e.message,
+            )
+        )
 
-    def execute_lts(self, lts: PseudoCompiledLTS | None = None, vars: List[str] = []):
+    def skip_error_block(
+        self,
+        e: exception.PatternException,
+        lines: SourceLines,
+        line_pointa: int,
+        indent: int,
+    ):
+        # 構文エラーを記録し、エラーとなったブロックの残りの行を読み飛ばす
+        self.record_syntax_error(e, lines)
+        block_patterns = [
+            self.else_pattern,
+            self.endif_pattern,
+            self.endwhile_pattern,
+            self.endfor_pattern,
+        ]
+        line_pointa += 1
+        while lines.has_line(line_pointa):
+            if lines.indent(line_pointa) > indent or any(
+                self.get_pattern_and_remain(pattern, lines[line_pointa])
+                for pattern in block_patterns
+            ):
+                line_pointa += 1
+                continue
+            break
+        return line_pointa
+
+    def get_source_location(self, line: str, line_num: int, label: str = ""):
+        column = line.find(label) if label != "" else -1
+        if column < 0:
+            column = len(line) - len(line.lstrip())
+        return SourceLocation(self.source_file, line_num, column)
+
+    def check_indent(self, depth: int, indent: int):
+        # トップレベルではインデントがないこと、ブロック内では必要な深さがあることを確認
+        if indent == 0:
+            return depth == 0
+        return depth >= indent
+
+    def execute_lts(
+        self,
+        lts: PseudoCompiledLTS | None = None,
+        vars: List[str] = [],
+        profiler: LineProfiler | None = None,
+        coverage: "CoverageCollector | None" = None,
+        memory: MemoryTracker | None = None,
+    ):
+        lts = self.start_execution(lts, vars, profiler, coverage, memory)
+        # 途中で実行を止めないため、連続する代入などはまとめて実行する
+        fuse_blocks = self.fuse_blocks
+        self.fuse_blocks = True
+        try:
+            while self.execute_line():
+                pass
+            return self.finish_execution(lts)
+        finally:
+            self.fuse_blocks = fuse_blocks
+            # 例外で中断した場合も、指定したプロファイラなどを外す
+            self.restore_collectors()
+
+    def start_execution(
+        self,
+        lts: PseudoCompiledLTS | None = None,
+        vars: List[str] = [],
+        profiler: LineProfiler | None = None,
+        coverage: "CoverageCollector | None" = None,
+        memory: MemoryTracker | None = None,
+    ):
+        # 引数を設定し、execute_lineで1遷移ずつ実行できる状態にする
         if lts is None:
             lts = self.lts
+        for func_name in list(self.pending_funcs):
+            if self.func_lts_map[func_name] is lts:
+                self.compile_func(func_name)
+        self.attach_collectors(profiler, coverage, memory)
         if len(lts.arg_list) != len(vars):
             raise exception.InvalidFuncCallException()
         for arg, arg_val in zip(lts.arg_list, vars):
             lts.name_val_map[arg] = arg_val
         self.init_execution(lts)
-        while self.execute_line():
-            pass
+        if self.coverage is not None:
+            # 呼び出されなかった関数も集計対象にする
+            self.compile_all_funcs()
+            for func_name in self.func_lts_map:
+                self.coverage.register(func_name, self.func_lts_map[func_name])
+        if self.memory is not None:
+            self.memory.start_run(self.func_lts_map.values())
+        return lts
+
+    def finish_execution(self, lts: PseudoCompiledLTS):
+        # 実行の集計を終了し、メイン関数の戻り値を返却する
+        if self.coverage is not None:
+            self.coverage.finish_run()
+        self.restore_collectors()
         if "メイン関数" in lts.func_results:
             return lts.func_results["メイン関数"]
         return None
 
+    def attach_collectors(
+        self,
+        profiler: LineProfiler | None = None,
+        coverage: "CoverageCollector | None" = None,
+        memory: MemoryTracker | None = None,
+    ):
+        # 引数で指定したプロファイラなどはこの実行の間のみ設定する
+        # 実行の終了時にrestore_collectorsで元に戻す
+        self.restore_collectors()
+        self.previous_collectors = (self.profiler, self.coverage, self.memory)
+        if profiler is not None:
+            self.profiler = profiler
+        if coverage is not None:
+            self.coverage = coverage
+        if memory is not None:
+            self.memory = memory
+
+    def restore_collectors(self):
+        # start_executionで指定したプロファイラなどを外し、実行前の状態に戻す
+        if self.previous_collectors is not None:
+            self.profiler, self.coverage, self.memory = self.previous_collectors
+            self.previous_collectors = None
+
     def execute_line(self, entry_func: str | None = None, vars: List[str] = []):
         # entry_funcが設定されていたら対応する関数を呼び出す準備をする
         if entry_func is not None:
+            self.compile_func(entry_func)
             init_state = self.func_lts_map[entry_func].init_state
             self.calling_stack.append(self.calling_func_state)
             self.calling_func_state = None
             self.calling_stack.append((entry_func, init_state))
             lts = self.func_lts_map[entry_func]
             for arg, arg_val in zip(lts.arg_list, vars):
-                lts.name_val_map[arg] = arg_val
+                self.assign_variable(lts, arg, arg_val)
             return True
         if len(self.calling_stack) == 0:
             return False
         func_name, state = self.calling_stack.pop()
         self.calling_func_state = (func_name, state)
         lts = self.func_lts_map[func_name]
-        print(
-            self.calling_stack,
-            self.calling_func_state,
-            lts.func_results,
-            lts.name_val_map,
-        )
-        state, val = self.fire_transition(state, lts)
+        if self.trace:
+            print(
+                self.calling_stack,
+                self.calling_func_state,
+                lts.func_results,
+                lts.name_val_map,
+            )
+        block = lts.get_block(state) if self.fuse_blocks else None
+        if self.fuse_blocks and self.vectorizer is not None:
+            # プロファイラ・網羅率は繰り返しごとに記録するため、まとめて実行しない
+            if self.profiler is None and self.coverage is None:
+                next_state = self.vectorizer.execute(self, lts, state)
+                if next_state is not None:
+                    self.calling_stack.append((func_name, next_state))
+                    return True
+        if block is not None:
+            state, val = self.execute_block(func_name, block, lts), None
+        else:
+            state, val = self.execute_transition(func_name, state, lts)
         if state is not None and self.calling_func_state is not None:
             self.calling_stack.append((func_name, state))
         else:
@@ -1456,6 +2176,74 @@ class Interpreter:
 
         return True
 
+    def execute_transition(self, func_name: str, state: str, lts: PseudoCompiledLTS):
+        source_state = state
+        try:
+            if self.profiler is None:
+                state, val = self.fire_transition(state, lts)
+            else:
+                start_time = time.perf_counter()
+                state, val = self.fire_transition(state, lts)
+                elapsed = time.perf_counter() - start_time
+                location = lts.get_source_location(source_state, self.fired_label)
+                self.profiler.record(
+                    self.calling_stack,
+                    func_name,
+                    self.fired_label,
+                    elapsed,
+                    hit=self.calling_func_state is not None,
+                    line_num=location.line_num if location is not None else None,
+                )
+        except exception.PatternException as e:
+            # 実行時の例外には遷移に対応するソースコード上の行番号を付与する
+            location = lts.get_source_location(source_state, self.fired_label)
+            if e.line_num is None and location is not None:
+                e.line_num = location.line_num
+            raise
+        if self.coverage is not None:
+            self.coverage.record(func_name, lts, source_state, self.fired_label)
+        return state, val
+
+    def execute_block(
+        self, func_name: str, block: List[BlockEntry], lts: PseudoCompiledLTS
+    ):
+        # 区間内の各文を実行し、区間の次の状態を返却する
+        # プロファイラ・網羅率・例外の行番号は区間内の各文の行ごとに記録する
+        for state, label, state_type, next_state in block:
+            self.fired_label = label
+            self.calling_func_state = (func_name, state)
+            if self.profiler is not None:
+                start_time = time.perf_counter()
+            try:
+                if state_type == StateType.ASSIGN:
+                    self.execute_var_assign(label, lts=lts)
+                elif state_type == StateType.DECLARE:
+                    self.execute_var_declare(label, lts)
+                else:
+                    self.interpret_arithmetic_formula(label, lts=lts)
+            except exception.PatternException as e:
+                location = lts.get_source_location(state, label)
+                if e.line_num is None and location is not None:
+                    e.line_num = location.line_num
+                raise
+            if self.profiler is not None:
+                elapsed = time.perf_counter() - start_time
+                location = lts.get_source_location(state, label)
+                self.profiler.record(
+                    self.calling_stack,
+                    func_name,
+                    label,
+                    elapsed,
+                    hit=self.calling_func_state is not None,
+                    line_num=location.line_num if location is not None else None,
+                )
+            if self.coverage is not None:
+                self.coverage.record(func_name, lts, state, label)
+            if self.calling_func_state is None:
+                # 関数の呼び出しを開始した場合は、戻った後にこの文から1遷移ずつ再開する
+                return next_state
+        return next_state
+
     def is_ended(self):
         return len(self.calling_stack) == 0
 
@@ -1469,10 +2257,12 @@ class Interpreter:
     def fire_transition(self, state: str, lts: PseudoCompiledLTS):
         # 基本的に最初の遷移ラベルは使うのでここで取得してしまう
         label = lts.get_transition_label(state)
+        self.fired_label = label
         val = None
-        if lts.get_state_type(state) in [StateType.IF, StateType.WHILE]:
+        state_type = lts.get_state_type(state)
+        if state_type in [StateType.IF, StateType.WHILE]:
             return self.get_transition_on_condition_state(state, lts)
-        if lts.get_state_type(state) == StateType.FOR:
+        if state_type == StateType.FOR:
             name, from_val, to_val, increment_val = self.process_for_sentence(
                 label, lts=lts
             )
@@ -1483,33 +2273,33 @@ class Interpreter:
             else:
                 lts.name_val_map[name] = None
                 label = "endfor"
-        if lts.get_state_type(state) == StateType.DECLARE:
-            self.interpret_var_declare(label, lts=lts)
-        if lts.get_state_type(state) == StateType.ASSIGN:
-            self.interpret_var_assign(label, lts=lts)
-        if lts.get_state_type(state) == StateType.FORMULA:
+                self.fired_label = label
+        if state_type == StateType.DECLARE:
+            self.execute_var_declare(label, lts)
+        if state_type == StateType.ASSIGN:
+            self.execute_var_assign(label, lts=lts)
+        if state_type == StateType.FORMULA:
             self.interpret_arithmetic_formula(label, lts=lts)
-        if lts.get_state_type(state) == StateType.RETURN:
-            val = None
-            res = self.interpret_return(label, lts=lts)
-            if res:
-                val = res[0]
-            return None, val
+        if state_type == StateType.RETURN:
+            return None, self.execute_return(label, lts)
         return lts.get_transition_state(state, label), val
 
     def get_transition_on_condition_state(self, state: str, lts: PseudoCompiledLTS):
         label_index = 0
         label = lts.get_transition_label(state, index=label_index)
+        self.fired_label = label
         val, _ = self.interpret_arithmetic_formula(label, lts=lts)
         while not val:
             label_index += 1
             label = lts.get_transition_label(state, index=label_index)
+            self.fired_label = label
             if label in ["else", "endwhile"]:
                 break
             val, _ = self.interpret_arithmetic_formula(label, lts=lts)
         return lts.get_transition_state(state, label), val
 
     def get_lts_dict(self):
+        self.compile_all_funcs()
         lts_dict = {}
         for lts in self.func_lts_map:
             lts_dict[lts] = self.func_lts_map[lts].get_lts_as_dict()
@@ -1519,10 +2309,21 @@ class Interpreter:
     def get_execution_dict(self):
         execution_dict = {
             "LTS": self.get_lts_dict(),
-            "calling_stack": self.calling_stack,
+            "calling_stack": self.get_calling_stack_names(),
         }
         return execution_dict
 
+    def get_calling_stack_names(self):
+        # 保存する呼び出し履歴。プログラムイメージの状態番号は状態名に変換する
+        return [
+            (
+                frame
+                if frame is None
+                else (frame[0], self.func_lts_map[frame[0]].get_state_name(frame[1]))
+            )
+            for frame in self.calling_stack
+        ]
+
     def set_lts_dict(self, execution_dict):
         self.calling_stack = execution_dict["calling_stack"]
         lts_dict = execution_dict["LTS"]
@@ -0,0 +1,189 @@
+from typing import Dict, FrozenSet, List, NamedTuple, Set, Tuple
+
+from src import exception
+from src.lts.lts import LabeledTransitionSystem
+
+
+class Loop(NamedTuple):
+    # ループの先頭の状態(ループ内の全ての状態を支配する)
+    header: str
+    # ループに含まれる状態(先頭の状態を含む)
+    states: FrozenSet[str]
+    # ループの先頭へ戻る遷移の(遷移元の状態, ラベル)
+    back_edges: Tuple[Tuple[str, str], ...]
+    # 外側のループの先頭の状態。最も外側のループの場合はNone
+    parent: str | None
+    # 入れ子の深さ。最も外側のループは1
+    depth: int
+
+
+class LtsAnalysis:
+    """LTSの到達可能性・支配木・ループの入れ子・不要な状態を1度に解析した結果。
+
+    初期状態から到達できる状態を逆後順に並べ、支配木はCooper-Harvey-Kennedyの
+    反復法で求める。ループは先頭の状態が遷移元を支配する後退辺から求める。
+    """
+
+    def __init__(self, lts: LabeledTransitionSystem):
+        self.init_state = lts.get_init_state()
+        # 初期状態から到達できる状態の逆後順
+        self.order = self.get_reverse_postorder(lts)
+        self.reachable_states: Set[str] = set(self.order)
+        self.unreachable_states: Set[str] = set(lts.transitions) - self.reachable_states
+        # 遷移を持たない状態(実行の終了)へ到達できる状態を逆方向の遷移から求める
+        self.final_states: Set[str] = {
+            state for state, targets in lts.transitions.items() if len(targets) == 0
+        }
+        self.terminating_states = self.get_backward_reachable(lts, self.final_states)
+        # 到達できるが、終了の状態へは到達できない状態
+        self.dead_states: Set[str] = self.reachable_states - self.terminating_states
+        self.idom = self.get_immediate_dominators(lts)
+        self.set_dominator_tree_order()
+        self.loops = self.find_loops(lts)
+        # 状態 -> その状態を含む最も内側のループの先頭の状態
+        self.loop_map: Dict[str, str] = {}
+        for loop in sorted(self.loops.values(), key=lambda loop: loop.depth):
+            for state in loop.states:
+                self.loop_map[state] = loop.header
+
+    def get_reverse_postorder(self, lts: LabeledTransitionSystem):
+        visited = {self.init_state}
+        postorder = []
+        stack = [(self.init_state, iter(lts.transitions[self.init_state].values()))]
+        while len(stack) > 0:
+            state, targets = stack[-1]
+            for target in targets:
+                if target not in visited:
+                    visited.add(target)
+                    stack.append((target, iter(lts.transitions[target].values())))
+                    break
+            else:
+                stack.pop()
+                postorder.append(state)
+        postorder.reverse()
+        return postorder
+
+    def get_backward_reachable(self, lts: LabeledTransitionSystem, states: Set[str]):
+        reached = set(states)
+        stack = list(states)
+        while len(stack) > 0:
+            for _, source in lts.backwards[stack.pop()]:
+                if source not in reached:
+                    reached.add(source)
+                    stack.append(source)
+        return reached
+
+    def get_immediate_dominators(self, lts: LabeledTransitionSystem):
+        index = {state: idx for idx, state in enumerate(self.order)}
+        idom = {self.init_state: self.init_state}
+
+        def intersect(state1: str, state2: str):
+            while state1 != state2:
+                while index[state1] > index[state2]:
+                    state1 = idom[state1]
+                while index[state2] > index[state1]:
+                    state2 = idom[state2]
+            return state1
+
+        changed = True
+        while changed:
+            changed = False
+            for state in self.order[1:]:
+                new_idom = None
+                for _, source in lts.backwards[state]:
+                    # 到達できない状態や未処理の状態からの遷移は無視する
+                    if source not in idom:
+                        continue
+                    if new_idom is None:
+                        new_idom = source
+                    else:
+                        new_idom = intersect(source, new_idom)
+                if idom.get(state) != new_idom:
+                    idom[state] = new_idom
+                    changed = True
+        # 初期状態は自身を直接の支配者としないようにする
+        idom[self.init_state] = None
+        return idom
+
+    def set_dominator_tree_order(self):
+        # 支配木の行きがけ順・帰りがけ順の番号で支配関係を定数時間で判定する
+        children: Dict[str, List[str]] = {state: [] for state in self.order}
+        for state in self.order[1:]:
+            children[self.idom[state]].append(state)
+        self.preorder: Dict[str, int] = {}
+        self.postorder: Dict[str, int] = {}
+        stack = [(self.init_state, iter(children[self.init_state]))]
+        self.preorder[self.init_state] = 0
+        while len(stack) > 0:
+            state, remain = stack[-1]
+            child = next(remain, None)
+            if child is None:
+                stack.pop()
+                self.postorder[state] = len(self.postorder)
+            else:
+                self.preorder[child] = len(self.preorder)
+                stack.append((child, iter(children[child])))
+
+    def find_loops(self, lts: LabeledTransitionSystem):
+        back_edges: Dict[str, List[Tuple[str, str]]] = {}
+        for source in self.order:
+            for label, target in lts.transitions[source].items():
+                if self.dominates(target, source):
+                    back_edges.setdefault(target, []).append((source, label))
+        # 後退辺の遷移元から先頭の状態まで逆方向にたどった状態をループとする
+        bodies: Dict[str, Set[str]] = {}
+        for header, edges in back_edges.items():
+            body = {header}
+            stack = [source for source, _ in edges if source != header]
+            body.update(stack)
+            while len(stack) > 0:
+                for _, source in lts.backwards[stack.pop()]:
+                    if source not in body and source in self.reachable_states:
+                        body.add(source)
+                        stack.append(source)
+            bodies[header] = body
+        # 大きいループから順に、先頭の状態を含む最も内側のループを外側のループとする
+        loops: Dict[str, Loop] = {}
+        innermost: Dict[str, str] = {}
+        for header in sorted(bodies, key=lambda header: -len(bodies[header])):
+            parent = innermost.get(header)
+            depth = loops[parent].depth + 1 if parent is not None else 1
+            loops[header] = Loop(
+                header,
+                frozenset(bodies[header]),
+                tuple(back_edges[header]),
+                parent,
+                depth,
+            )
+            for state in bodies[header]:
+                innermost[state] = header
+        return loops
+
+    def dominates(self, dominator: str, state: str):
+        if dominator not in self.preorder or state not in self.preorder:
+            return False
+        return (
+            self.preorder[dominator] <= self.preorder[state]
+            and self.postorder[state] <= self.postorder[dominator]
+        )
+
+    def get_immediate_dominator(self, state: str):
+        if state not in self.idom:
+            raise exception.DoesNotExistException(state)
+        return self.idom[state]
+
+    def get_loop(self, state: str):
+        # 状態を含む最も内側のループ。ループに含まれない場合はNone
+        header = self.loop_map.get(state)
+        return self.loops[header] if header is not None else None
+
+    def get_loop_depth(self, state: str):
+        loop = self.get_loop(state)
+        return loop.depth if loop is not None else 0
+
+
+def get_analysis(lts: LabeledTransitionSystem):
+    # 遷移が変更されるまでは解析結果をLTSに保持して再利用する
+    if lts.analysis is None:
+        lts.analysis = LtsAnalysis(lts)
+    return lts.analysis
@@ -12,6 +12,8 @@ class LabeledTransitionSystem:
         self.transitions: Dict[str, Dict[str, str]] = {init_state: {}}
         self.backwards: Dict[str, Set[Tuple[str, str]]] = {init_state: set()}
         self.init_state = init_state
+        # src.lts.analysisによる解析結果。遷移が変更された時点で破棄する
+        self.analysis = None
 
     def get_init_state(self):
         return self.init_state
@@ -24,6 +26,7 @@ class LabeledTransitionSystem:
             name = f"S{num}"
         self.transitions[name] = {}
         self.backwards[name] = set()
+        self.analysis = None
         return name
 
     def add_transition(self, source: str, label: str, target: str):
@@ -36,6 +39,7 @@ class LabeledTransitionSystem:
 
         self.transitions[source][label] = target
         self.backwards[target].add((label, source))
+        self.analysis = None
 
     def clear_transition(self, source: str):
         if source not in self.transitions:
@@ -44,6 +48,7 @@ class LabeledTransitionSystem:
             target = self.transitions[source][label]
             self.backwards[target].remove((label, source))
         self.transitions[source] = {}
+        self.analysis = None
 
     def get_transition_state(self, source: str, label: str):
         if source not in self.transitions:
@@ -76,15 +81,36 @@ class LabeledTransitionSystem:
         return lts_str
 
     def get_lts_as_dict(self):
-        lts_dict = {"init_state": self.init_state, "states": {}}
-        for state in self.transitions:
-            lts_dict["states"][state] = {}
-            for label in self.transitions[state]:
-                lts_dict["states"][state][label] = self.transitions[state][label]
-        return lts_dict
+        # 返却した辞書を変更しても保持している遷移が変わらないよう、状態ごとに複製する
+        states = {state: dict(targets) for state, targets in self.transitions.items()}
+        return {"init_state": self.init_state, "states": states}
 
     def set_lts_as_dict(self, lts_dict):
+        # 遷移・逆方向の遷移・ラベルを1度の走査でまとめて構築し、最後に検証する
+        # 読み込み元のLTSと遷移を共有しないよう、状態ごとの辞書は複製して保持する
+        transitions: Dict[str, Dict[str, str]] = {
+            state: dict(targets) for state, targets in lts_dict["states"].items()
+        }
+        backwards: Dict[str, Set[Tuple[str, str]]] = {}
+        labels: Set[str] = set()
+        for source, targets in transitions.items():
+            labels.update(targets)
+            for label, target in targets.items():
+                if target in backwards:
+                    backwards[target].add((label, source))
+                else:
+                    backwards[target] = {(label, source)}
+        # 遷移先のみに現れる状態と、遷移元とならない状態を補完する
+        for state in backwards:
+            if state not in transitions:
+                transitions[state] = {}
+        for state in transitions:
+            if state not in backwards:
+                backwards[state] = set()
+        if lts_dict["init_state"] not in transitions:
+            raise exception.DoesNotExistException(lts_dict["init_state"])
         self.init_state = lts_dict["init_state"]
-        for source in lts_dict["states"]:
-            for label in lts_dict["states"][source]:
-                self.add_transition(source, label, lts_dict["states"][source][label])
+        self.transitions = transitions
+        self.backwards = backwards
+        self.labels = labels
+        self.analysis = None
@@ -0,0 +1,94 @@
+import sys
+from typing import Dict, Iterable, List, Tuple
+
+from src import exception
+
+# 配列の要素1つ分の参照の大きさ
+POINTER_SIZE = 8
+
+
+def estimate_size(val):
+    # 変数の値のおおよそのバイト数。配列は要素の大きさを再帰的に合計する
+    if type(val) is list:
+        return sys.getsizeof(val) + sum(estimate_size(element) for element in val)
+    return sys.getsizeof(val)
+
+
+class MemoryTracker:
+    """疑似コードの変数が使用するメモリのおおよその量と、その最大値を集計する。
+
+    代入された変数のみ大きさを求め直し、配列への追加や要素への代入は差分のみを
+    加算するため、集計の手間は変数の値の大きさに依存しない。
+    b←aや関数の引数のように複数の変数が同じ配列を参照する場合は、配列を1度だけ
+    数える。配列の要素として代入した配列は、参照元の配列とは別に数える。
+    上限を超えた時点でMemoryLimitExceededExceptionを発生させて実行を中断する。
+    """
+
+    def __init__(self, limit: int | None = None):
+        # 変数の合計の上限(バイト)。Noneの場合は上限を設けない
+        self.limit = limit
+        # (id(LTS), 変数名) -> 配列以外の値の大きさ
+        self.sizes: Dict[Tuple[int, str], int] = {}
+        # (id(LTS), 変数名) -> 変数が参照する配列のid
+        self.bindings: Dict[Tuple[int, str], int] = {}
+        # 配列のid -> [参照している変数の数, 大きさ]
+        self.arrays: Dict[int, List[int]] = {}
+        self.total = 0
+        self.peak = 0
+
+    def start_run(self, lts_list: Iterable):
+        # 実行開始時点の全ての関数の変数を集計し直す
+        self.sizes.clear()
+        self.bindings.clear()
+        self.arrays.clear()
+        self.total = 0
+        self.peak = 0
+        for lts in lts_list:
+            for name in lts.name_val_map:
+                self.update(lts, name)
+
+    def update(self, lts, name: str):
+        # 変数に値が代入された場合に、その変数の大きさを求め直す
+        key = (id(lts), name)
+        val = lts.name_val_map.get(name)
+        delta = -self.sizes.pop(key, 0)
+        array_id = self.bindings.pop(key, None)
+        if array_id is not None:
+            array = self.arrays[array_id]
+            array[0] -= 1
+            if array[0] == 0:
+                delta -= array[1]
+                del self.arrays[array_id]
+        if type(val) is list:
+            self.bindings[key] = id(val)
+            if id(val) in self.arrays:
+                # 他の変数が参照している配列は既に数えている
+                self.arrays[id(val)][0] += 1
+            else:
+                size = estimate_size(val)
+                self.arrays[id(val)] = [1, size]
+                delta += size
+        else:
+            self.sizes[key] = estimate_size(val)
+            delta += self.sizes[key]
+        self.add(delta)
+
+    def add(self, delta: int):
+        self.total += delta
+        if self.total > self.peak:
+            self.peak = self.total
+        if self.limit is not None and self.total > self.limit:
+            raise exception.MemoryLimitExceededException(self.limit)
+
+    def add_to_array(self, lts, name: str, delta: int):
+        # 配列への追加・要素への代入による大きさの差分を、変数が参照する配列に加算する
+        array_id = self.bindings.get((id(lts), name))
+        if array_id is not None:
+            self.arrays[array_id][1] += delta
+        self.add(delta)
+
+    def append(self, lts, name: str, val):
+        self.add_to_array(lts, name, POINTER_SIZE + estimate_size(val))
+
+    def replace(self, lts, name: str, old, new):
+        self.add_to_array(lts, name, estimate_size(new) - estimate_size(old))
@@ -0,0 +1,136 @@
+import copy
+from typing import Dict, List
+
+from src.interpreter import Interpreter, PseudoCompiledLTS, StateType
+from src.lts.analysis import get_analysis
+
+
+def is_epsilon_state(lts: PseudoCompiledLTS, state: str):
+    # endif・endwhile・doやループの戻り("")のように、処理を行わずに
+    # 1つの遷移先へ進むだけの状態
+    return (
+        lts.get_state_type(state) == StateType.UNDEFINED
+        and len(lts.transitions[state]) == 1
+    )
+
+
+def get_epsilon_target(lts: PseudoCompiledLTS, state: str, cache: Dict[str, str]):
+    # 処理を行わない状態をたどり、最初に処理を行う状態を返却する
+    path = []
+    visited = set()
+    while state not in cache and is_epsilon_state(lts, state):
+        if state in visited:
+            # 処理を行わない状態のみの無限ループはそのまま残す
+            break
+        visited.add(state)
+        path.append(state)
+        state = next(iter(lts.transitions[state].values()))
+    target = cache.get(state, state)
+    for source in path:
+        cache[source] = target
+    return target
+
+
+def remove_epsilon_states(lts: PseudoCompiledLTS):
+    # 遷移先が処理を行わない状態の場合は、その先の状態へ直接遷移させる
+    cache: Dict[str, str] = {}
+    removed = PseudoCompiledLTS(get_epsilon_target(lts, lts.init_state, cache))
+    for state in lts.transitions:
+        if state != removed.init_state:
+            removed.create_state(state)
+        removed.set_state_type(state, lts.get_state_type(state))
+    for source, targets in lts.transitions.items():
+        for label, target in targets.items():
+            removed.add_transition(
+                source,
+                label,
+                get_epsilon_target(lts, target, cache),
+                lts.get_source_location(source, label),
+            )
+    return removed
+
+
+def get_equivalent_blocks(lts: PseudoCompiledLTS, states: List[str]):
+    # 状態の種別と遷移ラベルの並びで分割し、遷移先の分割が一致するまで細分化する
+    # 同じブロックの状態は、以降の実行で同じラベルの遷移を同じ順序で発火する
+    signatures = {
+        state: (lts.get_state_type(state), tuple(lts.transitions[state]))
+        for state in states
+    }
+    block_count = 0
+    while True:
+        numbers: Dict[tuple, int] = {}
+        blocks = {
+            state: numbers.setdefault(signatures[state], len(numbers))
+            for state in states
+        }
+        if len(numbers) == block_count:
+            return blocks
+        block_count = len(numbers)
+        signatures = {
+            state: (
+                blocks[state],
+                tuple(blocks[target] for target in lts.transitions[state].values()),
+            )
+            for state in states
+        }
+
+
+def optimize_lts(lts: PseudoCompiledLTS):
+    """処理を行わない状態を除去し、等価な状態を統合したLTSを作成する。
+
+    変数の値の変化の順序は元のLTSと同じで、1回の実行で発火する遷移数のみが減る。
+    統合された状態の遷移の位置情報は、代表とした状態のものを用いる。
+    """
+    removed = remove_epsilon_states(lts)
+    order = get_analysis(removed).order
+    blocks = get_equivalent_blocks(removed, order)
+    # ブロックの代表は到達順で最初の状態とし、初期状態は必ず代表となる
+    representatives: Dict[int, str] = {}
+    for state in order:
+        representatives.setdefault(blocks[state], state)
+    optimized = PseudoCompiledLTS(removed.init_state)
+    for state in representatives.values():
+        if state != optimized.init_state:
+            optimized.create_state(state)
+        optimized.set_state_type(state, removed.get_state_type(state))
+    for source in representatives.values():
+        for label, target in removed.transitions[source].items():
+            optimized.add_transition(
+                source,
+                label,
+                representatives[blocks[target]],
+                removed.get_source_location(source, label),
+            )
+    optimized.arg_list = list(lts.arg_list)
+    optimized.name_type_map = dict(lts.name_type_map)
+    optimized.name_val_map = copy.deepcopy(lts.name_val_map)
+    optimized.func_results = dict(lts.func_results)
+    return optimized
+
+
+def count_lts(lts: PseudoCompiledLTS):
+    # (状態数, 遷移数)
+    return (
+        len(lts.transitions),
+        sum(len(targets) for targets in lts.transitions.values()),
+    )
+
+
+def optimize_interpreter(interpreter: Interpreter):
+    # 全ての関数をコンパイルし、メイン処理と各関数のLTSを最適化したものに置き換える
+    # 関数名 -> (最適化前の(状態数, 遷移数), 最適化後の(状態数, 遷移数))を返却する
+    interpreter.compile_all_funcs()
+    stats = {}
+    optimized_map: Dict[int, PseudoCompiledLTS] = {}
+    funcs = [("メイン関数", interpreter.lts)] + list(interpreter.func_lts_map.items())
+    for func_name, lts in funcs:
+        # 同じLTSが別名で登録されている場合も1度だけ最適化する
+        if id(lts) not in optimized_map:
+            optimized_map[id(lts)] = optimize_lts(lts)
+        optimized = optimized_map[id(lts)]
+        stats[func_name] = (count_lts(lts), count_lts(optimized))
+        if func_name in interpreter.func_lts_map:
+            interpreter.func_lts_map[func_name] = optimized
+    interpreter.lts = optimized_map[id(interpreter.lts)]
+    return stats
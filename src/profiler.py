@@ -0,0 +1,108 @@
+import json
+from typing import Dict, List, TextIO, Tuple
+
+
+class LineProfiler:
+    """疑似コードの行単位・関数単位の実行回数と累積時間を計測する。"""
+
+    def __init__(self):
+        # (関数名, 行番号, 行) -> [実行回数, 累積時間]
+        self.line_stats: Dict[Tuple[str, int | None, str], List[int | float]] = {}
+        # 関数名 -> [実行回数, 累積時間]
+        self.func_stats: Dict[str, List[int | float]] = {}
+        # 呼び出し関数を";"で連結したスタック -> 累積時間
+        self.stack_stats: Dict[str, float] = {}
+        self.total_time = 0.0
+
+    def record(
+        self,
+        calling_stack: List[Tuple[str, str]],
+        func_name: str,
+        line: str,
+        elapsed: float,
+        hit: bool = True,
+        line_num: int | None = None,
+    ):
+        # 関数呼び出しで中断された行は再実行されるため、時間のみ加算する
+        hit_count = 1 if hit else 0
+        # 同一内容の行も行番号で区別する
+        key = (func_name, line_num, line)
+        if key not in self.line_stats:
+            self.line_stats[key] = [0, 0.0]
+        self.line_stats[key][0] += hit_count
+        self.line_stats[key][1] += elapsed
+        if func_name not in self.func_stats:
+            self.func_stats[func_name] = [0, 0.0]
+        self.func_stats[func_name][0] += hit_count
+        self.func_stats[func_name][1] += elapsed
+        frames = [frame[0] for frame in calling_stack if frame is not None]
+        frames += [func_name, line]
+        stack = ";".join(frame.replace(";", ",") for frame in frames)
+        self.stack_stats[stack] = self.stack_stats.get(stack, 0.0) + elapsed
+        self.total_time += elapsed
+
+    def clear(self):
+        self.line_stats.clear()
+        self.func_stats.clear()
+        self.stack_stats.clear()
+        self.total_time = 0.0
+
+    def get_percentage(self, elapsed: float):
+        if self.total_time == 0:
+            return 0.0
+        return elapsed / self.total_time * 100
+
+    def get_report(self):
+        report = {"total_time": self.total_time, "functions": {}}
+        for func_name, (hits, elapsed) in self.func_stats.items():
+            report["functions"][func_name] = {
+                "hits": hits,
+                "time": elapsed,
+                "percentage": self.get_percentage(elapsed),
+                "lines": [],
+            }
+        for (func_name, line_num, line), (hits, elapsed) in self.line_stats.items():
+            report["functions"][func_name]["lines"].append(
+                {
+                    "line_num": line_num + 1 if line_num is not None else None,
+                    "line": line,
+                    "hits": hits,
+                    "time": elapsed,
+                    "percentage": self.get_percentage(elapsed),
+                }
+            )
+        return report
+
+    def format_listing(self):
+        listing = ""
+        for func_name, func_report in self.get_report()["functions"].items():
+            listing += (
+                f"関数：{func_name} 実行回数：{func_report['hits']} "
+                f"時間：{func_report['time']:.6f}秒 "
+                f"({func_report['percentage']:.2f}%)\n"
+            )
+            listing += (
+                f"{'行番号':>6} {'実行回数':>8} {'時間(秒)':>12} {'割合(%)':>8}  行\n"
+            )
+            for line_report in sorted(
+                func_report["lines"],
+                key=lambda line_report: line_report["line_num"] or 0,
+            ):
+                line_num = line_report["line_num"] or "-"
+                listing += (
+                    f"{line_num:>6} {line_report['hits']:>8} "
+                    f"{line_report['time']:>12.6f} "
+                    f"{line_report['percentage']:>8.2f}  {line_report['line']}\n"
+                )
+        return listing
+
+    def print_listing(self):
+        print(self.format_listing(), end="")
+
+    def dump_json(self, f: TextIO):
+        json.dump(self.get_report(), f, indent=4, ensure_ascii=False)
+
+    def dump_folded(self, f: TextIO):
+        # flamegraph.pl等で扱えるようにマイクロ秒単位の整数で出力する
+        for stack, elapsed in self.stack_stats.items():
+            f.write(f"{stack} {int(elapsed * 1000000)}\n")
@@ -0,0 +1,316 @@
+import hashlib
+import inspect
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from src import exception
+from src.image import ProgramImage, attach_image
+from src.memory import MemoryTracker
+from src.session import SessionPool
+
+# JSON-RPC 2.0のエラーコード
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+EXECUTION_ERROR = -32000
+SERVER_BUSY = -32001
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str, data=None):
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class ExecutionService:
+    """コンパイル済みプログラムとセッションを保持し、JSON-RPCの各メソッドを処理する。
+
+    同じソースコードは1度だけコンパイルしてプログラムイメージとして再利用し、
+    セッションはイメージを参照して変数領域のみを個別に保持する。
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_programs: int = 128,
+        max_steps: int = 1000000,
+        pool: SessionPool | None = None,
+        memory_limit: int | None = None,
+    ):
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        # 保持するコンパイル済みプログラムの最大数
+        self.max_programs = max_programs
+        # 1回のrun・stepで実行する遷移数の上限
+        self.max_steps = max_steps
+        # 1セッションで変数が使用するメモリの上限(バイト)。Noneの場合は集計しない
+        self.memory_limit = memory_limit
+        self.pool = pool if pool is not None else SessionPool(trace=False)
+        self.programs: Dict[str, ProgramImage] = {}
+        # セッションID -> プログラムID
+        self.session_programs: Dict[str, str] = {}
+        self.session_locks: Dict[str, threading.Lock] = {}
+        self.lock = threading.Lock()
+        self.methods = {
+            "compile": self.compile,
+            "run": self.run,
+            "start": self.start,
+            "step": self.step,
+            "snapshot": self.snapshot,
+            "restore": self.restore,
+            "close": self.close,
+        }
+
+    def handle(self, request):
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or "method" not in request:
+                raise RpcError(INVALID_REQUEST, "リクエストの形式が不正です。")
+            if request["method"] not in self.methods:
+                raise RpcError(
+                    METHOD_NOT_FOUND, f"[{request['method']}]は存在しません。"
+                )
+            method = self.methods[request["method"]]
+            params = request.get("params", {})
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, "paramsは名前付きで指定してください。")
+            try:
+                inspect.signature(method).bind(**params)
+            except TypeError as e:
+                raise RpcError(INVALID_PARAMS, str(e))
+            # 同時に処理するリクエスト数を制限する
+            if not self.semaphore.acquire(timeout=1.0):
+                raise RpcError(SERVER_BUSY, "処理中のリクエストが多すぎます。")
+            try:
+                for session_id in self.pool.evict_idle():
+                    self.forget_session(session_id)
+                result = method(**params)
+            finally:
+                self.semaphore.release()
+        except RpcError as e:
+            return {
+                "jsonrpc": "2.0",
+                "error": {"code": e.code, "message": e.message, "data": e.data},
+                "id": request_id,
+            }
+        except Exception as e:
+            # 疑似コードの実行時エラーも含め、例外の種別とともに返却する
+            return {
+                "jsonrpc": "2.0",
+                "error": {
+                    "code": EXECUTION_ERROR,
+                    "message": str(e),
+                    "data": {"type": type(e).__name__},
+                },
+                "id": request_id,
+            }
+        return {"jsonrpc": "2.0", "result": result, "id": request_id}
+
+    def get_program(self, program_id: str):
+        with self.lock:
+            if program_id not in self.programs:
+                raise RpcError(
+                    INVALID_PARAMS, f"プログラム[{program_id}]は存在しません。"
+                )
+            return self.programs[program_id]
+
+    def compile(self, source: str, file: str | None = None):
+        program_id = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+        with self.lock:
+            if program_id in self.programs:
+                return {"program_id": program_id}
+        session_id = self.pool.create_session()
+        try:
+            interpreter = self.pool.get_interpreter(session_id)
+            try:
+                interpreter.interpret_source(source, file=file)
+            except exception.PatternException:
+                # コンパイルできない場合は全ての構文エラーを返却する
+                interpreter.reset()
+                errors = interpreter.check_syntax(
+                    source.splitlines(keepends=True), file=file
+                )
+                raise RpcError(
+                    EXECUTION_ERROR,
+                    "コンパイルに失敗しました。",
+                    [error._asdict() for error in errors],
+                )
+            image = ProgramImage.build(interpreter)
+        finally:
+            self.pool.release_session(session_id)
+        with self.lock:
+            if len(self.programs) >= self.max_programs:
+                # 最も古く登録されたプログラムを破棄する
+                del self.programs[next(iter(self.programs))]
+            self.programs[program_id] = image
+        return {"program_id": program_id}
+
+    def create_session(self, program_id: str):
+        image = self.get_program(program_id)
+        session_id = self.pool.create_session()
+        attach_image(self.pool.get_interpreter(session_id), image)
+        with self.lock:
+            self.session_programs[session_id] = program_id
+            self.session_locks[session_id] = threading.Lock()
+        return session_id
+
+    def get_session_lock(self, session_id: str):
+        with self.lock:
+            if session_id not in self.session_locks:
+                raise exception.SessionDoesNotExistException(session_id)
+            return self.session_locks[session_id]
+
+    def start_execution(self, session_id: str, vars: List):
+        memory = None
+        if self.memory_limit is not None:
+            memory = MemoryTracker(self.memory_limit)
+        self.pool.get_interpreter(session_id).start_execution(vars=vars, memory=memory)
+
+    def execute_steps(self, session_id: str, count: int):
+        interpreter = self.pool.get_interpreter(session_id)
+        steps = 0
+        while steps < count and interpreter.execute_line():
+            steps += 1
+        state = {
+            "steps": steps,
+            "ended": interpreter.is_ended(),
+            "calling_stack": interpreter.calling_stack,
+        }
+        if interpreter.memory is not None:
+            # 実行の終了時に集計が外されるため、先に最大値を取得する
+            state["peak_memory"] = interpreter.memory.peak
+        if interpreter.is_ended():
+            state["result"] = interpreter.finish_execution(interpreter.lts)
+        return state
+
+    def run(self, program_id: str, vars: List = [], max_steps: int | None = None):
+        session_id = self.create_session(program_id)
+        try:
+            with self.pool.use(session_id):
+                self.start_execution(session_id, vars)
+                # 指定された遷移数もサーバの上限を超えないようにする
+                count = min(max_steps or self.max_steps, self.max_steps)
+                state = self.execute_steps(session_id, count)
+                state["frames"] = self.get_frames(session_id)
+                return state
+        finally:
+            self.close(session_id)
+
+    def start(self, program_id: str, vars: List = []):
+        session_id = self.create_session(program_id)
+        self.start_execution(session_id, vars)
+        return {"session_id": session_id}
+
+    def step(self, session_id: str, count: int = 1):
+        # 実行中のセッションはevict_idleで解放されないようにする
+        with self.get_session_lock(session_id), self.pool.use(session_id):
+            state = self.execute_steps(session_id, min(count, self.max_steps))
+            state["frames"] = self.get_frames(session_id)
+            return state
+
+    def get_frames(self, session_id: str):
+        interpreter = self.pool.get_interpreter(session_id)
+        return {
+            func_name: {
+                "name_val_map": lts.name_val_map,
+                "name_type_map": lts.name_type_map,
+                "func_results": lts.func_results,
+            }
+            for func_name, lts in interpreter.func_lts_map.items()
+        }
+
+    def snapshot(self, session_id: str):
+        with self.get_session_lock(session_id), self.pool.use(session_id):
+            return {
+                "program_id": self.session_programs[session_id],
+                "calling_stack": self.pool.get_interpreter(session_id).calling_stack,
+                "frames": self.get_frames(session_id),
+            }
+
+    def restore(self, snapshot: Dict):
+        session_id = self.create_session(snapshot["program_id"])
+        interpreter = self.pool.get_interpreter(session_id)
+        for func_name, frame in snapshot["frames"].items():
+            lts = interpreter.func_lts_map[func_name]
+            lts.name_val_map = frame["name_val_map"]
+            lts.name_type_map = frame["name_type_map"]
+            lts.func_results = frame["func_results"]
+        interpreter.calling_stack = [
+            tuple(frame) if frame is not None else None
+            for frame in snapshot["calling_stack"]
+        ]
+        if self.memory_limit is not None:
+            # 復元した変数の値から集計を再開し、実行の終了時に外す
+            memory = MemoryTracker(self.memory_limit)
+            interpreter.attach_collectors(memory=memory)
+            memory.start_run(interpreter.func_lts_map.values())
+        return {"session_id": session_id}
+
+    def forget_session(self, session_id: str):
+        with self.lock:
+            self.session_programs.pop(session_id, None)
+            self.session_locks.pop(session_id, None)
+
+    def close(self, session_id: str):
+        self.pool.release_session(session_id)
+        self.forget_session(session_id)
+        return {"session_id": session_id}
+
+
+class RpcRequestHandler(BaseHTTPRequestHandler):
+    service: ExecutionService
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length))
+        except ValueError:
+            response = {
+                "jsonrpc": "2.0",
+                "error": {
+                    "code": PARSE_ERROR,
+                    "message": "JSONとして解釈できません。",
+                    "data": None,
+                },
+                "id": None,
+            }
+        else:
+            response = self.service.handle(request)
+        body = json.dumps(response, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def create_server(
+    host: str = "127.0.0.1", port: int = 8000, service: ExecutionService | None = None
+):
+    if service is None:
+        service = ExecutionService()
+    handler = type("Handler", (RpcRequestHandler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    max_concurrency: int = 8,
+    memory_limit: int | None = None,
+):
+    server = create_server(
+        host,
+        port,
+        ExecutionService(max_concurrency=max_concurrency, memory_limit=memory_limit),
+    )
+    print(f"http://{host}:{server.server_address[1]} で待ち受けています。")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,115 @@
+import contextlib
+import threading
+import time
+import uuid
+from typing import Dict, List
+
+from src import exception
+from src.interpreter import Interpreter
+
+
+class Session:
+    """SessionPoolが貸し出した1つのInterpreterと最終利用時刻。"""
+
+    def __init__(self, session_id: str, interpreter: Interpreter):
+        self.session_id = session_id
+        self.interpreter = interpreter
+        self.last_used = time.monotonic()
+        # useで実行中のリクエストの数。0より大きい間は解放の対象としない
+        self.users = 0
+
+
+class SessionPool:
+    """初期化済みのInterpreterを再利用しながらセッションを管理する。
+
+    解放されたセッションのInterpreterは実行状態を初期化して待機させ、次のセッションに
+    貸し出す。一定時間利用されていないセッションはevict_idleで解放する。
+    useで使用中のセッションは、最終利用時刻に関わらず解放しない。
+    """
+
+    def __init__(
+        self,
+        max_idle: int = 8,
+        idle_timeout: float = 300.0,
+        lazy_compile: bool = False,
+        trace: bool = True,
+    ):
+        # 待機させておくInterpreterの最大数
+        self.max_idle = max_idle
+        # この秒数の間利用されていないセッションを解放の対象とする
+        self.idle_timeout = idle_timeout
+        self.lazy_compile = lazy_compile
+        self.trace = trace
+        self.idle_interpreters: List[Interpreter] = []
+        self.sessions: Dict[str, Session] = {}
+        self.lock = threading.Lock()
+
+    def create_session(self):
+        with self.lock:
+            if len(self.idle_interpreters) > 0:
+                interpreter = self.idle_interpreters.pop()
+            else:
+                interpreter = None
+        if interpreter is None:
+            interpreter = Interpreter(lazy_compile=self.lazy_compile, trace=self.trace)
+        session = Session(uuid.uuid4().hex, interpreter)
+        with self.lock:
+            self.sessions[session.session_id] = session
+        return session.session_id
+
+    def get_interpreter(self, session_id: str):
+        with self.lock:
+            if session_id not in self.sessions:
+                raise exception.SessionDoesNotExistException(session_id)
+            session = self.sessions[session_id]
+            session.last_used = time.monotonic()
+            return session.interpreter
+
+    @contextlib.contextmanager
+    def use(self, session_id: str):
+        # 実行中のセッションを使用中として、evict_idleで解放されないようにする
+        with self.lock:
+            if session_id not in self.sessions:
+                raise exception.SessionDoesNotExistException(session_id)
+            session = self.sessions[session_id]
+            session.users += 1
+        try:
+            yield session.interpreter
+        finally:
+            with self.lock:
+                session.users -= 1
+                session.last_used = time.monotonic()
+
+    def release_session(self, session_id: str):
+        with self.lock:
+            if session_id not in self.sessions:
+                raise exception.SessionDoesNotExistException(session_id)
+            session = self.sessions.pop(session_id)
+        self.recycle(session)
+
+    def recycle(self, session: Session):
+        # 解放したセッションのInterpreterを初期化して待機させる
+        session.interpreter.reset()
+        session.interpreter.lazy_compile = self.lazy_compile
+        with self.lock:
+            if len(self.idle_interpreters) < self.max_idle:
+                self.idle_interpreters.append(session.interpreter)
+
+    def evict_idle(self, now: float | None = None):
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            # 判定と取り出しを同時に行い、判定後に使用を開始したセッションを解放しない
+            expired = [
+                session
+                for session in self.sessions.values()
+                if session.users == 0 and now - session.last_used >= self.idle_timeout
+            ]
+            for session in expired:
+                del self.sessions[session.session_id]
+        for session in expired:
+            self.recycle(session)
+        return [session.session_id for session in expired]
+
+    def count_sessions(self):
+        return len(self.sessions)
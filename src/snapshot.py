@@ -0,0 +1,46 @@
+import json
+from typing import TextIO
+
+from src.interpreter import Interpreter, PseudoCompiledLTS
+
+LTS_START = '{"LTS":{'
+LTS_END = "},"
+
+# 1つのLTSを1行に収めるため、改行を含まない区切り文字で出力する
+encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def dump_execution(interpreter: Interpreter, f: TextIO, pretty: bool = False):
+    if pretty:
+        json.dump(interpreter.get_execution_dict(), f, indent=4, ensure_ascii=False)
+        return
+    interpreter.compile_all_funcs()
+    # 読み込み時に1つずつ復元できるよう、LTSを1行ずつ出力する
+    f.write(LTS_START + "\n")
+    func_lts_items = list(interpreter.func_lts_map.items())
+    for idx, (name, lts) in enumerate(func_lts_items):
+        separator = "," if idx < len(func_lts_items) - 1 else ""
+        f.write(
+            f"{encoder.encode(name)}:{encoder.encode(lts.get_lts_as_dict())}{separator}\n"
+        )
+    f.write(LTS_END + "\n")
+    f.write(
+        f'"calling_stack":{encoder.encode(interpreter.get_calling_stack_names())}}}\n'
+    )
+
+
+def load_execution(interpreter: Interpreter, f: TextIO):
+    first_line = f.readline()
+    if first_line.rstrip("\n") != LTS_START:
+        # dump_executionの形式でないJSONは全体を読み込んで復元する
+        interpreter.set_lts_dict(json.loads(first_line + f.read()))
+        return
+    for line in f:
+        line = line.rstrip("\n")
+        if line == LTS_END:
+            break
+        # 1行ずつLTSを復元し、読み込んだ辞書はすぐに破棄する
+        name, lts_dict = next(iter(json.loads(f"{{{line.rstrip(',')}}}").items()))
+        interpreter.func_lts_map[name] = PseudoCompiledLTS(data=lts_dict)
+    interpreter.calling_stack = json.loads(f"{{{f.readline()}")["calling_stack"]
+    interpreter.lts = interpreter.func_lts_map["メイン関数"]
@@ -0,0 +1,96 @@
+from collections import deque
+from typing import Iterable, List
+
+# 全角空白は半角空白2文字分、タブは次のタブ位置までの幅として扱う
+FULL_WIDTH_SPACE = "\u3000"
+FULL_WIDTH_SPACE_WIDTH = 2
+TAB_WIDTH = 4
+
+
+def measure_indent(line: str):
+    width = 0
+    for char in line:
+        if char == " ":
+            width += 1
+        elif char == FULL_WIDTH_SPACE:
+            width += FULL_WIDTH_SPACE_WIDTH
+        elif char == "\t":
+            width += TAB_WIDTH - width % TAB_WIDTH
+        else:
+            break
+    return width
+
+
+class SourceLines:
+    """行番号で参照できるソースコードの行の列。
+
+    各行のインデントの深さは読み込み時に1度だけ計算して保持する。
+    """
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        self.indents = [measure_indent(line) for line in lines]
+
+    def __getitem__(self, index: int):
+        return self.lines[index]
+
+    def indent(self, index: int):
+        return self.indents[index]
+
+    def has_line(self, index: int):
+        return index < len(self.lines)
+
+
+class LineStream(SourceLines):
+    """イテレータから必要な行だけを先読みしながら参照するソースコードの行の列。
+
+    コンパイラは現在の行と次の行(ブロックのインデント確認用)のみを参照しながら
+    先頭から順に読み進めるため、参照された行より前の行は破棄して保持しない。
+    """
+
+    def __init__(self, lines: Iterable[str], start: int = 0):
+        self.iterator = iter(lines)
+        # バッファの先頭の行の行番号
+        self.offset = start
+        self.buffer = deque()
+        self.indents = deque()
+        self.is_ended = False
+
+    def fill(self, index: int):
+        while not self.is_ended and self.offset + len(self.buffer) <= index:
+            try:
+                line = next(self.iterator)
+            except StopIteration:
+                self.is_ended = True
+                break
+            self.buffer.append(line)
+            self.indents.append(measure_indent(line))
+
+    def get_buffer_index(self, index: int):
+        if index < self.offset:
+            raise IndexError(f"{index + 1}行目は既に破棄されています。")
+        self.fill(index)
+        if index >= self.offset + len(self.buffer):
+            raise IndexError(f"{index + 1}行目は存在しません。")
+        # ブロックの開始行を参照し直すことがあるため1行前までは保持する
+        while self.offset < index - 1:
+            self.buffer.popleft()
+            self.indents.popleft()
+            self.offset += 1
+        return index - self.offset
+
+    def __getitem__(self, index: int):
+        return self.buffer[self.get_buffer_index(index)]
+
+    def indent(self, index: int):
+        return self.indents[self.get_buffer_index(index)]
+
+    def has_line(self, index: int):
+        self.fill(index)
+        return index < self.offset + len(self.buffer)
+
+
+def as_source_lines(lines: List[str] | SourceLines):
+    if isinstance(lines, SourceLines):
+        return lines
+    return SourceLines(lines)
@@ -0,0 +1,259 @@
+import functools
+import re
+from typing import Dict, NamedTuple, Tuple
+
+from src import exception
+from src.interpreter import Interpreter, StateType
+
+# 繰り返しの処理の種別
+# sum←sum + a[i]のように1つの変数へ集計する
+REDUCTION = "reduction"
+# b[i]←a[i] × 2のように配列の各要素を計算する
+MAP = "map"
+# b[i]←0のように配列の各要素に同じ値を代入する
+FILL = "fill"
+
+# 被演算子の種別
+# 繰り返しの変数を添字とする配列の要素
+TERM_ELEMENT = 0
+# 繰り返しの変数
+TERM_COUNTER = 1
+# 繰り返しの間は変化しない変数・定数
+TERM_INVARIANT = 2
+# 集計先の変数
+TERM_TARGET = 3
+
+# 名前の正規表現の括弧はグループとして取得しない
+NAME = Interpreter.NAME.replace("(", "(?:")
+ASSIGN = "(?:<-|←|＜－)"
+ELEMENT_PATTERN = re.compile(f"({NAME})[ ]*\\[[ ]*({NAME})[ ]*\\]")
+INVARIANT_PATTERN = re.compile(f"{NAME}|{Interpreter.REAL_VAL}")
+ELEMENT_ASSIGN_PATTERN = re.compile(
+    f"({NAME})[ ]*\\[[ ]*({NAME})[ ]*\\][ ]*{ASSIGN}[ ]*(.+)"
+)
+NAME_ASSIGN_PATTERN = re.compile(f"({NAME})[ ]*{ASSIGN}[ ]*(.+)")
+BINARY_PATTERN = re.compile("(.+?)[ ]*([+＋\\-－×*])[ ]*(.+)")
+
+
+class Term(NamedTuple):
+    kind: int
+    # 配列名・変数名・定数の文字列。繰り返しの変数の場合はNone
+    value: str | None
+
+
+class LoopIdiom(NamedTuple):
+    kind: str
+    # 繰り返しの変数
+    counter: str
+    # 代入先の変数名または配列名
+    target: str
+    # 二項演算の場合は演算子。FILLの場合はNone
+    operator: str | None
+    # 左右の被演算子。FILLの場合は右辺の被演算子をleftに持ち、rightはNone
+    left: Term
+    right: Term | None
+
+
+class LoopVectorizer:
+    """for文の本体が1つの代入のみの繰り返しを認識し、まとめて実行する。
+
+    集計・配列の各要素の計算・同じ値の代入を、要素ごとに遷移を発火せずにPythonの
+    リストの操作で実行する。配列の範囲外の参照や数値以外の値など、1遷移ずつの実行と
+    結果が変わる可能性がある場合は何もせずに通常の実行に任せる。
+    """
+
+    def __init__(self):
+        # (for文の条件, 本体の代入) -> 認識した処理。認識できない場合はNone
+        self.idiom_cache: Dict[Tuple[str, str], LoopIdiom | None] = {}
+
+    def find_loop(self, lts, state):
+        # 本体が代入のみのfor文の(条件, 本体の代入, 繰り返しの終了後の状態)
+        if lts.get_state_type(state) != StateType.FOR:
+            return None
+        sentence = lts.get_transition_label(state)
+        body_state = lts.get_transition_state(state, sentence)
+        if lts.get_state_type(body_state) != StateType.ASSIGN:
+            return None
+        label = lts.get_transition_label(body_state)
+        if label is None:
+            return None
+        next_state = lts.get_transition_state(body_state, label)
+        if next_state != state:
+            # endforの状態を経由してfor文の状態へ戻る場合
+            back_label = lts.get_transition_label(next_state)
+            if (
+                lts.get_state_type(next_state) != StateType.UNDEFINED
+                or back_label is None
+                or lts.get_transition_state(next_state, back_label) != state
+            ):
+                return None
+        return sentence, label, lts.get_transition_state(state, "endfor")
+
+    def compile_term(self, text: str, counter: str, target: str):
+        res = ELEMENT_PATTERN.fullmatch(text)
+        if res:
+            if res.group(2) != counter:
+                return None
+            return Term(TERM_ELEMENT, res.group(1))
+        if text == counter:
+            return Term(TERM_COUNTER, None)
+        if INVARIANT_PATTERN.fullmatch(text) and text != target:
+            return Term(TERM_INVARIANT, text)
+        return None
+
+    def compile_idiom(self, interpreter: Interpreter, sentence: str, label: str):
+        res = re.match(f"[ ]*\\([ ]*({NAME})[ ]*を", sentence)
+        if res is None:
+            return None
+        counter = res.group(1)
+        condition = sentence[res.end() :]
+        if any(func_name in condition for func_name in interpreter.func_lts_map):
+            return None
+        if re.search(f"(?<![a-zA-Z0-9_]){counter}(?![a-zA-Z0-9_])", condition):
+            return None
+        label = label.strip()
+        assign = ELEMENT_ASSIGN_PATTERN.fullmatch(label)
+        if assign:
+            target, index, formula = assign.groups()
+            if index != counter:
+                return None
+            # 繰り返しの条件が代入先の要素を参照する場合は、1回ごとに条件が変わる
+            reference = f"(?<![a-zA-Z0-9_]){target}[ ]*\\["
+        else:
+            assign = NAME_ASSIGN_PATTERN.fullmatch(label)
+            if assign is None:
+                return None
+            target, formula = assign.groups()
+            reference = f"(?<![a-zA-Z0-9_]){target}(?![a-zA-Z0-9_])"
+        if target == counter or re.search(reference, condition):
+            return None
+        binary = BINARY_PATTERN.fullmatch(formula)
+        if binary is None:
+            if assign.re is NAME_ASSIGN_PATTERN:
+                return None
+            term = self.compile_term(formula, counter, target)
+            if term is None:
+                return None
+            return LoopIdiom(FILL, counter, target, None, term, None)
+        left_text, operator, right_text = binary.groups()
+        if assign.re is NAME_ASSIGN_PATTERN:
+            # 代入先の変数を一方の被演算子とする集計
+            if left_text == target:
+                left = Term(TERM_TARGET, target)
+                right = self.compile_term(right_text, counter, target)
+            elif right_text == target:
+                left = self.compile_term(left_text, counter, target)
+                right = Term(TERM_TARGET, target)
+            else:
+                return None
+            if left is None or right is None:
+                return None
+            return LoopIdiom(REDUCTION, counter, target, operator, left, right)
+        left = self.compile_term(left_text, counter, target)
+        right = self.compile_term(right_text, counter, target)
+        if left is None or right is None:
+            return None
+        return LoopIdiom(MAP, counter, target, operator, left, right)
+
+    def get_idiom(self, interpreter: Interpreter, sentence: str, label: str):
+        key = (sentence, label)
+        if key not in self.idiom_cache:
+            self.idiom_cache[key] = self.compile_idiom(interpreter, sentence, label)
+        return self.idiom_cache[key]
+
+    def get_values(self, term: Term, indexes: range, interpreter: Interpreter, lts):
+        # 各繰り返しでの被演算子の値の一覧。数値以外を含む場合はNone
+        if term.kind == TERM_COUNTER:
+            return list(indexes)
+        if term.kind == TERM_ELEMENT:
+            array = lts.name_val_map.get(term.value)
+            if type(array) is not list or indexes[0] < 1 or indexes[-1] > len(array):
+                return None
+            values = array[indexes.start - 1 : indexes.stop - 1 : indexes.step]
+        elif term.kind == TERM_TARGET:
+            # 集計の初期値
+            values = [lts.name_val_map.get(term.value)]
+        else:
+            if term.value in interpreter.func_lts_map:
+                return None
+            try:
+                val, _ = interpreter.interpret_arithmetic_formula(term.value, lts=lts)
+            except exception.PatternException:
+                return None
+            values = [val] * len(indexes)
+        if any(type(val) not in (int, float) for val in values):
+            return None
+        return values
+
+    def execute(self, interpreter: Interpreter, lts, state):
+        # 認識したfor文をまとめて実行し、繰り返しの終了後の状態を返却する
+        # まとめて実行できない場合は変数を変更せずにNoneを返却する
+        loop = self.find_loop(lts, state)
+        if loop is None:
+            return None
+        sentence, label, exit_state = loop
+        idiom = self.get_idiom(interpreter, sentence, label)
+        if idiom is None or lts.name_val_map.get(idiom.counter, 0) is not None:
+            return None
+        try:
+            name, from_val, to_val, increment_val = interpreter.process_for_sentence(
+                sentence, lts=lts
+            )
+        except exception.PatternException:
+            return None
+        if name != idiom.counter or type(increment_val) is not int:
+            return None
+        if increment_val <= 0:
+            return None
+        # 最初の1回は終了の判定をせずに実行する
+        last = from_val
+        if to_val >= from_val:
+            last += (to_val - from_val) // increment_val * increment_val
+        indexes = range(from_val, last + 1, increment_val)
+        left = self.get_values(idiom.left, indexes, interpreter, lts)
+        if left is None:
+            return None
+        if idiom.kind == FILL:
+            values = left
+        else:
+            right = self.get_values(idiom.right, indexes, interpreter, lts)
+            if right is None:
+                return None
+            operator = Interpreter.OPERATOR_FUNC_MAP[idiom.operator]
+            try:
+                if idiom.kind == REDUCTION:
+                    values = self.reduce(idiom, operator, left, right)
+                else:
+                    values = list(map(operator, left, right))
+            except OverflowError:
+                return None
+        if idiom.kind == REDUCTION:
+            lts.name_val_map[idiom.target] = values
+        else:
+            array = lts.name_val_map.get(idiom.target)
+            if type(array) is not list or from_val < 1 or last > len(array):
+                return None
+            array[from_val - 1 : last : increment_val] = values
+        lts.name_val_map[idiom.counter] = None
+        if interpreter.memory is not None:
+            interpreter.memory.update(lts, idiom.target)
+        return exit_state
+
+    def reduce(self, idiom: LoopIdiom, operator, left, right):
+        # 1遷移ずつの実行と同じ順序で集計する
+        # 実数の合計はsumでは誤差の補正により結果が変わるため、整数の場合のみsumを用いる
+        if idiom.left.kind == TERM_TARGET:
+            acc, values = left[0], right
+            if idiom.operator in ("+", "＋") and all(
+                type(val) is int for val in left + right
+            ):
+                return sum(values, acc)
+            return functools.reduce(operator, values, acc)
+        acc, values = right[0], left
+        return functools.reduce(lambda acc, val: operator(val, acc), values, acc)
+
+
+def attach_vectorizer(interpreter: Interpreter):
+    # execute_ltsのように途中で実行を止めない場合に、認識したfor文をまとめて実行する
+    interpreter.vectorizer = LoopVectorizer()
+    return interpreter.vectorizer
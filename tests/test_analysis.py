@@ -0,0 +1,74 @@
+import pytest
+
+from src import exception
+from src.interpreter import Interpreter
+from src.lts.analysis import get_analysis
+from src.lts.lts import LabeledTransitionSystem
+
+
+def test_analysis_nested_loops():
+    lines = [
+        "整数型: i, j, x←0",
+        "for (iを1から3まで1ずつ増やす)",
+        "    for (jを1から3まで1ずつ増やす)",
+        "        x←x+j",
+        "    endfor",
+        "endfor",
+        "while (x > 100)",
+        "    x←x-1",
+        "endwhile",
+        "return x",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+    lts = interpreter.lts
+    analysis = get_analysis(lts)
+
+    outer = lts.get_transition_state("S0", "整数型: i, j, x←0")
+    inner = lts.get_transition_state(outer, "(iを1から3まで1ずつ増やす)")
+    body = lts.get_transition_state(inner, "(jを1から3まで1ずつ増やす)")
+    after_for = lts.get_transition_state(outer, "endfor")
+    assert set(analysis.loops) == {outer, inner, after_for}
+    assert analysis.loops[outer].depth == 1
+    assert analysis.loops[inner].parent == outer
+    assert analysis.loops[inner].depth == 2
+    assert analysis.get_loop(body).header == inner
+    assert analysis.get_loop_depth(body) == 2
+    assert analysis.get_loop_depth("S0") == 0
+    assert analysis.get_immediate_dominator(inner) == outer
+    assert analysis.dominates(outer, body)
+    assert not analysis.dominates(body, after_for)
+    assert analysis.dead_states == set()
+    assert analysis.unreachable_states == set()
+
+
+def test_analysis_dead_states():
+    lts = LabeledTransitionSystem()
+    lts.add_transition("S0", "a", "S1")
+    lts.add_transition("S0", "b", "S2")
+    lts.add_transition("S2", "c", "S2")
+    lts.create_state("S3")
+    lts.add_transition("S3", "d", "S1")
+    analysis = get_analysis(lts)
+    assert analysis.reachable_states == {"S0", "S1", "S2"}
+    assert analysis.unreachable_states == {"S3"}
+    # S2からは終了の状態(S1)へ到達できない
+    assert analysis.dead_states == {"S2"}
+    assert analysis.loops["S2"].back_edges == (("S2", "c"),)
+    assert analysis.get_immediate_dominator("S0") is None
+    with pytest.raises(exception.DoesNotExistException):
+        analysis.get_immediate_dominator("S3")
+
+
+def test_analysis_cache():
+    lts = LabeledTransitionSystem()
+    lts.add_transition("S0", "a", "S1")
+    analysis = get_analysis(lts)
+    assert get_analysis(lts) is analysis
+
+    # 遷移を変更すると解析をやり直す
+    lts.add_transition("S1", "b", "S0")
+    assert get_analysis(lts) is not analysis
+    assert "S0" in get_analysis(lts).loops
+    lts.clear_transition("S1")
+    assert get_analysis(lts).loops == {}
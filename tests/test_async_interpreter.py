@@ -0,0 +1,93 @@
+import asyncio
+
+from src.async_interpreter import AsyncInterpreter
+from src.coverage import CoverageCollector
+from src.interpreter import Interpreter
+from src.memory import MemoryTracker
+
+
+def create_session(count: int, slice_size: int = 10):
+    lines = [
+        "整数型: i, x←0",
+        f"for (iを1から{count}まで1ずつ増やす)",
+        "    x←x+i",
+        "endfor",
+        "return x",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+    return AsyncInterpreter(interpreter, slice_size=slice_size)
+
+
+def test_execute_lts_concurrently():
+    finished = []
+
+    async def execute(name: str, session: AsyncInterpreter):
+        result = await session.execute_lts()
+        finished.append(name)
+        return result
+
+    async def main():
+        long_session = create_session(200)
+        short_session = create_session(3)
+        return await asyncio.gather(
+            execute("long", long_session), execute("short", short_session)
+        )
+
+    # 長いプログラムの実行中も他のセッションの実行が進む
+    assert asyncio.run(main()) == [20100, 6]
+    assert finished == ["short", "long"]
+
+
+def test_run_with_budget():
+    async def main():
+        session = create_session(3)
+        session.interpreter.start_execution()
+        steps = [await session.run(budget=4)]
+        assert not session.is_ended()
+        steps.append(await session.run(budget=100))
+        assert session.is_ended()
+        assert not await session.step()
+        return steps
+
+    steps = asyncio.run(main())
+    # 宣言1回、for文4回、代入3回、ループの戻り3回、return1回
+    assert sum(steps) == 12
+    assert steps[0] == 4
+
+
+def test_execute_lts_on_shared_session():
+    lines = [
+        "◯整数型: sum_to(整数型: n)",
+        "    整数型: i, x←0",
+        "    for (iを1からnまで1ずつ増やす)",
+        "        x←x+i",
+        "    endfor",
+        "    return x",
+        "return sum_to(1)",
+    ]
+    interpreter = Interpreter(trace=False)
+    interpreter.interpret_main_process(lines)
+    session = AsyncInterpreter(interpreter, slice_size=5)
+    lts = interpreter.func_lts_map["sum_to"]
+
+    coverage = CoverageCollector()
+
+    async def main():
+        # 同じセッションへの実行・stepは、先に開始した実行の終了まで待機する
+        return await asyncio.gather(
+            session.execute_lts(lts, [200], coverage=coverage),
+            session.step(),
+            session.execute_lts(lts, [3]),
+        )
+
+    assert asyncio.run(main()) == [20100, False, 6]
+    assert coverage.get_report()["runs"] == 1
+
+
+def test_execute_lts_with_memory():
+    session = create_session(3)
+    memory = MemoryTracker()
+    assert asyncio.run(session.execute_lts(memory=memory)) == 6
+    assert memory.peak > 0
+    assert session.interpreter.memory is None
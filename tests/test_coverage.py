@@ -0,0 +1,74 @@
+from src.coverage import CoverageCollector
+from src.interpreter import Interpreter
+
+
+def test_coverage_branches():
+    lines = [
+        "◯ test_func(整数型:x)",
+        "    if (xが5以上)",
+        "        x←x+1",
+        "    elseif (xが3以上)",
+        "        x←x+5",
+        "    else",
+        "        x←x+12",
+        "    endif",
+        "    return x",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+    lts = interpreter.func_lts_map["test_func"]
+    coverage = CoverageCollector()
+    interpreter.execute_lts(lts, vars=[6], coverage=coverage)
+
+    branches = {
+        branch["label"]: branch for branch in coverage.get_branches("test_func")
+    }
+    assert branches["(xが5以上)"]["covered"]
+    assert not branches["(xが3以上)"]["covered"]
+    assert not branches["else"]["covered"]
+    lines_report = {
+        line["line_num"]: line["covered"] for line in coverage.get_lines("test_func")
+    }
+    assert lines_report[3]
+    assert not lines_report[5]
+    assert not lines_report[7]
+
+    interpreter.execute_lts(lts, vars=[4], coverage=coverage)
+    interpreter.execute_lts(lts, vars=[6], coverage=coverage)
+    branches = {
+        branch["label"]: branch for branch in coverage.get_branches("test_func")
+    }
+    assert branches["(xが5以上)"]["runs"] == 2
+    assert branches["(xが3以上)"]["runs"] == 1
+    assert not branches["else"]["covered"]
+
+    # 網羅率は指定した実行の間のみ集計する
+    assert interpreter.coverage is None
+    interpreter.execute_lts(lts, vars=[1])
+    report = coverage.get_report()
+    assert report["runs"] == 3
+    assert report["functions"]["test_func"]["branch_rate"] == 2 / 3
+
+
+def test_coverage_loop():
+    lines = [
+        "整数型: x←11",
+        "while (x<10)",
+        "    x←x+1",
+        "endwhile",
+        "return x",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+    coverage = CoverageCollector()
+    interpreter.execute_lts(coverage=coverage)
+
+    branches = {
+        branch["label"]: branch["covered"]
+        for branch in coverage.get_branches("メイン関数")
+    }
+    assert branches == {"(x<10)": False, "endwhile": True}
+    assert [
+        branch["loop_depth"] for branch in coverage.get_branches("メイン関数")
+    ] == [1, 1]
+    assert "- " in coverage.format_report()
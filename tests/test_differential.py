@@ -0,0 +1,59 @@
+from src.differential import (
+    ENGINES,
+    RESULT,
+    iterate_states,
+    register_engine,
+    run_differential,
+)
+from src.generator import ProgramGenerator
+from src.interpreter import Interpreter
+
+
+class FloorQuotientInterpreter(Interpreter):
+    # の商を切り捨て除算で計算する、負の数で結果が異なるエンジン
+    OPERATOR_FUNC_MAP = {
+        **Interpreter.OPERATOR_FUNC_MAP,
+        "の商": lambda val1, val2: val1 // val2,
+    }
+
+
+def create_floor_quotient_engine(lines):
+    interpreter = FloorQuotientInterpreter(trace=False)
+    interpreter.interpret_main_process(lines)
+    return interpreter
+
+
+def test_run_differential():
+    lines = [
+        "整数型: x←-7, y←0",
+        "y←x + 1",
+        "x←x ÷ 2の商",
+        "return x",
+    ]
+    assert run_differential(lines, engine="image") is None
+
+    register_engine("floor_quotient", create_floor_quotient_engine)
+    try:
+        divergence = run_differential(lines, engine="floor_quotient")
+    finally:
+        del ENGINES["floor_quotient"]
+    # 宣言前・宣言後・yへの代入後に続く4番目の状態で異なる
+    assert divergence.step == 3
+    assert divergence.expected[1]["メイン関数"]["x"] == -3
+    assert divergence.actual[1]["メイン関数"]["x"] == -4
+
+
+def test_generated_programs():
+    for seed in range(20):
+        lines = ProgramGenerator(seed).generate()
+        interpreter = Interpreter(trace=False)
+        interpreter.interpret_main_process(lines)
+        # 生成されたプログラムは必ず終了する
+        assert list(iterate_states(interpreter, 100000))[-1][0] == RESULT
+        assert run_differential(lines) is None
+
+
+def test_fused_engine():
+    for seed in range(5):
+        lines = ProgramGenerator(seed, func_count=2).generate()
+        assert run_differential(lines, engine="fused") is None
@@ -0,0 +1,56 @@
+from src.differential import RESULT, iterate_states, run_differential
+from src.generator import ProgramGenerator
+from src.interpreter import Interpreter
+
+
+def test_generate_all_statements():
+    lines = []
+    for seed in range(10):
+        lines += ProgramGenerator(seed, max_depth=3, func_count=2).generate()
+    source = "\n".join(lines)
+    for keyword in [
+        "◯整数型: f1(",
+        "整数型の配列: a0←{",
+        "elseif",
+        "endwhile",
+        "do",
+        "endfor",
+        "を追加する",
+        "の要素数",
+        "で割り切れる",
+        "より小さい",
+    ]:
+        assert keyword in source
+
+
+def test_generate_same_seed():
+    assert ProgramGenerator(3).generate() == ProgramGenerator(3).generate()
+    assert ProgramGenerator(3).generate() != ProgramGenerator(4).generate()
+
+
+def test_generated_programs_with_knobs():
+    for seed in range(10):
+        lines = ProgramGenerator(
+            seed,
+            var_count=2,
+            array_count=2,
+            func_count=2,
+            statement_count=4,
+            max_depth=3,
+            max_trip_count=3,
+        ).generate()
+        interpreter = Interpreter(trace=False)
+        interpreter.interpret_main_process(lines)
+        assert list(iterate_states(interpreter, 100000))[-1][0] == RESULT
+        assert run_differential(lines) is None
+
+
+def test_write_programs(tmp_path):
+    files = ProgramGenerator(0).write_programs(str(tmp_path / "programs"), 3)
+    assert len(files) == 3
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            lines = f.readlines()
+        interpreter = Interpreter(trace=False)
+        interpreter.interpret_main_process(lines, file=file)
+        interpreter.execute_lts()
@@ -0,0 +1,89 @@
+import pytest
+
+from src.harness import Harness, TestCase, load_cases
+
+LINES = [
+    "◯ test_max(整数型:a, 整数型:b)",
+    "    if (a > b)",
+    "        return a",
+    "    endif",
+    "    return b",
+    "◯ test_loop(整数型:n)",
+    "    while (n > 0)",
+    "        n←n+1",
+    "    endwhile",
+    "    return n",
+    "return test_max(1, 2)",
+]
+
+
+@pytest.mark.parametrize("workers, executor", [(1, "thread"), (2, "thread")])
+def test_run_cases(workers, executor):
+    harness = Harness(LINES, func_name="test_max")
+    cases = [
+        TestCase([3, 1], 3, "first"),
+        TestCase([1, 3], 3),
+        TestCase([2, 2], 3),
+        ([5, 4], 5),
+    ]
+    results = harness.run(cases, workers=workers, executor=executor)
+    assert [result.passed for result in results] == [True, True, False, True]
+    assert [result.actual for result in results] == [3, 3, 2, 5]
+    assert all(result.steps > 0 for result in results)
+    summary = Harness.get_summary(results)
+    assert (summary["passed"], summary["failed"]) == (3, 1)
+    assert "NG ケース3" in Harness.format_report(results)
+
+
+def test_run_main_and_step_limit():
+    assert Harness(LINES).run([TestCase([], 2)])[0].passed
+
+    harness = Harness(LINES, func_name="test_loop", max_steps=50)
+    result = harness.run(load_cases([{"args": [1], "expected": 0}]))[0]
+    assert not result.passed
+    assert result.steps == 50
+    assert result.error.startswith("TimeoutError")
+
+
+def test_step_limit_boundary():
+    steps = Harness(LINES, func_name="test_max").run([TestCase([1, 2], 2)])[0].steps
+    # 上限ちょうどの遷移数で終了するプログラムは成功とする
+    harness = Harness(LINES, func_name="test_max", max_steps=steps)
+    result = harness.run([TestCase([1, 2], 2)])[0]
+    assert result.passed
+    assert result.steps == steps
+    harness = Harness(LINES, func_name="test_max", max_steps=steps - 1)
+    result = harness.run([TestCase([1, 2], 2)])[0]
+    assert not result.passed
+    assert result.steps == steps - 1
+    assert result.error.startswith("TimeoutError")
+
+
+def test_run_cases_in_processes():
+    harness = Harness(LINES, func_name="test_max")
+    results = harness.run(
+        [TestCase([index, 5], max(index, 5)) for index in range(8)],
+        workers=2,
+        executor="process",
+    )
+    assert all(result.passed for result in results)
+
+
+def test_memory_limit():
+    lines = [
+        "◯ test_grow(整数型:n)",
+        "    整数型: i",
+        "    整数型の配列: a←{}",
+        "    for (iを1からnまで1ずつ増やす)",
+        "        aの末尾 に iを追加する",
+        "    endfor",
+        "    return aの要素数",
+        "return test_grow(1)",
+    ]
+    harness = Harness(lines, func_name="test_grow", memory_limit=5000)
+    small, large = harness.run([TestCase([10], 10), TestCase([10000], 10000)])
+    assert small.passed
+    assert 0 < small.peak_memory <= 5000
+    assert not large.passed
+    assert large.error.startswith("MemoryLimitExceededException")
+    assert Harness.get_summary([small, large])["peak_memory"] == large.peak_memory
@@ -0,0 +1,99 @@
+import io
+import json
+
+import pytest
+
+from src import exception
+from src.coverage import CoverageCollector
+from src.image import ProgramImage, attach_image, write_image
+from src.interpreter import Interpreter
+from src.snapshot import dump_execution, load_execution
+
+
+def get_lines():
+    return [
+        "◯ test_sum(整数型:n)",
+        "    整数型: i, total←0",
+        "    for (iを1からnまで1ずつ増やす)",
+        "        if (i mod 2 = 0)",
+        "            total←total+i",
+        "        else",
+        "            total←total-1",
+        "        endif",
+        "    endfor",
+        "    return total",
+        "整数型: x←test_sum(6)",
+        "return x",
+    ]
+
+
+def test_execute_image(tmp_path):
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(get_lines(), file="test.txt")
+    path = tmp_path / "program.img"
+    with open(path, "wb") as f:
+        write_image(interpreter, f)
+
+    image = ProgramImage.open(str(path))
+    assert set(image.get_func_names()) == {"メイン関数", "test_sum"}
+    results = []
+    # 同じイメージを参照する実行ごとに変数は個別に保持される
+    for _ in range(2):
+        worker = Interpreter()
+        attach_image(worker, image)
+        results.append(worker.execute_lts())
+    assert results == [9, 9]
+    assert worker.func_lts_map["test_sum"].name_val_map["total"] == 9
+
+    lts = worker.func_lts_map["test_sum"]
+    label = lts.get_transition_label(lts.init_state)
+    assert label == "整数型: i, total←0"
+    location = lts.get_source_location(lts.init_state, label)
+    assert (location.file, location.line_num) == ("test.txt", 1)
+    assert lts.get_state_name(lts.init_state) == "S0"
+    with pytest.raises(exception.DoesNotExistException):
+        lts.get_state_type(100)
+    image.close()
+
+
+def test_coverage_and_snapshot_on_image():
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(get_lines(), file="test.txt")
+    compiled_coverage = CoverageCollector()
+    interpreter.execute_lts(coverage=compiled_coverage)
+    worker = Interpreter()
+    attach_image(worker, ProgramImage.build(interpreter))
+    # イメージ上の関数も遷移を参照して網羅率を集計できる
+    coverage = CoverageCollector()
+    assert worker.execute_lts(coverage=coverage) == 9
+    for func_name in ["メイン関数", "test_sum"]:
+        report = coverage.get_report()["functions"][func_name]
+        compiled = compiled_coverage.get_report()["functions"][func_name]
+        assert report["lines"] == compiled["lines"]
+        assert report["branch_rate"] == compiled["branch_rate"]
+    with pytest.raises(TypeError):
+        worker.lts.transitions[worker.lts.init_state]["x"] = 0
+
+    # 実行途中の状態は状態名に変換して保存し、コンパイルしたLTSとして復元できる
+    interpreter.init_execution()
+    worker.init_execution()
+    for _ in range(5):
+        interpreter.execute_line()
+        worker.execute_line()
+    assert worker.get_execution_dict() == interpreter.get_execution_dict()
+    f = io.StringIO()
+    dump_execution(worker, f)
+    assert json.loads(f.getvalue()) == json.loads(
+        json.dumps(interpreter.get_execution_dict(), ensure_ascii=False)
+    )
+    f.seek(0)
+    loaded = Interpreter()
+    load_execution(loaded, f)
+    while loaded.execute_line():
+        pass
+    assert loaded.lts.func_results["メイン関数"] == 9
+
+
+def test_invalid_image():
+    with pytest.raises(exception.InvalidImageException):
+        ProgramImage(b"FEPX" + bytes(24))
@@ -1,6 +1,14 @@
 import pytest
-from src.interpreter import Interpreter
+from src.interpreter import (
+    INDEX_CONST,
+    INDEX_FORMULA,
+    INDEX_NAME,
+    ArrayIndex,
+    Interpreter,
+    StateType,
+)
 from src import exception
+from src.source import LineStream, SourceLines
 
 
 def test_get_real_num_pattern():
@@ -1336,3 +1344,393 @@ def test_interpret_sample3():
         [1, 2, 3, 4, 5, 4, 5],
         [3, 2, 2, 1, 3, 2, 1],
     ]
+
+
+def test_interpret_main_process_source_location():
+    interpreter = Interpreter()
+    lines = [
+        "整数型: i←0",
+        "if (i＝0)",
+        "    i←i+1",
+        "else",
+        "    i←i+1",
+        "endif",
+        "return i",
+    ]
+    interpreter.interpret_main_process(lines, file="sample.txt")
+    lts = interpreter.lts
+    assert lts.get_source_location("S0", "整数型: i←0") == ("sample.txt", 0, 0)
+    assert lts.get_source_location("S1", "(i＝0)") == ("sample.txt", 1, 3)
+    # 同一内容の行も異なる位置として記録される
+    assert lts.get_source_location("S2", "i←i+1") == ("sample.txt", 2, 4)
+    assert lts.get_source_location("S4", "i←i+1") == ("sample.txt", 4, 4)
+    assert lts.get_source_location("S3", "endif").line_num == 5
+    assert lts.get_source_location("S6", "return i").line_num == 6
+
+
+def test_execute_lts_runtime_exception_line_num():
+    interpreter = Interpreter()
+    lines = [
+        "整数型の配列: a←{1, 2}",
+        "整数型: x",
+        "x←a[3]",
+    ]
+    interpreter.interpret_main_process(lines)
+    with pytest.raises(exception.InvalidArrayIndexException) as e:
+        interpreter.execute_lts()
+
+    # エラーメッセージを検証
+    assert str(e.value) == "3行目:aの配列外にアクセスしています。"
+
+
+def test_interpret_main_process_line_stream():
+    lines = [
+        "◯ test_func(整数型:x)",
+        "    if (xが5以上)",
+        "        x←x+1",
+        "    else",
+        "        x←x+12",
+        "    endif",
+        "    return x",
+        "整数型:x←2",
+        "for (iを1から10まで繰り返す)",
+        "    while (xは10以上)",
+        "        x←x-10",
+        "    endwhile",
+        "    x←test_func(x)",
+        "endfor",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+
+    stream = LineStream(iter(lines))
+    stream_interpreter = Interpreter()
+    remains = stream_interpreter.interpret_main_process(stream)
+    assert remains == len(lines)
+    assert stream_interpreter.lts.transitions == interpreter.lts.transitions
+    assert (
+        stream_interpreter.func_lts_map["test_func"].transitions
+        == interpreter.func_lts_map["test_func"].transitions
+    )
+    # 読み終えた行は保持されない
+    assert len(stream.buffer) <= 2
+    with pytest.raises(IndexError):
+        stream[0]
+
+
+def test_interpret_main_process_lazy_compile():
+    lines = [
+        "◯ test_gt(整数型:a, 整数型:b)",
+        "    return a > b",
+        "◯整数型: unused(整数型:x)",
+        "    x←x+1",
+        "    return x",
+        "整数型: a←3, b←2",
+        "論理型: c←test_gt(a,b)",
+    ]
+    interpreter = Interpreter(lazy_compile=True)
+    remains = interpreter.interpret_main_process(lines)
+    assert remains == len(lines)
+    assert set(interpreter.pending_funcs) == {"test_gt", "unused"}
+    assert interpreter.func_lts_map["unused"].arg_list == ["x"]
+    assert len(interpreter.func_lts_map["unused"].transitions) == 1
+
+    interpreter.execute_lts()
+    assert interpreter.lts.name_val_map["c"]
+    assert set(interpreter.pending_funcs) == {"unused"}
+    test_gt_lts = interpreter.func_lts_map["test_gt"]
+    assert test_gt_lts.get_transition_state("S0", "return a > b") == "S1"
+    assert test_gt_lts.get_source_location("S0", "return a > b").line_num == 1
+
+    unused_lts = interpreter.func_lts_map["unused"]
+    assert interpreter.execute_lts(unused_lts, vars=[1]) == 2
+    assert unused_lts.name_val_map["x"] == 2
+    assert len(interpreter.pending_funcs) == 0
+
+
+def test_classify_statement():
+    interpreter = Interpreter()
+    statement = interpreter.classify_statement("整数型の配列: a←{1, 2}, b")
+    assert statement.state_type == StateType.DECLARE
+    assert statement.var_type == "整数型の配列"
+    assert statement.body == "a←{1, 2}, b"
+    assert interpreter.lts.name_type_map["b"] == "整数型の配列"
+
+    statement = interpreter.classify_statement("a[1]←2")
+    assert statement.state_type == StateType.ASSIGN
+    assert statement.text == "a[1]←2"
+    assert statement.target == "a"
+
+    statement = interpreter.classify_statement("aの末尾 に 3を追加する")
+    assert statement.state_type == StateType.ASSIGN
+
+    statement = interpreter.classify_statement("a[1] ≠ 2")
+    assert statement.state_type == StateType.FORMULA
+
+    statement = interpreter.classify_statement("return a[1] + 1")
+    assert statement.state_type == StateType.RETURN
+    assert statement.text == "return a[1] + 1"
+    assert statement.body == "a[1] + 1"
+
+    with pytest.raises(exception.NameNotDefinedException) as e:
+        interpreter.classify_statement("c←1")
+    # 行番号はinterpret_processで付与する
+    assert e.value.line_num is None
+    with pytest.raises(exception.NameNotDefinedException) as e:
+        Interpreter().interpret_main_process(["整数型: a←1", "a←2", "c←1"])
+    assert e.value.line_num == 2
+
+
+def test_execute_parsed_statements():
+    lines = [
+        "整数型: i, total←0",
+        "for (iを1から4まで2ずつ増やす)",
+        "    total←total+i",
+        "endfor",
+        "return total * 2",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+    statement = interpreter.statements["整数型: i, total←0"]
+    assert (statement.var_type, statement.body) == ("整数型", "i, total←0")
+    assert interpreter.statements["return total * 2"].body == "total * 2"
+
+    # コンパイル時に解析した文は実行時に解析し直さない
+    def parse_statement(text, state_type):
+        raise AssertionError(text)
+
+    interpreter.parse_statement = parse_statement
+    parse_for_sentence = interpreter.parse_for_sentence
+    parsed = []
+
+    def count_parse_for_sentence(*args):
+        parsed.append(args[0])
+        return parse_for_sentence(*args)
+
+    interpreter.parse_for_sentence = count_parse_for_sentence
+    assert interpreter.execute_lts() == 8
+    # for文の条件は初めて実行した時のみ解析する
+    assert parsed == ["(iを1から4まで2ずつ増やす)"]
+    assert interpreter.for_sentences[parsed[0]] == ("i", "1", "4", "2")
+
+    # コンパイルせずに読み込んだ遷移は実行時に分解する
+    loaded = Interpreter()
+    loaded.set_lts_dict(interpreter.get_execution_dict())
+    loaded.init_execution()
+    while loaded.execute_line():
+        pass
+    assert loaded.lts.func_results["メイン関数"] == 8
+    assert loaded.statements["整数型: i, total←0"] == statement
+
+
+def test_interpret_main_process_tab_and_full_width_indent():
+    lines = [
+        "整数型: x←0",
+        "while (x<10)",
+        "    if (x＝5)",
+        "        x←x+2",
+        "    else",
+        "        x←x+1",
+        "    endif",
+        "endwhile",
+        "return x",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+    for indent in ["\t", "　　"]:
+        indented_lines = [line.replace("    ", indent) for line in lines]
+        indented_interpreter = Interpreter()
+        indented_interpreter.interpret_main_process(indented_lines)
+        assert indented_interpreter.lts.transitions == interpreter.lts.transitions
+        assert indented_interpreter.execute_lts() == 10
+
+
+def test_source_lines_indent():
+    lines = SourceLines(["a", "  b", "\tc", " \td", "　e", "\n"])
+    assert [lines.indent(idx) for idx in range(6)] == [0, 2, 4, 4, 2, 0]
+
+
+def test_check_syntax_multiple_errors():
+    lines = [
+        "整数型: x←0",
+        "y←1",
+        "if (x = 0)",
+        "    x←1",
+        "    z←2",
+        "endif",
+        "while (x < 3)",
+        "    x←x+1",
+        "整数型: 1a",
+        "  x←2",
+        "x←x+1",
+        "if (x > 0)",
+    ]
+    interpreter = Interpreter()
+    errors = interpreter.check_syntax(lines, file="test.txt")
+    assert [(error.line_num, error.error_type) for error in errors] == [
+        (1, "NameNotDefinedException"),
+        (4, "NameNotDefinedException"),
+        (8, "InvalidWhileBlockException"),
+        (8, "NamePatternException"),
+        (9, "InvalidIndentException"),
+        (11, "InvalidIndentException"),
+    ]
+    assert errors[1].file == "test.txt"
+    assert errors[1].column == 4
+    assert interpreter.syntax_errors is None
+
+    assert Interpreter().check_syntax(["整数型: x←0", "x←x+1"]) == []
+
+
+def test_interpret_main_process_array_in_right_operand():
+    # 配列の要素や要素数が演算子の右辺・関数の引数にあってもコンパイルできる
+    lines = [
+        "◯整数型: add(整数型: a, 整数型: b)",
+        "    return a + b",
+        "整数型: x←1",
+        "整数型の配列: arr←{1, 2, 3}",
+        "if (x < 4)",
+        "    x←x + arr[3]",
+        "    x←x + arrの要素数",
+        "    x←add(x, arr[2])",
+        "endif",
+        "return x",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+    assert interpreter.execute_lts() == 9
+
+
+def test_get_block():
+    lines = [
+        "整数型: x←0, y←0",
+        "x←x+1",
+        "y←y+x",
+        "while (x < 3)",
+        "    x←x+1",
+        "    y←y+x",
+        "endwhile",
+        "return y",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+    lts = interpreter.lts
+    block = lts.get_block("S0")
+    assert [entry.label for entry in block] == ["整数型: x←0, y←0", "x←x+1", "y←y+x"]
+    assert lts.get_state_type(block[-1].next_state) == StateType.WHILE
+    # 区間の途中の状態からは区間を開始しない
+    assert lts.get_block(block[1].state) is None
+    while_state = block[-1].next_state
+    body = lts.get_transition_state(while_state, "(x < 3)")
+    assert [entry.label for entry in lts.get_block(body)] == ["x←x+1", "y←y+x"]
+
+    # 遷移が追加されると区間を求め直す
+    lts.add_transition(block[1].state, "x←x+2", block[2].state)
+    assert lts.get_block("S0") is None
+
+
+def test_execute_lts_fuse_blocks():
+    lines = [
+        "◯整数型: test_double(整数型: a)",
+        "    整数型: b←a",
+        "    b←b+a",
+        "    return b",
+        "整数型: x←1, y←0",
+        "y←test_double(x)",
+        "x←y+test_double(y)",
+        "return x",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+    assert interpreter.execute_lts() == 6
+    assert not interpreter.fuse_blocks
+
+    # まとめて実行した区間内の例外も元の行番号を持つ
+    lines = [
+        "整数型: x←2",
+        "整数型の配列: arr←{1, 2}",
+        "x←x+1",
+        "x←arr[x]",
+        "return x",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+    with pytest.raises(exception.InvalidArrayIndexException) as e:
+        interpreter.execute_lts()
+    assert e.value.line_num == 3
+
+
+def test_array_access_cache():
+    lines = [
+        "◯整数型: test_one()",
+        "    return 1",
+        "整数型: i, s←0",
+        "整数型の配列: a←{1, 2, 3}",
+        "整数型の二次元配列: m←{{1, 2}, {3, 4}}",
+        "for (iを1から3まで1ずつ増やす)",
+        "    s←s + a[i] + m[2][1] + a[4 - i]",
+        "endfor",
+        "return s",
+    ]
+    interpreter = Interpreter(trace=False)
+    interpreter.interpret_main_process(lines)
+    assert interpreter.execute_lts() == 21
+    accesses = {
+        access.name: access for access in interpreter.array_access_cache.values()
+    }
+    assert accesses["m"].indexes == (
+        ArrayIndex(INDEX_CONST, 2),
+        ArrayIndex(INDEX_CONST, 1),
+    )
+    assert [access.indexes for access in interpreter.array_access_cache.values()][
+        0
+    ] == (ArrayIndex(INDEX_NAME, "i"),)
+    assert ArrayIndex(INDEX_FORMULA, "4 - i") in [
+        access.indexes[0] for access in interpreter.array_access_cache.values()
+    ]
+    # 関数呼び出しを含む添字は解析結果を再利用しない
+    assert interpreter.compile_array_access("a", ["test_one()"], "") is None
+
+    # 解析済みの参照でも配列外へのアクセスは例外となる
+    interpreter = Interpreter(trace=False)
+    interpreter.interpret_main_process(
+        [
+            "整数型: i, s←0",
+            "整数型の配列: a←{1, 2}",
+            "for (iを1から3まで1ずつ増やす)",
+            "    s←s + a[i]",
+            "endfor",
+        ]
+    )
+    with pytest.raises(exception.InvalidArrayIndexException) as e:
+        interpreter.execute_lts()
+    assert e.value.line_num == 3
+
+
+def test_array_append_cache():
+    lines = [
+        "◯整数型: test_one()",
+        "    return 1",
+        "整数型: i",
+        "整数型の配列: a←{}",
+        "整数型の二次元配列: m←{{1}, {2}}",
+        "for (iを1から3まで1ずつ増やす)",
+        "    aの末尾 に iを追加する",
+        "    m[2]の末尾 に i × 10を追加する",
+        "endfor",
+        "return a",
+    ]
+    interpreter = Interpreter(trace=False)
+    interpreter.interpret_main_process(lines)
+    assert interpreter.execute_lts() == [1, 2, 3]
+    assert interpreter.lts.name_val_map["m"] == [[1], [2, 10, 20, 30]]
+    appends = {
+        append.name: append for append in interpreter.array_append_cache.values()
+    }
+    assert appends["a"].indexes == ()
+    assert appends["a"].value == ArrayIndex(INDEX_NAME, "i")
+    assert appends["m"].indexes == (ArrayIndex(INDEX_CONST, 2),)
+    assert appends["m"].value == ArrayIndex(INDEX_FORMULA, "i × 10")
+
+    # 関数呼び出しを含む値は解析結果を再利用しない
+    assert interpreter.compile_array_append("a", [], "test_one()") is None
@@ -0,0 +1,37 @@
+import pytest
+
+from src import exception
+from src.lts.lts import LabeledTransitionSystem
+
+
+def test_set_lts_as_dict():
+    lts = LabeledTransitionSystem()
+    lts.add_transition("S0", "a", "S1")
+    lts.add_transition("S1", "b", "S0")
+    lts.add_transition("S1", "c", "S2")
+    lts.create_state("S3")
+
+    loaded = LabeledTransitionSystem()
+    loaded.set_lts_as_dict(lts.get_lts_as_dict())
+    assert loaded.transitions == lts.transitions
+    assert loaded.transitions["S0"] is not lts.transitions["S0"]
+    assert loaded.backwards == lts.backwards
+    assert loaded.labels == {"a", "b", "c"}
+    assert loaded.get_transition_state("S1", "c") == "S2"
+
+    # 取得した辞書を変更しても元のLTSは変わらない
+    lts_dict = lts.get_lts_as_dict()
+    lts_dict["states"]["S0"]["d"] = "S3"
+    lts_dict["states"]["S4"] = {}
+    assert "d" not in lts.transitions["S0"]
+    assert "S4" not in lts.transitions
+
+    # 遷移先のみに現れる状態も作成する
+    loaded = LabeledTransitionSystem()
+    loaded.set_lts_as_dict({"init_state": "S0", "states": {"S0": {"a": "S1"}}})
+    assert loaded.get_backwards("S1") == {("a", "S0")}
+
+    with pytest.raises(exception.DoesNotExistException):
+        LabeledTransitionSystem().set_lts_as_dict(
+            {"init_state": "S9", "states": {"S0": {}}}
+        )
@@ -0,0 +1,79 @@
+import pytest
+
+from src import exception
+from src.interpreter import Interpreter
+from src.memory import MemoryTracker, estimate_size
+
+
+def get_total_size(interpreter):
+    return sum(estimate_size(val) for val in interpreter.lts.name_val_map.values())
+
+
+def test_memory_tracker():
+    lines = [
+        "整数型: i",
+        "整数型の配列: a←{}",
+        "整数型の二次元配列: m←{{0}, {0}}",
+        "for (iを1から100まで1ずつ増やす)",
+        "    aの末尾 に iを追加する",
+        "    m[2]の末尾 に iを追加する",
+        "endfor",
+        "m[2][1]←1000",
+        "a←{}",
+        "return aの要素数",
+    ]
+    interpreter = Interpreter(trace=False)
+    interpreter.interpret_main_process(lines)
+    memory = MemoryTracker()
+    assert interpreter.execute_lts(memory=memory) == 0
+    # 配列を空にした後も実行中の最大値は保持される
+    assert memory.peak > memory.total
+    assert memory.peak >= estimate_size(list(range(1, 101))) * 2
+    assert memory.total == pytest.approx(get_total_size(interpreter), rel=0.1)
+
+
+def test_memory_limit():
+    lines = [
+        "整数型: i",
+        "整数型の配列: a←{}",
+        "for (iを1から100000まで1ずつ増やす)",
+        "    aの末尾 に iを追加する",
+        "endfor",
+    ]
+    interpreter = Interpreter(trace=False)
+    interpreter.interpret_main_process(lines)
+    memory = MemoryTracker(limit=10000)
+    with pytest.raises(exception.MemoryLimitExceededException) as e:
+        interpreter.execute_lts(memory=memory)
+    assert e.value.line_num == 3
+    assert memory.peak > 10000
+    assert len(interpreter.lts.name_val_map["a"]) < 1000
+
+
+def test_memory_tracker_alias():
+    lines = [
+        "◯整数型: count(整数型の配列: p)",
+        "    return pの要素数",
+        "整数型: i, n",
+        "整数型の配列: a←{}, b←{}",
+        "for (iを1から100まで1ずつ増やす)",
+        "    aの末尾 に iを追加する",
+        "endfor",
+        "b←a",
+        "bの末尾 に 0を追加する",
+        "n←count(b)",
+        "return n",
+    ]
+    interpreter = Interpreter(trace=False)
+    interpreter.interpret_main_process(lines)
+    memory = MemoryTracker()
+    assert interpreter.execute_lts(memory=memory) == 101
+    # 同じ配列を参照するa・b・関数の引数pは、配列を1度だけ数える
+    array_size = estimate_size(interpreter.lts.name_val_map["a"])
+    assert memory.total < array_size * 1.2
+    assert memory.peak < array_size * 1.2
+
+    # 実行後はメモリの集計が外れ、以降の実行は集計・上限の対象とならない
+    assert interpreter.memory is None
+    interpreter.execute_lts()
+    assert memory.peak < array_size * 1.2
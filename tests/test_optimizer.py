@@ -0,0 +1,81 @@
+from src.differential import run_differential
+from src.generator import ProgramGenerator
+from src.interpreter import Interpreter, StateType
+from src.optimizer import optimize_interpreter, optimize_lts
+
+
+def count_steps(interpreter):
+    interpreter.start_execution()
+    steps = 0
+    while interpreter.execute_line():
+        steps += 1
+    return steps, interpreter.finish_execution(interpreter.lts)
+
+
+def test_optimize_lts():
+    lines = [
+        "整数型: x←0, i",
+        "for (iを1から3まで1ずつ増やす)",
+        "    if (x = 0)",
+        "        x←x+1",
+        "    else",
+        "        x←x+1",
+        "    endif",
+        "endfor",
+        "do",
+        "    x←x-1",
+        "while (x > 1)",
+        "return x",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+    optimized = optimize_lts(interpreter.lts)
+
+    # endif・ループの戻り・doの状態は除去される
+    assert all(
+        optimized.get_state_type(state) != StateType.UNDEFINED
+        or len(optimized.transitions[state]) == 0
+        for state in optimized.transitions
+    )
+    # 両方の分岐の同じ代入は1つの状態に統合される
+    for_state = optimized.get_transition_state("S0", "整数型: x←0, i")
+    if_state = optimized.get_transition_state(for_state, "(iを1から3まで1ずつ増やす)")
+    assert optimized.get_transition_state(
+        if_state, "(x = 0)"
+    ) == optimized.get_transition_state(if_state, "else")
+    assert optimized.get_source_location(if_state, "else").line_num == 4
+    assert len(optimized.transitions) < len(interpreter.lts.transitions)
+
+
+def test_optimize_interpreter():
+    lines = [
+        "◯整数型: test_abs(整数型: a)",
+        "    if (a < 0)",
+        "        return -a",
+        "    endif",
+        "    return a",
+        "整数型: x←-3, y",
+        "while (x < 3)",
+        "    y←test_abs(x)",
+        "    x←x+1",
+        "endwhile",
+        "return y",
+    ]
+    interpreter = Interpreter(trace=False)
+    interpreter.interpret_main_process(lines)
+    steps, result = count_steps(interpreter)
+
+    interpreter = Interpreter(trace=False)
+    interpreter.interpret_main_process(lines)
+    stats = optimize_interpreter(interpreter)
+    assert stats["test_abs"][1][0] < stats["test_abs"][0][0]
+    optimized_steps, optimized_result = count_steps(interpreter)
+    assert optimized_result == result == 2
+    assert optimized_steps < steps
+    assert run_differential(lines, engine="optimized") is None
+
+
+def test_optimized_generated_programs():
+    for seed in range(10):
+        lines = ProgramGenerator(seed).generate()
+        assert run_differential(lines, engine="optimized") is None
@@ -0,0 +1,59 @@
+import io
+import json
+
+from src.interpreter import Interpreter
+from src.profiler import LineProfiler
+
+
+def test_profile_execute_lts():
+    lines = [
+        "整数型: a, x←0",
+        "for (aを1から10まで2ずつ増やす)",
+        "    x←x+a",
+        "endfor",
+        "return x",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+    profiler = LineProfiler()
+    assert interpreter.execute_lts(profiler=profiler) == 25
+
+    assert profiler.line_stats[("メイン関数", 0, "整数型: a, x←0")][0] == 1
+    assert profiler.line_stats[("メイン関数", 2, "x←x+a")][0] == 5
+    assert profiler.line_stats[("メイン関数", 1, "(aを1から10まで2ずつ増やす)")][0] == 5
+    assert profiler.line_stats[("メイン関数", 3, "endfor")][0] == 1
+    assert profiler.line_stats[("メイン関数", 4, "return x")][0] == 1
+    assert profiler.func_stats["メイン関数"][0] == sum(
+        hits for hits, _ in profiler.line_stats.values()
+    )
+    assert "x←x+a" in profiler.format_listing()
+
+    # プロファイラは指定した実行の間のみ設定され、以降の実行は計測しない
+    assert interpreter.profiler is None
+    interpreter.execute_lts()
+    assert profiler.line_stats[("メイン関数", 2, "x←x+a")][0] == 5
+
+
+def test_profile_func_call():
+    lines = [
+        "◯ test_gt(整数型:a, 整数型:b)",
+        "    return a > b",
+        "整数型: a←3, b←2",
+        "論理型: c←test_gt(a,b)",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+    profiler = LineProfiler()
+    interpreter.execute_lts(profiler=profiler)
+
+    # 関数呼び出しで中断された行は1回の実行として数える
+    assert profiler.line_stats[("メイン関数", 3, "論理型: c←test_gt(a,b)")][0] == 1
+    assert profiler.line_stats[("test_gt", 1, "return a > b")][0] == 1
+
+    report = json.loads(json.dumps(profiler.get_report()))
+    assert set(report["functions"]) == {"メイン関数", "test_gt"}
+
+    folded = io.StringIO()
+    profiler.dump_folded(folded)
+    stacks = [line.rsplit(" ", 1)[0] for line in folded.getvalue().splitlines()]
+    assert "メイン関数;test_gt;return a > b" in stacks
@@ -0,0 +1,142 @@
+import json
+import threading
+import urllib.request
+
+import pytest
+
+from src.server import (
+    EXECUTION_ERROR,
+    METHOD_NOT_FOUND,
+    ExecutionService,
+    create_server,
+)
+from src.session import SessionPool
+
+SOURCE = """◯ test_add(整数型:a, 整数型:b)
+    return a + b
+整数型: i, x←0
+for (iを1から3まで1ずつ増やす)
+    x←test_add(x, i)
+endfor
+return x
+"""
+
+
+@pytest.fixture
+def call():
+    server = create_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    def call(method: str, **params):
+        request = urllib.request.Request(
+            url,
+            data=json.dumps(
+                {"jsonrpc": "2.0", "method": method, "params": params, "id": 1}
+            ).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+
+    yield call
+    server.shutdown()
+    server.server_close()
+
+
+def test_compile_and_run(call):
+    program_id = call("compile", source=SOURCE)["result"]["program_id"]
+    # 同じソースコードはコンパイル済みのプログラムを再利用する
+    assert call("compile", source=SOURCE)["result"]["program_id"] == program_id
+    result = call("run", program_id=program_id)["result"]
+    assert result["ended"]
+    assert result["result"] == 6
+
+    response = call("compile", source="整数型: x←0\ny←1\nz←2\n")
+    assert response["error"]["code"] == EXECUTION_ERROR
+    assert [error["line_num"] for error in response["error"]["data"]] == [1, 2]
+    assert call("unknown")["error"]["code"] == METHOD_NOT_FOUND
+
+
+def test_step_snapshot_restore(call):
+    program_id = call("compile", source=SOURCE)["result"]["program_id"]
+    session_id = call("start", program_id=program_id)["result"]["session_id"]
+    state = call("step", session_id=session_id, count=5)["result"]
+    assert state["steps"] == 5
+    assert not state["ended"]
+
+    snapshot = call("snapshot", session_id=session_id)["result"]
+    finished = call("step", session_id=session_id, count=1000)["result"]
+    assert finished["result"] == 6
+
+    # スナップショットから復元したセッションは同じ結果になる
+    restored_id = call("restore", snapshot=snapshot)["result"]["session_id"]
+    restored = call("step", session_id=restored_id, count=1000)["result"]
+    assert restored["result"] == 6
+    assert restored["steps"] == finished["steps"]
+    call("close", session_id=restored_id)
+    assert call("step", session_id=restored_id)["error"]["code"] == EXECUTION_ERROR
+
+
+def test_memory_limit():
+    service = ExecutionService(memory_limit=5000)
+    source = "整数型: i\n整数型の配列: a←{{}}\nfor (iを1から{}まで1ずつ増やす)\n"
+    source += "    aの末尾 に iを追加する\nendfor\nreturn aの要素数\n"
+    small = service.compile(source.format(10))["program_id"]
+    state = service.run(small)
+    assert state["result"] == 10
+    assert 0 < state["peak_memory"] <= 5000
+    large = service.compile(source.format(10000))["program_id"]
+    response = service.handle(
+        {"jsonrpc": "2.0", "method": "run", "params": {"program_id": large}, "id": 1}
+    )
+    assert response["error"]["data"]["type"] == "MemoryLimitExceededException"
+
+
+def test_run_max_steps():
+    service = ExecutionService(max_steps=5)
+    program_id = service.compile(SOURCE)["program_id"]
+    # サーバの上限を超える遷移数を指定しても上限で止まる
+    state = service.run(program_id, max_steps=1000)
+    assert state["steps"] == 5
+    assert not state["ended"]
+    assert service.run(program_id, max_steps=3)["steps"] == 3
+
+
+def test_restore_detaches_memory():
+    service = ExecutionService(memory_limit=100000)
+    program_id = service.compile(SOURCE)["program_id"]
+    session_id = service.start(program_id)["session_id"]
+    service.step(session_id, count=5)
+    snapshot = service.snapshot(session_id)
+    restored_id = service.restore(snapshot)["session_id"]
+    interpreter = service.pool.get_interpreter(restored_id)
+    assert interpreter.memory is not None
+    state = service.step(restored_id, count=1000)
+    assert state["result"] == 6
+    assert state["peak_memory"] > 0
+    # 実行の終了後は集計が外れている
+    assert interpreter.memory is None
+
+
+def test_evict_during_step():
+    service = ExecutionService(pool=SessionPool(idle_timeout=0, trace=False))
+    program_id = service.compile(SOURCE)["program_id"]
+    session_id = service.start(program_id)["session_id"]
+    interpreter = service.pool.get_interpreter(session_id)
+    execute_line = interpreter.execute_line
+    evicted = []
+
+    def execute_line_with_request(*args, **kwargs):
+        # 実行の途中で他のリクエストが解放の判定を行う
+        if not evicted:
+            request = {"method": "compile", "params": {"source": SOURCE}, "id": 1}
+            evicted.append(service.handle(request))
+        return execute_line(*args, **kwargs)
+
+    interpreter.execute_line = execute_line_with_request
+    state = service.step(session_id, count=1000)
+    assert evicted
+    assert state["result"] == 6
+    assert session_id in service.pool.sessions
@@ -0,0 +1,49 @@
+import pytest
+
+from src import exception
+from src.session import SessionPool
+
+
+def test_reuse_interpreter():
+    pool = SessionPool(max_idle=1)
+    session_id = pool.create_session()
+    interpreter = pool.get_interpreter(session_id)
+    interpreter.interpret_main_process(["整数型: x←1", "return x+1"])
+    assert interpreter.execute_lts() == 2
+    pool.release_session(session_id)
+    with pytest.raises(exception.SessionDoesNotExistException):
+        pool.get_interpreter(session_id)
+
+    # 解放されたInterpreterは実行状態を初期化して再利用する
+    other_id = pool.create_session()
+    other = pool.get_interpreter(other_id)
+    assert other is interpreter
+    assert other.lts.name_val_map == {}
+    assert other.func_lts_map == {}
+    other.interpret_main_process(["return 3"])
+    assert other.execute_lts() == 3
+
+    # 別のセッションには別のInterpreterを貸し出す
+    assert pool.get_interpreter(pool.create_session()) is not other
+
+
+def test_evict_idle():
+    pool = SessionPool(idle_timeout=10)
+    old_id = pool.create_session()
+    new_id = pool.create_session()
+    last_used = pool.sessions[new_id].last_used
+    pool.sessions[old_id].last_used = last_used - 20
+    assert pool.evict_idle(now=last_used + 1) == [old_id]
+    assert pool.count_sessions() == 1
+    assert len(pool.idle_interpreters) == 1
+
+
+def test_evict_skips_sessions_in_use():
+    pool = SessionPool(idle_timeout=10)
+    session_id = pool.create_session()
+    far_future = pool.sessions[session_id].last_used + 100
+    with pool.use(session_id) as interpreter:
+        # 使用中のセッションは最終利用時刻に関わらず解放しない
+        assert pool.evict_idle(now=far_future) == []
+        assert pool.get_interpreter(session_id) is interpreter
+    assert pool.evict_idle(now=far_future + 100) == [session_id]
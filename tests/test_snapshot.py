@@ -0,0 +1,53 @@
+import io
+import json
+
+from src.interpreter import Interpreter
+from src.snapshot import dump_execution, load_execution
+
+
+def get_interpreter():
+    lines = [
+        "◯ test_add(整数型:a, 整数型:b)",
+        "    return a + b",
+        "整数型: x←0",
+        "x←test_add(x, 2)",
+        "x←x+1",
+    ]
+    interpreter = Interpreter()
+    interpreter.interpret_main_process(lines)
+    interpreter.init_execution()
+    for _ in range(3):
+        interpreter.execute_line()
+    return interpreter
+
+
+def test_dump_and_load_execution():
+    interpreter = get_interpreter()
+    f = io.StringIO()
+    dump_execution(interpreter, f)
+    # ストリーミング形式でもJSONとして読み込める
+    assert json.loads(f.getvalue()) == json.loads(
+        json.dumps(interpreter.get_execution_dict(), ensure_ascii=False)
+    )
+
+    f.seek(0)
+    loaded = Interpreter()
+    load_execution(loaded, f)
+    assert set(loaded.func_lts_map) == {"メイン関数", "test_add"}
+    assert loaded.calling_stack == json.loads(json.dumps(interpreter.calling_stack))
+    assert loaded.lts.transitions == interpreter.lts.transitions
+    assert loaded.lts.source_map == interpreter.lts.source_map
+    while not loaded.is_ended():
+        loaded.execute_line()
+    assert loaded.lts.name_val_map["x"] == 3
+
+
+def test_load_pretty_execution():
+    interpreter = get_interpreter()
+    f = io.StringIO()
+    dump_execution(interpreter, f, pretty=True)
+    f.seek(0)
+    loaded = Interpreter()
+    load_execution(loaded, f)
+    assert loaded.lts.source_map == interpreter.lts.source_map
+    assert loaded.lts.name_val_map == interpreter.lts.name_val_map
@@ -0,0 +1,95 @@
+import pytest
+from src import exception
+from src.differential import run_differential
+from src.interpreter import Interpreter
+from src.vectorizer import FILL, MAP, REDUCTION, LoopVectorizer, attach_vectorizer
+
+
+def test_compile_idiom():
+    interpreter = Interpreter(trace=False)
+    vectorizer = LoopVectorizer()
+    sentence = "(iを1からnまで1ずつ増やす)"
+    assert vectorizer.compile_idiom(interpreter, sentence, "s←s + a[i]").kind == (
+        REDUCTION
+    )
+    assert vectorizer.compile_idiom(interpreter, sentence, "b[i]←a[i] × 2").kind == MAP
+    assert vectorizer.compile_idiom(interpreter, sentence, "b[i]←0").kind == FILL
+    # 他の添字や複数の演算子を含む代入は認識しない
+    assert vectorizer.compile_idiom(interpreter, sentence, "b[i]←a[i + 1]") is None
+    assert vectorizer.compile_idiom(interpreter, sentence, "s←s + a[i] × 2") is None
+    assert vectorizer.compile_idiom(interpreter, sentence, "s←t + a[i]") is None
+    # 繰り返しの条件が代入先を参照する場合は1回ごとに条件が変わる
+    assert (
+        vectorizer.compile_idiom(interpreter, "(iを1からsまで1ずつ増やす)", "s←s + i")
+        is None
+    )
+    assert (
+        vectorizer.compile_idiom(interpreter, "(iを1からb[1]まで1ずつ増やす)", "b[i]←0")
+        is None
+    )
+    assert (
+        vectorizer.compile_idiom(
+            interpreter, "(iを1からbの要素数まで1ずつ増やす)", "b[i]←0"
+        ).kind
+        == FILL
+    )
+
+
+def test_execute_vectorized_loops():
+    lines = [
+        "整数型: i, s←0, t←1",
+        "整数型の配列: a←{1, 2, 3, 4, 5}, b←{0, 0, 0, 0, 0}",
+        "for (iを1からaの要素数まで1ずつ増やす)",
+        "    s←s + a[i]",
+        "endfor",
+        "for (iを1から5まで2ずつ増やす)",
+        "    b[i]←a[i] × 2",
+        "endfor",
+        "for (iを2から3まで1ずつ増やす)",
+        "    b[i]←i",
+        "endfor",
+        "for (iを1から5まで1ずつ増やす)",
+        "    t←a[i] - t",
+        "endfor",
+        "return s",
+    ]
+    interpreter = Interpreter(trace=False)
+    interpreter.interpret_main_process(lines)
+    vectorizer = attach_vectorizer(interpreter)
+    assert interpreter.execute_lts() == 15
+    assert interpreter.lts.name_val_map["b"] == [2, 2, 3, 0, 10]
+    assert interpreter.lts.name_val_map["t"] == 2
+    assert interpreter.lts.name_val_map["i"] is None
+    assert len(vectorizer.idiom_cache) == 4
+
+    # 配列の範囲外を参照する場合は1遷移ずつ実行し、同じ例外を発生させる
+    interpreter = Interpreter(trace=False)
+    interpreter.interpret_main_process(
+        [
+            "整数型: i, s←0",
+            "整数型の配列: a←{1, 2}",
+            "for (iを1から3まで1ずつ増やす)",
+            "    s←s + a[i]",
+            "endfor",
+        ]
+    )
+    attach_vectorizer(interpreter)
+    with pytest.raises(exception.InvalidArrayIndexException) as e:
+        interpreter.execute_lts()
+    assert e.value.line_num == 3
+    assert interpreter.lts.name_val_map["s"] == 3
+
+
+def test_vectorized_engine():
+    lines = [
+        "整数型: i, s←0",
+        "実数型の配列: a←{0.1, 0.2, 0.3, true}",
+        "for (iを1から3まで1ずつ増やす)",
+        "    s←s + a[i]",
+        "endfor",
+        "for (iを1から4まで1ずつ増やす)",
+        "    s←s + a[i]",
+        "endfor",
+        "return s",
+    ]
+    assert run_differential(lines, engine="vectorized") is None